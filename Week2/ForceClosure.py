@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Force closure tests for wrench matrices W (d,n), whose n columns are
+unisense contact wrenches (normal forces, friction cone edges, or both
+signs of a bidirectional component). The grasp has force closure when
+the columns positively span R^d, which can be checked in several ways:
+
+- 'lp': the approach of linprogexamples.py, rank(W) = d and a linprog
+  for k >= 1 with W*k = 0
+- 'hull': the origin is strictly inside the convex hull of the columns,
+  read from the facet equations of the hull
+- 'span': Mason & Salisbury, rank(W) = d and a strictly positive
+  combination of the columns is zero. For n = d+1 this means the (one
+  dimensional) null space has all components of the same sign, checked
+  for a whole batch with one SVD. Otherwise, -sum(w_i) must be in the
+  cone of the columns (then W*(k+1) = 0 with k >= 0), checked with a
+  non-negative least squares solve, which is much faster than linprog.
+
+force_closure() takes a batch of matrices (B,d,n), or a list of matrices
+of any shapes, and picks the fastest test for each shape.
+"""
+
+import numpy as np
+from scipy.optimize import linprog, nnls
+from scipy.spatial import ConvexHull, QhullError
+
+from Instrumentation import instrument, stage
+
+
+# Rank of each matrix in a (B,d,n) stack equals d
+def full_rank(Ws, tol=1e-9):
+    s = np.linalg.svd(Ws, compute_uv=False)
+    return np.all(s > tol*np.maximum(s[..., :1], 1), axis=-1) & \
+        (Ws.shape[-1] >= Ws.shape[-2])
+
+
+# As in linprogexamples.py: k >= 1 with W*k = 0
+def lp_test(W, tol=1e-9):
+    d, n = W.shape
+    if not full_rank(W[None], tol)[0]:
+        return False
+    with stage('lp', W):
+        res = linprog(np.ones(n), A_ub=-np.identity(n), b_ub=-np.ones(n),
+                      A_eq=W, b_eq=np.zeros(d), method='highs')
+    return res.status == 0
+
+
+# Origin strictly inside the hull: all facet offsets of n.x + b <= 0
+# are negative
+def hull_test(W, tol=1e-9):
+    try:
+        with stage('hull', W):
+            hull = ConvexHull(W.T)
+    except (QhullError, ValueError):
+        return False  # the columns do not span R^d
+    scale = np.max(np.abs(W))
+    return bool(np.all(hull.equations[:, -1] < -tol*scale))
+
+
+# Mason & Salisbury for a batch (B,d,d+1): the null vector of each matrix
+# must have all components of the same (strict) sign
+def span_test_simplex(Ws, tol=1e-9):
+    _, s, Vt = np.linalg.svd(Ws)
+    null = Vt[..., -1, :]
+    rank = np.all(s > tol*np.maximum(s[..., :1], 1), axis=-1)
+    return rank & (np.all(null > tol, axis=-1) | np.all(null < -tol, axis=-1))
+
+
+# Mason & Salisbury for any n: rank d and -sum(w_i) in the cone of W
+def span_test(W, tol=1e-9):
+    if W.shape[1] == W.shape[0] + 1:
+        return bool(span_test_simplex(W[None], tol)[0])
+    if not full_rank(W[None], tol)[0]:
+        return False
+    target = -W.sum(axis=1)
+    _, residual = nnls(W, target)
+    return residual <= tol*max(np.linalg.norm(target), 1)
+
+
+TESTS = {'lp': lp_test, 'hull': hull_test, 'span': span_test}
+
+
+# Force closure of each wrench matrix: Ws is a (B,d,n) array or a list of
+# (d,n) arrays. method is one of TESTS, or 'auto' for the fastest valid
+# test: the batched null-vector check for n = d+1 and nnls otherwise.
+# Returns a boolean array (B,).
+@instrument('metric')
+def force_closure(Ws, method='auto', tol=1e-9):
+    if method != 'auto' and method not in TESTS:
+        raise ValueError('method should be auto, ' + ', '.join(TESTS))
+    if isinstance(Ws, np.ndarray) and Ws.ndim == 2:
+        Ws = Ws[None]
+
+    # group the matrices by shape so each group can be tested in one go
+    groups = {}
+    for i, W in enumerate(Ws):
+        groups.setdefault(np.shape(W), []).append(i)
+
+    result = np.zeros(len(Ws), dtype=bool)
+    for (d, n), index in groups.items():
+        stack = np.array([Ws[i] for i in index], dtype=float)
+        if n < d + 1:
+            continue  # at least d+1 wrenches are needed
+        if method == 'auto' and n == d + 1:
+            result[index] = span_test_simplex(stack, tol)
+        else:
+            test = TESTS['span' if method == 'auto' else method]
+            result[index] = [test(W, tol) for W in stack]
+    return result
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Contact force distribution for a fixed grasp and a stream of external
+wrenches, as in Q7 of week2.py but with linearized friction cones and
+unisense normal forces instead of box bounds, and fast enough to run in a
+control loop.
+
+The columns of G (nw,C*dim) are the wrenches of the contact force
+components, grouped per contact as in Wnf of week2.py: [ft1, ft2, fn]
+for dim=3 (or [ft, fn] for planar contacts, dim=2), with the normal
+component last and fn >= 0 pushing into the object. For each wrench w
+we look for contact forces k with
+
+    G*k = w,   fn >= fmin,   |ft| inside an m-sided friction pyramid
+
+minimizing either the (weighted) norm of k ('min-norm') or the largest
+normal force ('min-max', with a small quadratic regularization so that
+the solution is unique). Both are convex QPs, solved with a primal
+active-set method. For a fixed set of active constraints the solution is
+linear in w, so the matrix that maps w to k is computed once per active
+set and cached: when the active set of the previous wrench is still
+optimal (the usual case for a smooth stream of wrenches) a solve is a
+single matrix-vector product plus a feasibility check.
+
+If G has dependent rows (rank < nw, e.g. two opposing contacts cannot
+resist a moment about the line through them) the equality constraints
+are replaced by their projection on an orthonormal basis of the range of
+G, so that the KKT matrices stay regular; wrenches outside that range
+cannot be balanced.
+"""
+
+import numpy as np
+from scipy.optimize import linprog
+
+from FrictionCones import friction_cone
+from Instrumentation import instrument, stage
+
+
+class ForceDistribution:
+    # G: (nw, C*dim) contact wrench matrix, dim = 3 (or 2 in the plane)
+    # mu: friction coefficient (scalar or one per contact)
+    # m: number of sides of the friction pyramids (inscribed in the cone);
+    #    for dim=2 the planar cone |ft| <= mu*fn is exact
+    # fmin: lower bound on the normal forces (unisense normals)
+    # objective: 'min-norm' or 'min-max'
+    # weights: per-component weights of the norm (default ones)
+    # eps: regularization of the min-max objective
+    # cache_size: number of active sets whose solution maps are kept
+    def __init__(self, G, mu, m=4, fmin=0.0, dim=3, objective='min-norm',
+                 weights=None, eps=1e-6, tol=1e-9, cache_size=256):
+        G = np.asarray(G, dtype=float)
+        nw, nk = G.shape
+        if nk % dim:
+            raise ValueError('G should have dim columns per contact')
+        if objective not in ('min-norm', 'min-max'):
+            raise ValueError("objective should be 'min-norm' or 'min-max'")
+        ncontacts = nk//dim
+        mu = np.broadcast_to(np.asarray(mu, dtype=float), (ncontacts,))
+
+        # friction pyramid faces (see FrictionCones.py) and unisense
+        # normals: A*k <= b
+        if dim not in (2, 3):
+            raise ValueError('dim should be 2 or 3')
+        model = 'friction' if dim == 3 else 'planar'
+        rows = []
+        for c in range(ncontacts):
+            faces = friction_cone(model, mu[c], m).halfspaces
+            block = np.zeros((len(faces) + 1, nk))
+            block[:-1, c*dim:(c + 1)*dim] = faces
+            block[-1, c*dim + dim - 1] = -1
+            rows.append(block)
+        A = np.vstack(rows)
+        b = np.concatenate([np.append(np.zeros(len(block) - 1), -fmin)
+                            for block in rows])
+
+        weights = np.ones(nk) if weights is None else np.asarray(weights, float)
+        if objective == 'min-norm':
+            H = np.diag(weights)
+            c = np.zeros(nk)
+        else:
+            # extra variable t >= every fn, minimize t
+            normals = np.arange(dim - 1, nk, dim)
+            tmax = np.zeros((ncontacts, nk + 1))
+            tmax[np.arange(ncontacts), normals] = 1
+            tmax[:, -1] = -1
+            A = np.vstack((np.column_stack((A, np.zeros(len(A)))), tmax))
+            b = np.append(b, np.zeros(ncontacts))
+            G = np.column_stack((G, np.zeros(nw)))
+            H = eps*np.diag(np.append(weights, 1.0))
+            c = np.zeros(nk + 1)
+            c[-1] = 1
+
+        # orthonormal basis (r,nw) of the range of G: G*k = w becomes
+        # basis*G*k = basis*w with independent rows
+        U, s, _ = np.linalg.svd(G, full_matrices=False)
+        self.basis = U[:, s > tol*max(s.max(initial=0), 1)].T
+        G = self.basis @ G
+
+        self.G, self.A, self.b, self.H, self.c = G, A, b, H, c
+        self.nk = nk
+        self.tol = tol
+        self.cache_size = cache_size
+        self._maps = {}
+        self._active = ()
+        self._interior = self._interior_point()
+
+    # Internal force strictly inside all the inequality constraints
+    # (G*x = 0, A*x < 0), used to get a feasible start
+    # for any wrench. None if there is no such force (no force closure).
+    def _interior_point(self):
+        nx = self.G.shape[1]
+        with stage('lp', self.G, self.A):
+            res = linprog(np.append(np.zeros(nx), -1),
+                          A_ub=np.column_stack((self.A, np.ones(len(self.A)))),
+                          b_ub=np.zeros(len(self.A)),
+                          A_eq=np.column_stack((self.G, np.zeros(len(self.G)))),
+                          b_eq=np.zeros(len(self.G)),
+                          bounds=[(-1, 1)]*nx + [(None, 1)], method='highs')
+        if res.status != 0 or res.x[-1] <= self.tol:
+            return None
+        return res.x[:-1]
+
+    # Affine map (M, m0) from w to the solution x and the multipliers of
+    # the constraints in the active set, for that set of active rows.
+    # None if the constraints are linearly dependent.
+    def _map(self, active):
+        cached = self._maps.pop(active, None)
+        if cached is None:
+            C = np.vstack((self.G, self.A[list(active)]))
+            nx, nc = self.H.shape[0], len(C)
+            KKT = np.block([[self.H, C.T], [C, np.zeros((nc, nc))]])
+            try:
+                Kinv = np.linalg.inv(KKT)
+            except np.linalg.LinAlgError:
+                return None
+            if not np.all(np.isfinite(Kinv)) or np.linalg.cond(KKT) > 1e12:
+                return None
+            nw = len(self.G)
+            rhs0 = np.concatenate((-self.c, np.zeros(nw), self.b[list(active)]))
+            # KKT*[x; y] = [-c; w; b_active], multipliers of A rows are y[nw:]
+            cached = (Kinv[:, nx:nx + nw], Kinv @ rhs0)
+        self._maps[active] = cached  # most recently used at the end
+        while len(self._maps) > self.cache_size:
+            self._maps.pop(next(iter(self._maps)))
+        return cached
+
+    # Solution and multipliers for an active set, or None
+    def _eqp(self, active, w):
+        mapping = self._map(active)
+        if mapping is None:
+            return None
+        M, m0 = mapping
+        sol = M @ w + m0
+        nx, nw = self.H.shape[0], len(self.G)
+        return sol[:nx], sol[nx + nw:]
+
+    # Feasible starting point for w: particular solution plus enough of
+    # the interior internal force, or a phase-1 LP without one
+    def _feasible(self, w):
+        x0 = np.linalg.lstsq(self.G, w, rcond=None)[0]
+        if self._interior is not None:
+            slack = self.A @ x0 - self.b
+            inner = self.A @ self._interior
+            need = np.where(inner < 0, slack/np.where(inner < 0, -inner, 1), 0)
+            if np.all(slack[inner >= 0] <= self.tol):
+                return x0 + max(need.max(), 0)*self._interior
+        res = linprog(np.zeros(self.G.shape[1]), A_ub=self.A, b_ub=self.b,
+                      A_eq=self.G, b_eq=w, bounds=(None, None), method='highs')
+        return res.x if res.status == 0 else None
+
+    # Primal active-set iterations from a feasible point x. Returns the
+    # solution and its active set, or None and () if they break down.
+    def _active_set(self, x, w, maxiter=200):
+        active = tuple(np.flatnonzero(self.A @ x - self.b >= -self.tol))
+        # keep the working set independent
+        while active and self._map(active) is None:
+            active = active[:-1]
+        for _ in range(maxiter):
+            eqp = self._eqp(active, w)
+            if eqp is None:
+                return None, ()
+            x_eqp, lam = eqp
+            p = x_eqp - x
+            if np.max(np.abs(p)) <= self.tol*max(1, np.max(np.abs(x))):
+                if len(lam) == 0 or lam.min() >= -self.tol:
+                    return x_eqp, active
+                # drop the constraint with the most negative multiplier
+                active = active[:np.argmin(lam)] + active[np.argmin(lam) + 1:]
+                continue
+            # longest step along p that keeps x feasible
+            Ap = self.A @ p
+            slack = self.b - self.A @ x
+            blocking = Ap > self.tol
+            blocking[list(active)] = False
+            alpha, hit = 1.0, None
+            if blocking.any():
+                ratios = np.full(len(Ap), np.inf)
+                ratios[blocking] = slack[blocking]/Ap[blocking]
+                hit = int(np.argmin(ratios))
+                if ratios[hit] < 1:
+                    alpha = max(ratios[hit], 0)
+                else:
+                    hit = None
+            x = x + alpha*p
+            if hit is not None:
+                grown = tuple(sorted(active + (hit,)))
+                if self._map(grown) is not None:
+                    active = grown
+        raise Exception('force distribution did not converge')
+
+    # Contact forces (C*dim,) for one external wrench w (nw,), warm
+    # started from the active set of the previous call. Returns None if
+    # no contact forces can balance w.
+    @instrument('lp')
+    def solve(self, w):
+        w = np.asarray(w, dtype=float)
+        reduced = self.basis @ w
+        if np.linalg.norm(w - self.basis.T @ reduced) > self.tol*max(1, np.linalg.norm(w)):
+            return None  # outside the range of G
+        w = reduced
+        eqp = self._eqp(self._active, w)
+        if eqp is not None:
+            x, lam = eqp
+            if (len(lam) == 0 or lam.min() >= -self.tol) and \
+                    np.all(self.A @ x - self.b <= self.tol):
+                return x[:self.nk]
+        # cold path: feasible start and active-set iterations
+        x = self._feasible(w)
+        if x is None:
+            return None
+        x, self._active = self._active_set(x, w)
+        return None if x is None else x[:self.nk]
+
+    # Contact forces (N, C*dim) for a sequence of wrenches (N,nw); rows
+    # that cannot be balanced are NaN
+    def solve_sequence(self, wrenches):
+        wrenches = np.atleast_2d(wrenches)
+        out = np.full((len(wrenches), self.nk), np.nan)
+        for i, w in enumerate(wrenches):
+            k = self.solve(w)
+            if k is not None:
+                out[i] = k
+        return out
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Linearized friction cones of the contact models, built in one place
+instead of by hand in each script, and cached by (model, mu, m, ...) so
+batched evaluations do not redo the trigonometry. Like WrenchUtils.py,
+this file is copied into each week folder that uses it.
+
+Cones are expressed in the contact force coordinates of GraspMatrix.py
+(CONTACT_MODELS), with the normal force fn >= 0 pushing into the object:
+- 'normal':   [fn], frictionless
+- 'friction': [fx, fy, fn], point contact with |(fx, fy)| <= mu fn,
+              linearized by an m-sided pyramid
+- 'soft':     [fx, fy, fn, mz], soft finger: the 'friction' pyramid and
+              torsional friction |mz| <= torsion fn
+- 'planar':   [ft, fn], planar contact |ft| <= mu fn (exact, m unused)
+
+Each cone is given both as generators (rows, unit length, for hulls:
+the cone is their nonnegative combinations) and as half-spaces A with
+A f <= 0 (for LPs). The pyramid is inscribed in the circular cone (its
+edges lie on it, so it is conservative) or, with inscribed=False,
+circumscribed (its faces touch it, as the polygons in SakuraiFriction.py).
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+MODELS = ('normal', 'friction', 'soft', 'planar')
+
+
+class FrictionCone:
+    def __init__(self, generators, halfspaces):
+        self.generators = generators
+        self.halfspaces = halfspaces
+        for array in (generators, halfspaces):
+            array.setflags(write=False)  # shared by every cached user
+        self.dim = generators.shape[1]
+
+
+# Unit rows
+def _normalize(rows):
+    return rows/np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+# Edge directions (m,2) of the tangential force polygon |ft| <= mu:
+# edges at angles (2k+1)pi/m, faces with outward normals at 2k pi/m
+def _polygon(mu, m, inscribed):
+    if m < 3:
+        raise ValueError('friction pyramids need m >= 3 sides')
+    radius = mu if inscribed else mu/np.cos(np.pi/m)
+    angles = (2*np.arange(m) + 1)*np.pi/m
+    edges = radius*np.column_stack((np.cos(angles), np.sin(angles)))
+    normals = 2*np.pi*np.arange(m)/m
+    faces = np.column_stack((np.cos(normals), np.sin(normals),
+                             -radius*np.cos(np.pi/m)*np.ones(m)))
+    return edges, faces
+
+
+# Cone of a contact model for friction coefficient mu, m pyramid sides
+# and (soft fingers) torsional coefficient, default mu. Cached: the same
+# FrictionCone is returned for the same arguments.
+@lru_cache(maxsize=256)
+def friction_cone(model, mu, m=4, torsion=None, inscribed=True):
+    mu = float(mu)
+    if mu < 0:
+        raise ValueError('mu should be nonnegative')
+    if model == 'normal':
+        return FrictionCone(np.array([[1.0]]), np.array([[-1.0]]))
+    if model == 'planar':
+        generators = _normalize(np.array([[-mu, 1.0], [mu, 1.0]]))
+        return FrictionCone(generators, np.array([[1.0, -mu], [-1.0, -mu]]))
+    if model not in MODELS:
+        raise ValueError('model should be one of ' + ', '.join(MODELS))
+
+    edges, faces = _polygon(mu, m, inscribed)
+    if model == 'friction':
+        generators = np.column_stack((edges, np.ones(m)))
+        return FrictionCone(_normalize(generators), faces)
+
+    # soft finger: the cone over (pyramid section) x [-torsion, torsion]
+    torsion = mu if torsion is None else float(torsion)
+    generators = np.vstack([np.column_stack((edges, np.ones(m), sign*torsion*np.ones(m)))
+                            for sign in (-1, 1)])
+    halfspaces = np.vstack((np.column_stack((faces, np.zeros(m))),
+                            [[0, 0, -torsion, 1], [0, 0, -torsion, -1]]))
+    return FrictionCone(_normalize(generators), halfspaces)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Grasp (wrench) matrix of N spatial contacts, as Wn and Wnf in week2.py,
+assembled in one vectorized pass instead of a Cartesmap() call per
+contact, with the SVD computed once and reused for the rank, null space
+and pseudo-inverse.
+
+Contacts are located at tp[i] and rotated by th[i] (RPY angles, as in
+Cartesmap()), with the contact normal along -Z in the local frame. The
+columns of each contact depend on its model:
+- 'normal': frictionless, the normal force only
+- 'friction': point contact with friction, [fx, fy, fz] local forces
+- 'soft': soft finger, as 'friction' plus a moment about the normal
+"""
+
+import numpy as np
+
+from WrenchUtils import Rcross
+from FrictionCones import friction_cone
+from Instrumentation import instrument
+
+# Local contact wrenches (6,k) of each contact model
+CONTACT_MODELS = {
+    'normal': np.array([[0, 0, -1, 0, 0, 0]]).T,
+    'friction': np.array([[1, 0, 0, 0, 0, 0],
+                          [0, 1, 0, 0, 0, 0],
+                          [0, 0, -1, 0, 0, 0]]).T,
+    'soft': np.array([[1, 0, 0, 0, 0, 0],
+                      [0, 1, 0, 0, 0, 0],
+                      [0, 0, -1, 0, 0, 0],
+                      [0, 0, 0, 0, 0, 1]]).T,
+}
+
+
+# Transposes of Cartesmap() (N,6,6) for N contacts at once: they map a
+# wrench in each contact frame to the body frame
+@instrument('transforms')
+def cartesmaps_transposed(tp, th):
+    tp = np.asarray(tp, dtype=float)
+    th = np.asarray(th, dtype=float)
+    c, s = np.cos(th), np.sin(th)
+    one, zero = np.ones(len(th)), np.zeros(len(th))
+    Rx = np.array([[one, zero, zero], [zero, c[:, 0], -s[:, 0]],
+                   [zero, s[:, 0], c[:, 0]]]).transpose(2, 0, 1)
+    Ry = np.array([[c[:, 1], zero, s[:, 1]], [zero, one, zero],
+                   [-s[:, 1], zero, c[:, 1]]]).transpose(2, 0, 1)
+    Rz = np.array([[c[:, 2], -s[:, 2], zero], [s[:, 2], c[:, 2], zero],
+                   [zero, zero, one]]).transpose(2, 0, 1)
+    Amat = Rx @ Ry @ Rz
+    Rskew = np.array([Rcross(*r) for r in tp])
+    Jbtran = np.zeros((len(tp), 6, 6))
+    Jbtran[:, :3, :3] = Amat
+    Jbtran[:, 3:, :3] = Rskew @ Amat
+    Jbtran[:, 3:, 3:] = Amat
+    return Jbtran
+
+
+class GraspMatrix:
+    # tp, th: (N,3) contact locations and RPY rotations
+    # models: one of CONTACT_MODELS for all contacts, or a list of N
+    def __init__(self, tp, th, models='friction', tol=1e-10):
+        self.tp = np.atleast_2d(np.asarray(tp, dtype=float))
+        self.th = np.atleast_2d(np.asarray(th, dtype=float))
+        ncontacts = len(self.tp)
+        self.models = [models]*ncontacts if isinstance(models, str) \
+            else list(models)
+        if len(self.models) != ncontacts:
+            raise ValueError('need one contact model per contact')
+        for model in self.models:
+            if model not in CONTACT_MODELS:
+                raise ValueError('unknown contact model ' + model)
+        self.tol = tol
+
+        # columns of contact i are W[:, slices[i]]
+        widths = [CONTACT_MODELS[model].shape[1] for model in self.models]
+        starts = np.concatenate(([0], np.cumsum(widths)))
+        self.slices = [slice(starts[i], starts[i + 1])
+                       for i in range(ncontacts)]
+
+        # one batched product per contact model
+        self.Jbtran = cartesmaps_transposed(self.tp, self.th)
+        self.W = np.zeros((6, starts[-1]))
+        for model, local in CONTACT_MODELS.items():
+            index = [i for i in range(ncontacts) if self.models[i] == model]
+            if not index:
+                continue
+            columns = self.Jbtran[index] @ local  # (n,6,k)
+            cols = np.concatenate([np.arange(starts[i], starts[i + 1])
+                                   for i in index])
+            self.W[:, cols] = columns.transpose(1, 0, 2).reshape(6, -1)
+        self.W[np.abs(self.W) < tol] = 0
+
+        self._svd = None
+
+    # Body wrenches (6, total generators) of the linearized friction cones
+    # of all contacts (see FrictionCones.py), e.g. for hull or LP force
+    # closure tests: the columns of contact i are W[:, slices[i]] times
+    # the generators of its model's cone
+    def cone_wrenches(self, mu, m=4, torsion=None):
+        mu = np.broadcast_to(np.asarray(mu, dtype=float), (len(self.tp),))
+        return np.hstack([self.W[:, sl] @ friction_cone(model, mu[i], m,
+                                                         torsion).generators.T
+                          for i, (model, sl) in enumerate(zip(self.models,
+                                                              self.slices))])
+
+    # SVD of W, computed on first use
+    @instrument('svd')
+    def svd(self):
+        if self._svd is None:
+            self._svd = np.linalg.svd(self.W)
+        return self._svd
+
+    def rank(self):
+        _, s, _ = self.svd()
+        return int(np.sum(s > self.tol*max(s[0], 1)))
+
+    # Orthonormal basis (ncols, ncols - rank) of the null space of W: the
+    # internal forces, for any number of contacts
+    def null_space(self):
+        _, _, Vt = self.svd()
+        return Vt[self.rank():].T
+
+    # Pseudo-inverse (ncols,6): min-norm contact forces for a body wrench
+    def pinv(self):
+        U, s, Vt = self.svd()
+        r = self.rank()
+        return (Vt[:r].T/s[:r]) @ U[:, :r].T
+
+    # Internal force rows as Wnf_int in week2.py, for every pair (a, b)
+    # of contacts (or the given pairs): the squeeze between the two
+    # contacts, i.e. the body-frame contact forces along tp[b] - tp[a],
+    # as a row acting on the contact forces k
+    def internal_rows(self, pairs=None):
+        ncontacts = len(self.tp)
+        if pairs is None:
+            pairs = [(a, b) for a in range(ncontacts)
+                     for b in range(a + 1, ncontacts)]
+        # body-frame force of each contact's local components (N,3,k)
+        forces = [self.W[:3, sl] for sl in self.slices]
+        rows = np.zeros((len(pairs), self.W.shape[1]))
+        for j, (a, b) in enumerate(pairs):
+            e = self.tp[b] - self.tp[a]
+            rows[j, self.slices[a]] = e @ forces[a]
+            rows[j, self.slices[b]] = -e @ forces[b]
+        return rows
@@ -84,3 +84,9 @@ bounds = (f1ybound, f2ybound, f3ybound, f1xbound, f2xbound, f3xbound)
 #find x that minimizes w'*x  subject to Aeq*x=beq and bounds
 result2 = linprog(w,None,None,Aeq,beq,bounds)
 print(result2.x)
+
+########
+#The same question with ForceClosure.py: the tangential components can be
+#positive or negative, so use both signs of their wrenches as columns
+from ForceClosure import force_closure
+print(force_closure([Gtn, np.column_stack((Gtn, Gtf, -Gtf))]))  #[False True]
@@ -7,6 +7,9 @@ from numpy.linalg import matrix_rank
 import scipy.linalg as linalg
 import sys
 from scipy.optimize import linprog
+from ForceDistribution import ForceDistribution
+from GraspMatrix import GraspMatrix
+from ForceClosure import force_closure
 
 
 # debugging
@@ -29,67 +32,44 @@ th3 = np.array([pi/2, 0, 0])
 tp = np.array([tp1, tp2, tp3])
 th = np.array([th1, th2, th3])
 
-# Contact forces in local reference frame
-wc1 = np.array([0, 0, -1, 0, 0, 0])
-wc2 = np.array([0, 0, -1, 0, 0, 0])
-wc3 = np.array([0, 0, -1, 0, 0, 0])
-wc = np.array([wc1, wc2, wc3])
+# Contact forces in local reference frame: normal force along -Z for
+# frictionless contacts (see CONTACT_MODELS in GraspMatrix.py)
+grasp_n = GraspMatrix(tp, th, 'normal')
 
 # Wn matrix
-Wn = np.empty((6, wc.shape[0]))
-for i, (tpi, thi, wci) in enumerate(zip(tp, th, wc)):
-    Wn[:, i] = Cartesmap(*tpi, *thi).T.dot(wci)
+Wn = grasp_n.W
 
 print('Q2-------\nWn:')
 print(np.round(Wn))
 print('\n')
 
 print('Q2-------\nWn:')
-print('1. Rank:\t', matrix_rank(Wn))
+print('1. Rank:\t', grasp_n.rank())
 print('\n')
 
 
-wc1f = np.array([
-    [1, 0, 0, 0, 0, 0],
-    [0, 1, 0, 0, 0, 0],
-    [0, 0, -1, 0, 0, 0],
-]).T
-wc2f = np.array([
-    [1, 0, 0, 0, 0, 0],
-    [0, 1, 0, 0, 0, 0],
-    [0, 0, -1, 0, 0, 0],
-]).T
-wc3f = np.array([
-    [1, 0, 0, 0, 0, 0],
-    [0, 1, 0, 0, 0, 0],
-    [0, 0, -1, 0, 0, 0],
-]).T
-# np.concatenate((wc1f, wc2f, wc3f), axis=1)
-wcf = np.array((wc1f, wc2f, wc3f))
-print(wcf.shape)
-Wnf = []
-for i in range(wcf.shape[0]):
-    Wnf.append(Cartesmap(*tp[i], *th[i]).T.dot(wcf[i]))
-Wnf = np.concatenate(Wnf, axis=1)
-
+# Now with friction: [fx, fy, fz] local forces at each contact
+grasp_f = GraspMatrix(tp, th, 'friction')
+Wnf = grasp_f.W
 
 print('Q4-------\nWnf:')
 
 print(a2l.to_ltx(np.round(Wnf), frmt='{:1.0f}'))
 print('\nMatrix rank w/ friction:')
-print(matrix_rank(Wnf))
+print(grasp_f.rank())
 print('\n')
 
 
 print('Q6-------\n Internal forces: ')
 
-Wnf_int = np.array((
-    np.concatenate((tp2-tp1, -(tp2-tp1), np.zeros(3))),
-    np.concatenate((tp3-tp1, np.zeros(3), -(tp3-tp1))),
-    np.concatenate((np.zeros(3), -(tp3-tp2), tp3-tp2))
-))
+# One row per pair of contacts (a, b), for any number of contacts: the
+# squeeze between them, i.e. the body-frame contact forces along
+# tp[b] - tp[a], acting on the local contact forces k like Wnf
+Wnf_int = grasp_f.internal_rows()
 
 print(Wnf_int.shape)
+# the internal forces themselves are the null space of Wnf
+print('internal forces:', grasp_f.null_space().shape[1])
 G = np.concatenate((Wnf, Wnf_int), axis=0)
 G[np.isclose(G, 0)] = 0
 print('\nG:')
@@ -119,14 +99,30 @@ bounds = np.array((lb, ub))
 result = linprog(f, A_ub=None, b_ub=None,
                  A_eq=G[:6], b_eq=w_ext, bounds=bounds.T)
 print(result)
-sol = result.x
-sol[np.isclose(sol, 0)] = 0
-print('Q7-------\nk =', sol)
-
-print('Q8-----------\nG.dot(k):')
-f_b = G.dot(result.x)
-f_b[np.isclose(f_b, 0, atol=1e-4, rtol=1e-4)] = 0
-print(f_b)
+# with these bounds the LP is infeasible (no k balances w_ext)
+if result.success:
+    sol = result.x
+    sol[np.isclose(sol, 0)] = 0
+    print('Q7-------\nk =', sol)
+
+    print('Q8-----------\nG.dot(k):')
+    f_b = G.dot(result.x)
+    f_b[np.isclose(f_b, 0, atol=1e-4, rtol=1e-4)] = 0
+    print(f_b)
+
+print('Q7 with friction cones-------\n')
+# Same wrench, with friction pyramids (mu = 0.5) and unisense normals
+# instead of box bounds; the solver keeps G and is warm started, so it
+# can be called for every new wrench
+distribution = ForceDistribution(Wnf, mu=0.5, fmin=1)
+k_fric = distribution.solve(w_ext)
+print('min-norm k =', k_fric)
+print('G.dot(k):', Wnf.dot(k_fric))
+
+# Force closure with the same friction pyramids: the body wrenches of
+# their edges must positively span the wrench space
+print('force closure with mu = 0.5 pyramids:',
+      force_closure([grasp_f.cone_wrenches(0.5)])[0])
 
 
 # print('Q5-------\n')
@@ -15,9 +15,12 @@ Recommended use is to evaluate a few lines at a time, checking intermediate
 results as you go, to confirm they look correct and don't have sign errors, etc.
 """
 
+import os
 import sys
 from sympy import sin, cos, pi, Matrix, Symbol, symbols, simplify, latex, BlockDiagMatrix
 from pprint import pprint
+from SymbolicCache import cached_simplify  # in local directory; simplify() results kept on disk
+from SymbolicCodegen import write_numpy_module  # in local directory
 
 #################################
 # Define 6 element wrench and 6 element body twist
@@ -156,16 +159,16 @@ Cf1 = Cf1.subs(link, 1)
 Cf2 = Cf2.subs(link, 1)
 
 # 3x3 linear stiffness matrix at contact
-Kfp1 = simplify((Hmat*Cf1*Hmat.T)**-1)
+Kfp1 = cached_simplify((Hmat*Cf1*Hmat.T)**-1)
 Kp1 = Hmat.T*Kfp1*Hmat
 # Kp2 = to be completed for the assignment following same approach
-Kfp2 = simplify((Hmat*Cf2*Hmat.T)**-1)
+Kfp2 = cached_simplify((Hmat*Cf2*Hmat.T)**-1)
 Kp2 = Hmat.T*Kfp2*Hmat
 ########################################################
 # Map the body_contact stiffness to the body center frame
-Kb1 = simplify(Jb1t*Kp1*Jb1t.T)
+Kb1 = cached_simplify(Jb1t*Kp1*Jb1t.T)
 # Kb2 = to be completed for the assignment
-Kb2 = simplify(Jb2t*Kp2*Jb2t.T)
+Kb2 = cached_simplify(Jb2t*Kp2*Jb2t.T)
 print("--- Kb2 ---")
 pprint(Kb2)
 
@@ -175,3 +178,12 @@ pprint(Kbtotal)
 print(latex(Kbtotal))
 # You can compare this with eq (29) in Cutkosky & Kao
 # where 'w' is called 'r' in the paper.
+
+# Kbtotal as plain NumPy code (KbtotalKernel.py), to evaluate it for
+# arrays of w, ka, kq without sympy
+write_numpy_module(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'KbtotalKernel.py'),
+                   'Kbtotal', Kbtotal, (w, ka, kq), origin='Kb_left-finger.py',
+                   doc='Grasp stiffness Kbtotal (6x6) of the two-finger grasp in\n'
+                       'Kb_left-finger.py (Cutkosky & Kao 1989, eq 29) for half\n'
+                       'width w, joint stiffness ka and tip stiffness kq.')
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Generated by SymbolicCodegen.py from Kb_left-finger.py, do not edit.
+# Source hash: 1813e14b034cf2235856c72bf8fcacf9bc1583934a6f2d8636191b96166c321a
+"""
+Grasp stiffness Kbtotal (6x6) of the two-finger grasp in
+Kb_left-finger.py (Cutkosky & Kao 1989, eq 29) for half
+width w, joint stiffness ka and tip stiffness kq.
+"""
+
+import numpy
+
+
+def Kbtotal(w, ka, kq):
+    x0 = 2*ka
+    x1 = -w*x0
+    x2 = ka + kq
+    x3 = 2*kq
+    x4 = -x3
+    x5 = w**2
+    shape = numpy.broadcast_shapes(numpy.shape(w), numpy.shape(ka), numpy.shape(kq))
+    out = numpy.zeros(shape + (6, 6))
+    out[..., 0, 0] = 4*ka
+    out[..., 0, 5] = x1
+    out[..., 1, 1] = x0
+    out[..., 2, 2] = 2*x2
+    out[..., 2, 3] = x4
+    out[..., 3, 2] = x4
+    out[..., 3, 3] = x3
+    out[..., 4, 4] = 2*x2*x5
+    out[..., 5, 0] = x1
+    out[..., 5, 5] = x0*x5
+    return out
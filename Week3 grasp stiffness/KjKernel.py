@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Generated by SymbolicCodegen.py from Kj_left-finger.py, do not edit.
+# Source hash: cf6eba803e1575c5cdc64965a3d14aad91152150bb82c95cfbc4fa61dd2e3f29
+"""
+Geometric grasp stiffness Kj (6x6) of Kj_left-finger.py
+(Cutkosky & Kao 1989, eq 30) for grasp force fn, half
+width w and fingertip radius R.
+"""
+
+import numpy
+
+
+def Kj(fn, w, R):
+    x0 = 2*fn
+    x1 = x0*(R - w)
+    shape = numpy.broadcast_shapes(numpy.shape(fn), numpy.shape(w), numpy.shape(R))
+    out = numpy.zeros(shape + (6, 6))
+    out[..., 1, 1] = -x0
+    out[..., 4, 4] = x1
+    out[..., 5, 5] = x1*(w + 1)
+    return out
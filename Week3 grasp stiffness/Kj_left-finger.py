@@ -29,7 +29,10 @@ you go to make sure they make sense.
 """
 
 from sympy import sin, cos, pi, Matrix, Symbol, symbols, simplify, pprint, latex
+import os
 from sys import exit
+from SymbolicCache import cached_simplify  # in local directory; simplify() results kept on disk
+from SymbolicCodegen import write_numpy_module  # in local directory
 
 #################################
 # Define a 6 element wrench and 6 element body twist
@@ -207,10 +210,19 @@ get the total change in the body force. Then you can use sympy to take
 the jacobian of dfbody with respect to bodytwist to get [Kj]
 """
 print("\n--- dfbody_tot ---")
-dfbody = simplify(dfbody1+dfbody2)
+dfbody = cached_simplify(dfbody1+dfbody2)
 pprint(dfbody)
 
 print("\n--- Kj ---")
-Kj = simplify(dfbody.jacobian(bodytwist))  # Matches Kj in eq (30) Cutkosky&Kao
+Kj = cached_simplify(dfbody.jacobian(bodytwist))  # Matches Kj in eq (30) Cutkosky&Kao
 pprint(Kj)
 print(latex(Kj))
+
+# Kj as plain NumPy code (KjKernel.py), to evaluate it for arrays of
+# fn, w, R without sympy
+write_numpy_module(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'KjKernel.py'),
+                   'Kj', Kj, (fn, w, R), origin='Kj_left-finger.py',
+                   doc='Geometric grasp stiffness Kj (6x6) of Kj_left-finger.py\n'
+                       '(Cutkosky & Kao 1989, eq 30) for grasp force fn, half\n'
+                       'width w and fingertip radius R.')
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Code generation of the symbolic matrices derived in the scripts (Kbtotal,
+Kj, the spine df1, df2, ...) as standalone NumPy modules, so they can be
+evaluated without importing sympy at all.
+
+Common subexpressions of all the entries are pulled out with sympy.cse()
+and the rest is printed as straight-line NumPy code. The generated
+function takes array arguments that broadcast together, shape (...), and
+returns an array (..., rows, cols) with one matrix per element; entries
+that are identically zero are not computed.
+
+The header of a generated module records a hash of the expression and
+arguments it was generated from, and write_numpy_module() leaves the
+module alone while that hash is unchanged, so scripts can call it on
+every run without touching the (tracked) generated files.
+"""
+
+import hashlib
+import os
+
+from sympy import Matrix, cse, srepr
+from sympy.printing.numpy import NumPyPrinter
+
+HEADER = '''#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Generated by SymbolicCodegen.py{origin}, do not edit.
+# Source hash: {key}
+"""
+{doc}
+"""
+
+import numpy
+
+
+'''
+
+
+# Hash of what the module generated by numpy_source() depends on
+def source_key(name, expr, args, doc='', origin=None):
+    text = repr((name, srepr(Matrix(expr)), [srepr(a) for a in args],
+                 doc, origin))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+# Source of a module defining name(*args) that evaluates the matrix expr
+# (or a scalar expression, returned as a 1x1 matrix)
+def numpy_source(name, expr, args, doc='', origin=None):
+    expr = Matrix(expr)
+    missing = expr.free_symbols - set(args)
+    if missing:
+        raise ValueError('symbols %s are not arguments of %s'
+                         % (sorted(map(str, missing)), name))
+    replacements, (reduced,) = cse([expr], optimizations='basic')
+    printer = NumPyPrinter()
+    argnames = ', '.join(printer.doprint(a) for a in args)
+
+    lines = [HEADER.format(origin=' from ' + origin if origin else '',
+                           key=source_key(name, expr, args, doc, origin),
+                           doc=doc or name + ' as a NumPy function.'),
+             'def %s(%s):\n' % (name, argnames)]
+    for symbol, value in replacements:
+        lines.append('    %s = %s\n' % (printer.doprint(symbol),
+                                        printer.doprint(value)))
+    lines.append('    shape = numpy.broadcast_shapes(%s)\n'
+                 % ', '.join('numpy.shape(%s)' % printer.doprint(a)
+                             for a in args))
+    lines.append('    out = numpy.zeros(shape + (%d, %d))\n' % reduced.shape)
+    for i in range(reduced.rows):
+        for j in range(reduced.cols):
+            if reduced[i, j] != 0:
+                lines.append('    out[..., %d, %d] = %s\n'
+                             % (i, j, printer.doprint(reduced[i, j])))
+    lines.append('    return out\n')
+    return ''.join(lines)
+
+
+# Write the module generated by numpy_source() to path, unless the
+# module there was generated from the same source. Returns True if it
+# was written.
+def write_numpy_module(path, name, expr, args, doc='', origin=None):
+    stamp = '# Source hash: %s\n' % source_key(name, expr, args, doc, origin)
+    try:
+        with open(path) as fp:
+            if stamp in [fp.readline() for _ in range(4)]:
+                return False
+    except FileNotFoundError:
+        pass
+    source = numpy_source(name, expr, args, doc, origin)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as fp:
+        fp.write(source)
+    os.replace(tmp, path)
+    return True
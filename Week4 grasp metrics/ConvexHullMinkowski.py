@@ -25,28 +25,16 @@ Notes:
   Made separate file for Minkowski Sum metric --Cutkosky1Feb2020
 """
 
-from mpl_toolkits.mplot3d import Axes3D
-import matplotlib.pyplot as plt
 import numpy as np
-from scipy.spatial import ConvexHull
-from sympy import Plane, Point3D
 
-from WrenchUtils import PTrans  # in local directory
+# in local directory; ConvexSum() is the convex sum of two arrays of column vectors
+from GraspMetrics import cone_edges, contact_wrench_sets, ConvexSum, least_wrench
+from GraspSynthesis import synthesize_grasps
+from QualityGradient import refine_grasp
+from RunFlags import run_headless  # in local directory
 
-
-# Convex sum of two arrays of column vectors (e.g. wrenches, twists)
-def ConvexSum(wrenches1, wrenches2):
-    dim1, n1 = wrenches1.shape
-    dim2, n2 = wrenches2.shape
-    if(dim2 != dim1):
-        raise Exception('wrenches should have same dimension')
-
-    csum = np.zeros((dim1, n1*n2))
-    for i in range(n1):
-        for j in range(n2):
-            csum[:, i*n2+j] = wrenches1[:, i]+wrenches2[:, j]
-
-    return csum
+# Run with --headless (or set TMM_HEADLESS=1) to skip all plotting
+headless = run_headless()
 
 
 '''
@@ -62,8 +50,6 @@ n = 4  # 3 contacts
 # TODO: Modify this value in Question 3.1
 mu = 0.5
 
-phi = np.arctan(mu)  # friction cone half-angle
-
 
 # 1.1 Create coordinate frame for each contact, oriented so that
 # local X axis is along outward normal. Start at left, proceed anticlockwise.
@@ -102,41 +88,11 @@ frames[3, :] = [3, 1, -np.pi/4]
 # Inward forces along left, right edges of a friction cone,
 # assuming coordinate frame with X axis pointing outward
 # and unit normal force along -X. So the 2 vectors are:
-fl = np.array([-np.cos(phi), -np.sin(phi), 0])
-fr = np.array([-np.cos(phi), np.sin(phi), 0])
-
-# Get the set W1 corresponding to the first contact
-W1 = np.zeros((3, 3))
-Jb = PTrans(frames[0, 0], frames[0, 1], frames[0, 2])
-Jbtrans = Jb.transpose()
-W1[0] = Jbtrans.dot(fl)
-W1[1] = Jbtrans.dot(fr)
-W1[2] = [0, 0, 0]
-
-# Get the set W2 corresponding to the second contact
-W2 = np.zeros((3, 3))
-Jb = PTrans(frames[1, 0], frames[1, 1], frames[1, 2])
-Jbtrans = Jb.transpose()
-W2[0] = Jbtrans.dot(fl)
-W2[1] = Jbtrans.dot(fr)
-W2[2] = [0, 0, 0]
-
-# Get the set W3 corresponding to the third contact
-W3 = np.zeros((3, 3))
-Jb = PTrans(frames[2, 0], frames[2, 1], frames[2, 2])
-Jbtrans = Jb.transpose()
-W3[0] = Jbtrans.dot(fl)
-W3[1] = Jbtrans.dot(fr)
-W3[2] = [0, 0, 0]
-
-# Get the set W3 corresponding to the third contact
-W4 = np.zeros((3, 3))
-Jb = PTrans(frames[3, 0], frames[3, 1], frames[3, 2])
-Jbtrans = Jb.transpose()
-W4[0] = Jbtrans.dot(fl)
-W4[1] = Jbtrans.dot(fr)
-W4[2] = [0, 0, 0]
+fl, fr = cone_edges(mu)
 
+# Get the sets W1, W2, ... corresponding to each contact:
+# rows are PTrans(frame).T @ fl, PTrans(frame).T @ fr and [0, 0, 0]
+W1, W2, W3, W4 = contact_wrench_sets(frames, mu)
 
 # Repeat as needed for additional fingers
 
@@ -162,7 +118,10 @@ msumwrenches = csum1234.transpose()
 
 # 2. Assuming  wrench matrix is fine, get Convex Hull of
 # the points corresponding to wrenches in (fx,fy,mz)
-hull = ConvexHull(msumwrenches)
+# 3. Find distance from origin to a plane that contains
+# each triangular facet of the convex hull (from the hull's facet
+# equations, see GraspMetrics.py) and take the least one.
+leastwrench, hull = least_wrench(msumwrenches)
 
 # Check if the convex hull vertices look right
 np.set_printoptions(precision=2)
@@ -170,75 +129,29 @@ for s in hull.vertices:
     print(s, msumwrenches[s, :], 'mag:', "%.2f" %
           np.linalg.norm(msumwrenches[s, :]))
 
-
-# 3. Find distance from origin to a plane that contains
-# each triangular facet of the convex hull
-origin = Point3D(0, 0, 0)
-nfacets = np.shape(hull.simplices)[0]  # how many facets
-hullwrenchmags = np.zeros(nfacets)
-i = 0
-for s in hull.simplices:
-    triangle = msumwrenches[s]  # convert from simplices to 3D points
-    point1 = Point3D(triangle[0])
-    point2 = Point3D(triangle[1])
-    point3 = Point3D(triangle[2])
-    theplane = Plane(point1, point2, point3)
-    planedistance = theplane.distance(origin)
-    hullwrenchmags[i] = planedistance
-    i = i+1
-
-leastwrench = np.amin(hullwrenchmags)
 print('least wrench (if enclosing), Minkowski hull:', "%.2f" % leastwrench)
 
-# The above distance calculation assumes the convex hull encloses
-# the origin. We should check to be sure that is true! An easy
-# way is to plot orthogonal projections.
-
-
-fig3D = plt.figure()
-ax3D = fig3D.add_subplot(111, projection='3d')
-
-figxz = plt.figure()
-axxz = figxz.add_subplot(111, projection='3d')
-
-figyz = plt.figure()
-axyz = figyz.add_subplot(111, projection='3d')
-
-figxy = plt.figure()
-axxy = figxy.add_subplot(111, projection='3d')
-
-# For those points in hull.simplices...
-for s in hull.simplices:
-    s = np.append(s, s[0])  # Cycle back to the first coordinate
-    ax3D.plot(msumwrenches[s, 0], msumwrenches[s, 1], msumwrenches[s, 2], "r-")
-    ax3D.scatter(msumwrenches[s, 0], msumwrenches[s,
-                 1], msumwrenches[s, 2], marker='o')
-
-    axxz.plot(msumwrenches[s, 0], msumwrenches[s, 2], msumwrenches[s, 1], "r-")
-    axxz.scatter(msumwrenches[s, 0], msumwrenches[s,
-                 2], msumwrenches[s, 1], marker='o')
-
-    axyz.plot(msumwrenches[s, 1], msumwrenches[s, 2], msumwrenches[s, 0], "r-")
-    axyz.scatter(msumwrenches[s, 1], msumwrenches[s,
-                 2], msumwrenches[s, 0], marker='o')
-
-    axxy.plot(msumwrenches[s, 0], msumwrenches[s, 1], msumwrenches[s, 2], "r-")
-    axxy.scatter(msumwrenches[s, 0], msumwrenches[s,
-                 1], msumwrenches[s, 2], marker='o')
-
-    # also plot the origin
-    ax3D.scatter([0], [0], [0], marker='x')
-    axxz.scatter([0], [0], [0], marker='x')
-    axyz.scatter([0], [0], [0], marker='x')
-    axxy.scatter([0], [0], [0], marker='x')
-
-
-axxz.view_init(azim=0, elev=90)
-axyz.view_init(azim=0, elev=90)
-axxy.view_init(azim=0, elev=90)
-
-# Make axis label
-for i in ["x", "y", "z"]:
-    eval("ax3D.set_{:s}label('{:s}')".format(i, i))
-
-plt.show()
+# Rather than trying frames by hand, search the trapezoid boundary for
+# the 4 contacts with the largest least wrench (see GraspSynthesis.py)
+trapezoid = np.array([[-1, -1], [1, -1], [3, 1], [-3, 1]])  # anticlockwise
+s_best, frames_best, quality_best = synthesize_grasps(
+    trapezoid, n, mu, metric='minkowski', k=3, rng=0)
+print('best frames found, least wrench %.2f:' % quality_best[0])
+print(frames_best[0])
+
+# ... and polish them by gradient ascent, with the analytic gradient of
+# the least wrench with respect to the contacts (see QualityGradient.py)
+s_refined, quality_refined, evaluations = refine_grasp(
+    trapezoid, s_best, mu, metric='minkowski')
+print('after gradient refinement:', quality_refined,
+      'hull evaluations:', evaluations)
+
+# The least wrench calculation above assumes the convex hull encloses
+# the origin (it is negative if not). We should check to be sure that is true!
+# An easy way is to plot orthogonal projections.
+if not headless:
+    import matplotlib.pyplot as plt
+    from GraspPlots import plot_hull_projections
+
+    plot_hull_projections(msumwrenches, hull)
+    plt.show()
@@ -26,13 +26,18 @@ Notes:
   
 """
 
-from mpl_toolkits.mplot3d import Axes3D
-import matplotlib.pyplot as plt
 import numpy as np
-from scipy.spatial import ConvexHull
-from sympy import Plane, Point3D
 
-from WrenchUtils import PTrans  # in local directory
+from GraspMetrics import cone_edges, union_wrenches, least_wrench  # in local directory
+from MuSensitivity import quality_vs_mu, critical_mu  # in local directory
+from GraspUncertainty import monte_carlo_quality, quality_statistics, rank_grasps  # in local directory
+from GraspSynthesis import polygon_edges, boundary_frames, grasp_points, grasp_quality  # in local directory
+from TaskWrenchSpace import torque_scale, weighted_least_wrench, ellipsoid_task, task_quality  # in local directory
+from IncrementalGrasp import IncrementalGrasp  # in local directory
+from RunFlags import run_headless  # in local directory
+
+# Run with --headless (or set TMM_HEADLESS=1) to skip all plotting
+headless = run_headless()
 
 '''
 Example: suppose the object is a Trapezoid with vertices at
@@ -47,8 +52,6 @@ n = 4  # 3 contacts
 # TODO: Modify this value in Question 3.1
 mu = 0.5
 
-phi = np.arctan(mu)  # friction cone half-angle
-
 
 # 1.1 Create coordinate frame for each contact, oriented so that
 # local X axis is along outward normal. Start at left, proceed anticlockwise.
@@ -77,16 +80,10 @@ frames[3, :] = [3, 1, -np.pi/4]
 # Inward forces along left, right edges of a friction cone,
 # assuming coordinate frame with X axis pointing outward
 # and unit normal force along -X. So the 2 vectors are:
-fl = np.array([-np.cos(phi), -np.sin(phi), 0])
-fr = np.array([-np.cos(phi), np.sin(phi), 0])
+fl, fr = cone_edges(mu)
 
-wrenches = np.zeros((2*n, 3))
-for i in range(n):
-    Jb = PTrans(frames[i, 0], frames[i, 1], frames[i, 2])  # WrenchUtils.py
-    Jbtrans = Jb.transpose()
-#    Jbtrans.dot(fl.transpose())
-    wrenches[i] = Jbtrans.dot(fl)
-    wrenches[i+n] = Jbtrans.dot(fr)
+# Rows 0..n-1 are PTrans(frame).T @ fl, rows n..2n-1 the same for fr
+wrenches = union_wrenches(frames, mu)
 
 # check: Planar wrenches array had better have rank 3
 # (Remember, force closure is necessary, but not sufficient.)
@@ -99,78 +96,83 @@ np.linalg.matrix_rank(wrenches)
 # 2. Assuming  wrench matrix is fine, get Convex Hull of
 # the points corresponding to wrenches in (fx,fy,mz)
 # Here we are taking the convex hull of the Union of wrenches.
-hull = ConvexHull(wrenches)
+# 3. Find distance from origin to a plane that contains
+# each triangular facet of the convex hull (from the hull's facet
+# equations, see GraspMetrics.py) and take the least one.
+leastwrench, hull = least_wrench(wrenches)
 
 # Check if the convex hull vertices look right
 np.set_printoptions(precision=2)
 for s in hull.vertices:
     print(s, wrenches[s, :], 'mag:', "%.2f" % np.linalg.norm(wrenches[s, :]))
 
-
-# 3. Find distance from origin to a plane that contains
-# each triangular facet of the convex hull
-origin = Point3D(0, 0, 0)
-nfacets = np.shape(hull.simplices)[0]  # how many facets
-hullwrenchmags = np.zeros(nfacets)
-i = 0
-for s in hull.simplices:
-    triangle = wrenches[s]  # convert from simplices to 3D points
-    point1 = Point3D(triangle[0])
-    point2 = Point3D(triangle[1])
-    point3 = Point3D(triangle[2])
-    theplane = Plane(point1, point2, point3)
-    planedistance = theplane.distance(origin)
-    hullwrenchmags[i] = planedistance
-    i = i+1
-
-leastwrench = np.amin(hullwrenchmags)
 print('least wrench (if enclosing), Union hull:', leastwrench)
 
-# The above distance calculation assumes the convex hull encloses
-# the origin. We should check to be sure that is true! An easy
-# way is to plot orthogonal projections.
-
-
-fig3D = plt.figure()
-ax3D = fig3D.add_subplot(111, projection='3d')
-
-figxz = plt.figure()
-axxz = figxz.add_subplot(111, projection='3d')
-
-figyz = plt.figure()
-axyz = figyz.add_subplot(111, projection='3d')
+# Instead of changing mu by hand: the least wrench for a range of mu
+# (same contact transforms, only the cone edges are rebuilt) and the
+# smallest mu that still gives force closure (see MuSensitivity.py)
+mus = np.linspace(0.1, 1.0, 10)
+print('mu:          ', mus)
+print('least wrench:', quality_vs_mu(frames, mus))
+print('critical mu for force closure: %.4f' % critical_mu(frames))
+
+# The frames above are exact; with some noise on the contact positions,
+# normals and mu the least wrench is spread out, and the 5th percentile
+# is a safer number to compare grasps with (see GraspUncertainty.py)
+quality = monte_carlo_quality(frames, mu, samples=2000, pos_scale=0.05,
+                              angle_scale=0.05, mu_scale=0.05, rng=0)
+(q05, q50, q95), closure = quality_statistics(quality)
+print('least wrench with contact noise: 5%%: %.2f, median: %.2f, 95%%: %.2f,'
+      ' force closure in %.1f%% of samples' % (q05, q50, q95, 100*closure))
+
+# Ranking by that quantile, here with noise on mu only: four contacts at
+# the same point never give a 3D hull (quality -inf in every sample) and
+# must come last
+candidates = np.stack((frames, np.tile(frames[:1], (n, 1))))
+order, robust = rank_grasps(candidates, mu, samples=500, pos_scale=0,
+                            angle_scale=0, mu_scale=0.05, rng=0)
+print('grasps ranked by the 5% least wrench:', order, robust)
+
+# The least wrench treats all wrench directions alike. With moments in
+# units of the object size, as in Miller&Allen, it becomes:
+trapezoid = np.array([[-1, -1], [1, -1], [3, 1], [-3, 1]])  # anticlockwise
+weights = [1, 1, torque_scale(trapezoid)]
+print('least wrench with moments scaled by 1/r: %.2f'
+      % weighted_least_wrench(wrenches, weights))
+
+# For a task that mostly loads the object with moments (e.g. turning a
+# tool), the largest scale of the task wrench set inside the hull ranks
+# grasps differently (see TaskWrenchSpace.py)
+task = ellipsoid_task([0.2, 0.2, 1.0])
+print('task scale, these frames: %.2f' % task_quality(wrenches, task))
+candidates = boundary_frames(trapezoid, np.random.default_rng(0).uniform(
+    0, polygon_edges(trapezoid)[3][-1], (2000, n)))
+uniform = grasp_quality(candidates, mu)
+scales = task_quality(grasp_points(candidates, mu), task)
+for label, best in (('least wrench', np.argmax(uniform)),
+                    ('task scale', np.argmax(scales))):
+    print('best of 2000 random grasps by %s: least wrench %.2f, task scale %.2f'
+          % (label, uniform[best], scales[best]))
+
+# Placing the fingers one at a time (see IncrementalGrasp.py): a single
+# contact spans only its two cone edges (rank 2, or 1 without friction)
+# and the least wrench is only defined once the hull is 3D
+gaiting = IncrementalGrasp(frames[:1], 0.0)
+print('one frictionless contact: rank %d' % gaiting.rank())
+gaiting = IncrementalGrasp(frames[:1], mu)
+for i in range(1, n + 1):
+    print('%d contacts: rank %d, internal forces %d, least wrench %.2f'
+          % (i, gaiting.rank(), gaiting.null_space().shape[1],
+             gaiting.least_wrench()))
+    if i < n:
+        gaiting.add_contact(frames[i])
 
-figxy = plt.figure()
-axxy = figxy.add_subplot(111, projection='3d')
-
-# For those points in hull.simplices...
-for s in hull.simplices:
-    s = np.append(s, s[0])  # Cycle back to the first coordinate
-    ax3D.plot(wrenches[s, 0], wrenches[s, 1], wrenches[s, 2], "r-")
-    ax3D.scatter(wrenches[s, 0], wrenches[s, 1], wrenches[s, 2], marker='o')
-
-    axxz.plot(wrenches[s, 0], wrenches[s, 2], wrenches[s, 1], "r-")
-    axxz.scatter(wrenches[s, 0], wrenches[s, 2], wrenches[s, 1], marker='o')
-
-    axyz.plot(wrenches[s, 1], wrenches[s, 2], wrenches[s, 0], "r-")
-    axyz.scatter(wrenches[s, 1], wrenches[s, 2], wrenches[s, 0], marker='o')
-
-    axxy.plot(wrenches[s, 0], wrenches[s, 1], wrenches[s, 2], "r-")
-    axxy.scatter(wrenches[s, 0], wrenches[s, 1], wrenches[s, 2], marker='o')
-
-    # also plot the origin
-    ax3D.scatter([0], [0], [0], marker='x')
-    axxz.scatter([0], [0], [0], marker='x')
-    axyz.scatter([0], [0], [0], marker='x')
-    axxy.scatter([0], [0], [0], marker='x')
-
-
-axxz.view_init(azim=0, elev=90)
-axyz.view_init(azim=0, elev=90)
-axxy.view_init(azim=0, elev=90)
-
-# Make axis label
-for i in ["x", "y", "z"]:
-    eval("ax3D.set_{:s}label('{:s}')".format(i, i))
-
-plt.show()
+# The above distance calculation assumes the convex hull encloses
+# the origin (it is negative if not). We should check to be sure that is true!
+# An easy way is to plot orthogonal projections.
+if not headless:
+    import matplotlib.pyplot as plt
+    from GraspPlots import plot_hull_projections
+
+    plot_hull_projections(wrenches, hull)
+    plt.show()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Computational core of the planar grasp quality examples
+(ConvexHullUnion.py, ConvexHullMinkowski.py), following Ferrari&Canny
+and Miller&Allen GraspIt!. Nothing here imports matplotlib, so these
+functions can be used in batch jobs; plotting is in GraspPlots.py.
+
+Contact frames are rows [x, y, theta] with the local X axis along the
+outward normal, and wrenches are planar [fx, fy, mz].
+"""
+
+import numpy as np
+from scipy.spatial import ConvexHull
+
+from WrenchUtils import PTrans  # in local directory
+from FrictionCones import friction_cone
+from Instrumentation import instrument
+
+
+# Inward forces along left, right edges of a friction cone,
+# assuming coordinate frame with X axis pointing outward
+# and unit normal force along -X: the unit generators [ft, fn] of the
+# planar cone in FrictionCones.py, as [fx, fy, mz] = [-fn, ft, 0].
+def cone_edges(mu):
+    (ftl, fnl), (ftr, fnr) = friction_cone('planar', mu).generators
+    fl = np.array([-fnl, ftl, 0])
+    fr = np.array([-fnr, ftr, 0])
+    return fl, fr
+
+
+# Global wrenches of the cone edges for each contact, as a (2n,3) array:
+# rows 0..n-1 are the left edges, rows n..2n-1 the right edges.
+# This is the set whose convex hull is the Union hull.
+def union_wrenches(frames, mu):
+    fl, fr = cone_edges(mu)
+    n = np.shape(frames)[0]
+    wrenches = np.zeros((2*n, 3))
+    for i in range(n):
+        Jbtrans = PTrans(frames[i, 0], frames[i, 1], frames[i, 2]).transpose()
+        wrenches[i] = Jbtrans.dot(fl)
+        wrenches[i+n] = Jbtrans.dot(fr)
+    return wrenches
+
+
+# For each contact, the (3,3) set W_i of rows [left edge, right edge, 0]
+# used to build the Minkowski sum.
+def contact_wrench_sets(frames, mu):
+    wrenches = union_wrenches(frames, mu)
+    n = np.shape(frames)[0]
+    return [np.array([wrenches[i], wrenches[i+n], np.zeros(3)]) for i in range(n)]
+
+
+# Convex sum of two arrays of column vectors (e.g. wrenches, twists)
+# Column i*n2+j of the result is wrenches1[:, i] + wrenches2[:, j]
+def ConvexSum(wrenches1, wrenches2):
+    dim1, n1 = wrenches1.shape
+    dim2, n2 = wrenches2.shape
+    if(dim2 != dim1):
+        raise Exception('wrenches should have same dimension')
+
+    return (wrenches1[:, :, None] + wrenches2[:, None, :]).reshape(dim1, n1*n2)
+
+
+# Points (rows) whose convex hull is the Minkowski sum hull
+def minkowski_wrenches(frames, mu):
+    sets = contact_wrench_sets(frames, mu)
+    csum = sets[0].transpose()
+    for W in sets[1:]:
+        csum = ConvexSum(csum, W.transpose())
+    return csum.transpose()
+
+
+# Distance from the origin to the plane of each facet of the hull.
+# hull.equations holds unit outward normals n and offsets b with
+# n.x + b = 0 on the facet, so the distance is -b, which is negative
+# for facets that leave the origin outside the hull.
+def facet_distances(hull):
+    return -hull.equations[:, -1]
+
+
+# Least wrench (Ferrari&Canny epsilon) for a set of wrench points.
+# Returns the metric and the hull; the metric is negative if the hull
+# does not enclose the origin (no force closure).
+@instrument('hull')
+def least_wrench(points):
+    hull = ConvexHull(points)
+    return np.amin(facet_distances(hull)), hull
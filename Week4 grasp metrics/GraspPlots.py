@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Optional plotting layer for the Week4 scripts. Only imported when the
+scripts are not run with --headless, so batch jobs never load matplotlib.
+"""
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+
+# Plot a 3D wrench hull and three orthogonal projections, with the
+# origin marked, to check that the hull encloses the origin.
+def plot_hull_projections(points, hull):
+    fig3D = plt.figure()
+    ax3D = fig3D.add_subplot(111, projection='3d')
+
+    figxz = plt.figure()
+    axxz = figxz.add_subplot(111, projection='3d')
+
+    figyz = plt.figure()
+    axyz = figyz.add_subplot(111, projection='3d')
+
+    figxy = plt.figure()
+    axxy = figxy.add_subplot(111, projection='3d')
+
+    # For those points in hull.simplices...
+    for s in hull.simplices:
+        s = np.append(s, s[0])  # Cycle back to the first coordinate
+        ax3D.plot(points[s, 0], points[s, 1], points[s, 2], "r-")
+        ax3D.scatter(points[s, 0], points[s, 1], points[s, 2], marker='o')
+
+        axxz.plot(points[s, 0], points[s, 2], points[s, 1], "r-")
+        axxz.scatter(points[s, 0], points[s, 2], points[s, 1], marker='o')
+
+        axyz.plot(points[s, 1], points[s, 2], points[s, 0], "r-")
+        axyz.scatter(points[s, 1], points[s, 2], points[s, 0], marker='o')
+
+        axxy.plot(points[s, 0], points[s, 1], points[s, 2], "r-")
+        axxy.scatter(points[s, 0], points[s, 1], points[s, 2], marker='o')
+
+    # also plot the origin
+    for ax in (ax3D, axxz, axyz, axxy):
+        ax.scatter([0], [0], [0], marker='x')
+
+    axxz.view_init(azim=0, elev=90)
+    axyz.view_init(azim=0, elev=90)
+    axxy.view_init(azim=0, elev=90)
+
+    # Make axis label
+    for i in ["x", "y", "z"]:
+        getattr(ax3D, "set_{:s}label".format(i))(i)
+
+    return fig3D, figxz, figyz, figxy
+
+
+# Plot the left finger forces against the external force angle, marking
+# with 'x' the angles where the friction constraint fails.
+def plot_finger_forces(thetas, plotpts, fails, title, fignum=None):
+    plt.figure(fignum)
+    fig = plt.gcf()
+    plt.plot(thetas, plotpts[:, 0], color='b')
+    plt.plot(thetas, plotpts[:, 1], color='g')
+    plt.scatter(thetas[fails], plotpts[fails, 1], color='k', marker='x')
+
+    plt.xlabel('angle (0 to 2pi)')
+    plt.legend(['fx1', 'fy1'])
+    plt.title(title)
+    return fig
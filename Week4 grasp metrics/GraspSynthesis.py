@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Grasp synthesis on a planar polygon: instead of trying contact frames by
+hand (see the commented out frames[...] in ConvexHullMinkowski.py), the
+contacts are parameterized by their arc length s along the boundary and
+the Ferrari&Canny least wrench of the Union or Minkowski hull is
+maximized, with random restarts followed by a local refinement.
+
+Candidates are handled in batches: frames (B,n,3) and wrench points
+(B,P,3) for all of them are built with array operations, and only the
+hull itself is computed per candidate. No plotting here.
+"""
+
+from itertools import product
+
+import numpy as np
+from scipy.spatial import QhullError
+
+from GraspMetrics import cone_edges, least_wrench
+from Instrumentation import instrument
+
+
+# Polygon vertices (V,2) given anticlockwise, so the outward normal of
+# the edge from p to q is (q - p) rotated by -90 degrees.
+# Returns the edge start points (V,2), unit tangents (V,2), normal angles
+# (V,) and the arc length at the start of each edge (V+1,), the last
+# one being the perimeter.
+def polygon_edges(vertices):
+    vertices = np.asarray(vertices, dtype=float)
+    edges = np.roll(vertices, -1, axis=0) - vertices
+    lengths = np.linalg.norm(edges, axis=1)
+    tangents = edges/lengths[:, None]
+    thetas = np.arctan2(-tangents[:, 0], tangents[:, 1])
+    return vertices, tangents, thetas, np.concatenate(([0], np.cumsum(lengths)))
+
+
+# Contact frames [x, y, theta] (...,3) at arc lengths s (...), with the
+# local X axis along the outward normal as in the Week4 scripts
+def boundary_frames(vertices, s):
+    starts, tangents, thetas, arc = polygon_edges(vertices)
+    s = np.mod(s, arc[-1])
+    edge = np.clip(np.searchsorted(arc, s, side='right') - 1, 0, len(starts) - 1)
+    xy = starts[edge] + (s - arc[edge])[..., None]*tangents[edge]
+    return np.concatenate((xy, thetas[edge][..., None]), axis=-1)
+
+
+# Global wrenches (...,n,2,3) of the left and right cone edges of every
+# contact, i.e. PTrans(frame).T @ [fl, fr] for all frames at once
+@instrument('transforms')
+def edge_wrenches(frames, mu):
+    fl, fr = cone_edges(mu)
+    local = np.array([fl, fr])  # (2,3)
+    x, y, theta = frames[..., 0], frames[..., 1], frames[..., 2]
+    c, s = np.cos(theta)[..., None], np.sin(theta)[..., None]
+    fx, fy, mz = local[:, 0], local[:, 1], local[:, 2]
+    return np.stack((c*fx - s*fy,
+                     s*fx + c*fy,
+                     (x[..., None]*s - y[..., None]*c)*fx
+                     + (x[..., None]*c + y[..., None]*s)*fy + mz), axis=-1)
+
+
+# Wrench points (...,P,3) of the Union hull (P = 2n) or of the Minkowski
+# sum hull (P = 3^n, each contact adding its left edge, right edge or 0)
+# from the cone edge wrenches (...,n,2,3) of the contacts
+@instrument('hull')
+def hull_points(wrenches, metric='union'):
+    n = wrenches.shape[-3]
+    if metric == 'union':
+        return wrenches.reshape(wrenches.shape[:-3] + (2*n, 3))
+    if metric == 'minkowski':
+        sets = np.concatenate((wrenches, np.zeros_like(wrenches[..., :1, :])),
+                              axis=-2)  # (...,n,3,3)
+        choice = np.array(list(product(range(3), repeat=n)))  # (3^n,n)
+        return sets[..., np.arange(n), choice, :].sum(axis=-2)
+    raise ValueError("metric should be 'union' or 'minkowski'")
+
+
+# Hull points (...,P,3) of grasps with contact frames (...,n,3)
+def grasp_points(frames, mu, metric='union'):
+    return hull_points(edge_wrenches(frames, mu), metric)
+
+
+# Least wrench for each set of hull points (...,P,3) -> (...); -inf for
+# degenerate sets that do not span a 3D hull
+@instrument('metric')
+def hull_quality(points):
+    flat = points.reshape((-1,) + points.shape[-2:])
+    quality = np.full(len(flat), -np.inf)
+    for b, pts in enumerate(flat):
+        try:
+            quality[b] = least_wrench(pts)[0]
+        except (QhullError, ValueError):
+            pass
+    return quality.reshape(points.shape[:-2])
+
+
+# Least wrench of each candidate grasp: frames (B,n,3) -> (B,)
+def grasp_quality(frames, mu, metric='union'):
+    return hull_quality(grasp_points(np.asarray(frames, dtype=float), mu, metric))
+
+
+# Best grasps with n contacts on the polygon:
+#   restarts: random candidates evaluated first
+#   seeds: number of the best ones refined locally
+#   iters, proposals: refinement steps, and perturbations per seed per step
+#   step: initial perturbation of s (default 1/8 of the shortest edge);
+#         halved for a seed when none of its proposals improves it
+# Returns the arc lengths (k,n), frames (k,n,3) and least wrench (k,) of
+# the k best distinct grasps.
+@instrument('synthesis')
+def synthesize_grasps(vertices, n, mu, metric='union', k=5, restarts=1000,
+                      seeds=20, iters=30, proposals=8, step=None, rng=None):
+    rng = np.random.default_rng(rng)
+    _, _, _, arc = polygon_edges(vertices)
+    perimeter = arc[-1]
+    step = np.min(np.diff(arc))/8 if step is None else step
+
+    s = rng.uniform(0, perimeter, (restarts, n))
+    quality = grasp_quality(boundary_frames(vertices, s), mu, metric)
+
+    best = np.argsort(-quality)[:seeds]
+    s, quality = s[best], quality[best]
+    steps = np.full(len(s), step)
+    for _ in range(iters):
+        trial = s[:, None, :] + steps[:, None, None]*rng.normal(
+            size=(len(s), proposals, n))
+        trial = np.mod(trial, perimeter)
+        trial_quality = grasp_quality(boundary_frames(vertices, trial)
+                                      .reshape(-1, n, 3), mu, metric)
+        trial_quality = trial_quality.reshape(len(s), proposals)
+        pick = np.argmax(trial_quality, axis=1)
+        better = trial_quality[np.arange(len(s)), pick] > quality
+        s[better] = trial[better, pick[better]]
+        quality[better] = trial_quality[better, pick[better]]
+        steps[~better] /= 2
+
+    # k best, skipping permutations of the same contacts
+    order = np.argsort(-quality)
+    chosen = []
+    for i in order:
+        key = np.sort(s[i])
+        if all(np.max(np.abs(key - np.sort(s[j]))) > 1e-3*perimeter
+               for j in chosen):
+            chosen.append(i)
+        if len(chosen) == k:
+            break
+    s = np.sort(s[chosen], axis=1)
+    return s, boundary_frames(vertices, s), quality[chosen]
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Grasp quality under contact uncertainty. The frames in ConvexHullUnion.py
+and ConvexHullMinkowski.py are exact, but measured contacts are not: here
+the contact positions, normal angles and mu are perturbed at random and
+the least wrench is evaluated for every sample, using the batched
+transforms and hulls of MuSensitivity.py and GraspSynthesis.py.
+
+Samples are drawn in chunks, each with its own seed spawned from the
+given one, so the result only depends on the seed and the chunk size
+(not on the number of worker processes). Grasps are then ranked by a low
+quantile of their quality (the 5th percentile by default) rather than by
+the nominal value.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from GraspSynthesis import hull_points, hull_quality
+from MuSensitivity import contact_transforms, edge_wrenches_mu
+from Instrumentation import instrument
+
+DISTRIBUTIONS = ('normal', 'uniform')
+
+
+# Zero-mean noise of the given shape: standard deviation scale for
+# 'normal', half-width scale for 'uniform'
+def _noise(rng, distribution, scale, shape):
+    if distribution == 'normal':
+        return scale*rng.standard_normal(shape)
+    if distribution == 'uniform':
+        return rng.uniform(-scale, scale, shape)
+    raise ValueError('distribution should be one of %s' % (DISTRIBUTIONS,))
+
+
+# Quality of nsamples perturbed copies of the grasps frames (G,n,3) with
+# friction mu (G,n), drawn from seed: (G,nsamples)
+def _chunk_quality(frames, mu, nsamples, seed, pos_scale, angle_scale,
+                   mu_scale, distribution, metric):
+    rng = np.random.default_rng(seed)
+    shape = frames.shape[:1] + (nsamples,) + frames.shape[1:2]
+    noisy = np.repeat(frames[:, None], nsamples, axis=1)
+    noisy[..., :2] += _noise(rng, distribution, pos_scale, shape + (2,))
+    noisy[..., 2] += _noise(rng, distribution, angle_scale, shape)
+    mus = np.maximum(mu[:, None] + _noise(rng, distribution, mu_scale, shape), 0)
+    wrenches = edge_wrenches_mu(contact_transforms(noisy), mus)
+    return hull_quality(hull_points(wrenches, metric))
+
+
+# Least wrench of perturbed copies of one grasp (frames (n,3)) or of a
+# batch of grasps (G,n,3):
+#   mu: nominal friction, scalar or one per contact
+#   pos_scale, angle_scale, mu_scale: size of the noise on the contact
+#       x, y, on the normal angle theta and on mu (clipped at 0)
+#   distribution: 'normal' or 'uniform' (see _noise())
+#   rng: seed (or SeedSequence) of the chunk seeds
+#   workers: processes evaluating the chunks, 1 to run here
+# Returns the qualities (samples,) or (G,samples); -inf or negative for
+# samples without force closure.
+@instrument('metric')
+def monte_carlo_quality(frames, mu, samples=2000, pos_scale=0.05,
+                        angle_scale=0.05, mu_scale=0.05,
+                        distribution='normal', metric='union', chunk=500,
+                        rng=None, workers=1):
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError('distribution should be one of %s' % (DISTRIBUTIONS,))
+    frames = np.asarray(frames, dtype=float)
+    single = frames.ndim == 2
+    frames = frames[None] if single else frames
+    mu = np.broadcast_to(np.asarray(mu, dtype=float), frames.shape[:2])
+
+    sizes = [min(chunk, samples - start) for start in range(0, samples, chunk)]
+    seeds = np.random.SeedSequence(rng).spawn(len(sizes))
+    args = [(frames, mu, size, seed, pos_scale, angle_scale, mu_scale,
+             distribution, metric) for size, seed in zip(sizes, seeds)]
+    if workers == 1:
+        chunks = [_chunk_quality(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            chunks = list(pool.map(_chunk_quality, *zip(*args)))
+    quality = np.concatenate(chunks, axis=1)
+    return quality[0] if single else quality
+
+
+# Summary of Monte Carlo qualities (...,samples): the quantiles (Q,...)
+# and the fraction of samples with force closure (...). The quantiles
+# are actual samples (method='lower'): degenerate samples are -inf and
+# interpolating between two of them would give NaN.
+def quality_statistics(quality, quantiles=(0.05, 0.5, 0.95)):
+    return (np.quantile(quality, quantiles, axis=-1, method='lower'),
+            np.mean(quality > 0, axis=-1))
+
+
+# Rank a batch of grasps (G,n,3) by the given quantile of their quality
+# under noise (keyword arguments as monte_carlo_quality()). Returns the
+# order (best first) and the quantile of each grasp (G,).
+def rank_grasps(frames, mu, quantile=0.05, **kwargs):
+    quality = monte_carlo_quality(np.asarray(frames, dtype=float), mu, **kwargs)
+    robust = np.quantile(quality, quantile, axis=-1, method='lower')
+    return np.argsort(-robust), robust
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Planar grasp that is updated one contact at a time, for finger gaiting
+sequences where only one contact is added, removed or moved per step.
+
+The wrenches are the Union hull points of GraspMetrics.py (the two
+friction cone edges of each contact), stored as rows of a (2n,3) array,
+two consecutive rows per contact. Instead of recomputing matrix_rank,
+null_space and ConvexHull from scratch:
+- the QR factorization of the wrench rows is updated with scipy's
+  qr_insert / qr_delete / qr_update (rank-one updates, O(n) per change),
+  and gives the rank (from the singular values of its three columns of
+  R) and the null space (the internal forces)
+- the hull is a ConvexHull(incremental=True) and new contacts are added
+  to it with add_points(). Qhull cannot remove points, so removing or
+  moving a contact rebuilds the hull (a single call for a planar grasp).
+"""
+
+import numpy as np
+from scipy.linalg import qr, qr_insert, qr_delete, qr_update, null_space
+from scipy.spatial import ConvexHull, QhullError
+
+from GraspMetrics import union_wrenches, facet_distances
+
+
+class IncrementalGrasp:
+    # frames: (n,3) contact frames [x, y, theta], X along the outward normal
+    def __init__(self, frames, mu, tol=1e-10):
+        self.mu = mu
+        self.tol = tol
+        self.frames = np.array(frames, dtype=float).reshape(-1, 3)
+        self.wrenches = np.vstack([self._rows(f) for f in self.frames]) \
+            if len(self.frames) else np.zeros((0, 3))
+        self.Q, self.R = qr(self.wrenches)
+        self._build_hull()
+
+    # The two Union hull wrenches [left edge; right edge] of one contact
+    def _rows(self, frame):
+        return union_wrenches(np.reshape(frame, (1, 3)), self.mu)
+
+    def _build_hull(self):
+        try:
+            self.hull = ConvexHull(self.wrenches, incremental=True)
+        except (QhullError, ValueError):
+            self.hull = None  # not enough points (yet) for a 3D hull
+
+    # Add a contact at the end, or before contact index
+    def add_contact(self, frame, index=None):
+        index = len(self.frames) if index is None else index
+        rows = self._rows(frame)
+        self.frames = np.insert(self.frames, index, frame, axis=0)
+        self.wrenches = np.insert(self.wrenches, 2*index, rows, axis=0)
+        self.Q, self.R = qr_insert(self.Q, self.R, rows, 2*index, which='row')
+        if self.hull is None:
+            self._build_hull()
+        else:
+            self.hull.add_points(rows)
+
+    def remove_contact(self, index):
+        self.frames = np.delete(self.frames, index, axis=0)
+        self.wrenches = np.delete(self.wrenches, [2*index, 2*index + 1], axis=0)
+        self.Q, self.R = qr_delete(self.Q, self.R, 2*index, 2, which='row')
+        self._rebuild_hull()
+
+    # Move a contact to a new frame: a rank-one update per row (scipy's
+    # rank-k qr_update fails for two contacts, 4 rows of 3 columns)
+    def move_contact(self, index, frame):
+        rows = self._rows(frame)
+        for k in range(2):
+            u = np.zeros(len(self.wrenches))
+            u[2*index + k] = 1
+            self.Q, self.R = qr_update(self.Q, self.R, u,
+                                       rows[k] - self.wrenches[2*index + k])
+        self.frames[index] = frame
+        self.wrenches[2*index:2*index + 2] = rows
+        self._rebuild_hull()
+
+    def _rebuild_hull(self):
+        if self.hull is not None:
+            self.hull.close()
+        self._build_hull()
+
+    # Rank of the wrench rows from the singular values of R, the same as
+    # those of the wrenches (Q is orthogonal). The diagonal of R is not
+    # enough without pivoting, and R has only three nonzero rows.
+    def rank(self):
+        s = np.linalg.svd(self.R[:3], compute_uv=False)
+        return int(np.sum(s > self.tol*max(s.max(initial=0), 1)))
+
+    # Internal forces (2n, 2n-rank): combinations of the cone edge wrenches
+    # that sum to zero. The last columns of Q when the wrenches have full
+    # rank (then the first rank columns of Q span their range), else from
+    # an SVD.
+    def null_space(self):
+        r = self.rank()
+        if r == min(self.wrenches.shape[1], len(self.wrenches)):
+            return self.Q[:, r:]
+        return null_space(self.wrenches.T)
+
+    # Ferrari&Canny least wrench of the Union hull (as least_wrench() in
+    # GraspMetrics.py); -inf while there is no hull
+    def least_wrench(self):
+        if self.hull is None:
+            return -np.inf
+        return np.amin(facet_distances(self.hull))
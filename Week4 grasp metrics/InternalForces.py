@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Nonlinear (Yoshikawa & Nagai 1991) internal force distribution for N
+fingers with frictional point contacts in 3D, generalizing Part 2 of
+Left-Right-GraspMatrix.py.
+
+Finger forces f = [f1; f2; ...; fN] (3N) are in body coordinates and the
+fingers are at positions r_i, so the body wrench is
+    [fb; mb] = sum_i [f_i; r_i x f_i]
+Each pair (a, b) of fingers has an internal (squeezing) force along the
+unit vector e from finger a to finger b. As with min{fx1,-fx2} for two
+fingers, it is defined by the finger with the smaller inward component:
+    fint = min{f_a.e, -f_b.e}
+Which finger that is depends on the external wrench, so every pattern of
+choices (one bit per pair) has its own grasp matrix, with the body wrench
+rows and one row per pair. The (pseudo) inverses of all 2^npairs of them
+are precomputed, and the pattern for a query is
+the one whose choices are consistent with the min, which is checked with
+one more precomputed matrix product (no solving at query time).
+
+The pairs must be independent (every pattern's grasp matrix of full
+rank), so there are at most 3N - rank G of them, and the setup cost
+grows as 2^npairs. By default neighbouring fingers are paired first,
+then fingers further apart, keeping only pairs that keep every pattern
+independent: for fingers at the corners of a regular polygon these are
+the N sides (5 of the 10 pairs for 5 fingers).
+"""
+
+from itertools import combinations
+
+import numpy as np
+
+from WrenchUtils import Rcross  # in local directory
+
+
+# Grasp matrix (6,3N) of point contacts at positions (N,3), with finger
+# forces in body coordinates
+def point_grasp_matrix(positions):
+    positions = np.asarray(positions, dtype=float)
+    return np.vstack((np.tile(np.eye(3), len(positions)),
+                      np.hstack([Rcross(*r) for r in positions])))
+
+
+# Inward components of finger a (Da.T*f) and b (Db.T*f) for each pair,
+# (3N,npairs) each
+def pair_components(positions, pairs):
+    Da = np.zeros((3*len(positions), len(pairs)))
+    Db = np.zeros((3*len(positions), len(pairs)))
+    for j, (a, b) in enumerate(pairs):
+        e = positions[b] - positions[a]
+        e = e/np.linalg.norm(e)
+        Da[3*a:3*a + 3, j] = e
+        Db[3*b:3*b + 3, j] = -e
+    return Da, Db
+
+
+# Bit patterns (2^npairs,npairs), bit j of pattern k is bit j of k
+def _patterns(npairs):
+    return (np.arange(2**npairs)[:, None] >> np.arange(npairs)) & 1
+
+
+# Independent pairs of fingers at positions (N,3): pairs in order of
+# distance along the finger numbering (i, i+1 first, wrapping around),
+# kept if the grasp matrix of every pattern still gains one rank with
+# them, until the 3N - rank G internal DOF are used
+def independent_pairs(positions, tol=1e-9):
+    positions = np.asarray(positions, dtype=float)
+    nfingers = len(positions)
+    candidates = sorted(combinations(range(nfingers), 2),
+                        key=lambda p: (min(p[1] - p[0], nfingers - p[1] + p[0]), p))
+    G = point_grasp_matrix(positions)
+    rank = np.linalg.matrix_rank(G, tol)
+    dof = 3*nfingers - rank
+    pairs = []
+    for pair in candidates:
+        if len(pairs) == dof:
+            break
+        Da, Db = pair_components(positions, pairs + [pair])
+        rows = np.where(_patterns(len(pairs) + 1)[:, :, None] == 1, Db.T, Da.T)
+        stacked = np.concatenate((np.broadcast_to(G, (len(rows),) + G.shape), rows), axis=1)
+        if np.all(np.linalg.matrix_rank(stacked, tol) == rank + len(pairs) + 1):
+            pairs.append(pair)
+    return pairs
+
+
+class InternalForceDistribution:
+    # positions: (N,3) finger contact positions in body coordinates
+    # pairs: list of finger index pairs (a, b) with an internal force
+    #        (default independent_pairs(); no more than the internal DOF
+    #        3N - rank G)
+    # tol: tolerance on the min-consistency of a pattern
+    def __init__(self, positions, pairs=None, tol=1e-12):
+        positions = np.asarray(positions, dtype=float)
+        nfingers = len(positions)
+        pairs = independent_pairs(positions) if pairs is None \
+            else [tuple(p) for p in pairs]
+        G = point_grasp_matrix(positions)
+        if len(pairs) > 3*nfingers - np.linalg.matrix_rank(G):
+            raise ValueError('more pairs than internal degrees of freedom')
+
+        self.positions = positions
+        self.pairs = pairs
+        self.tol = tol
+        npairs = len(pairs)
+
+        Da, Db = pair_components(positions, pairs)
+
+        # bit j of a pattern is 0 if fint_j = f_a.e, 1 if fint_j = -f_b.e
+        self.patterns = _patterns(npairs)
+        inverses = []
+        checks = []
+        for bits in self.patterns:
+            rows = np.where(bits[:, None] == 1, Db.T, Da.T)
+            Ginv = np.linalg.pinv(np.vstack((G, rows)))
+            inverses.append(Ginv)
+            # chosen minus other inward component, <= 0 when consistent
+            sign = np.where(bits == 1, 1.0, -1.0)[:, None]
+            checks.append(sign*((Db - Da).T @ Ginv))
+        self.inverses = np.array(inverses)            # (P,3N,6+npairs)
+        self.checks = np.vstack(checks)               # (P*npairs,6+npairs)
+
+        # buffers for the allocation-free single query path
+        self._rhs = np.zeros(6 + npairs)
+        self._check = np.zeros(len(self.checks))
+        self._violation = np.zeros(len(self.patterns))
+        self._forces = np.zeros(3*nfingers)
+
+    # Finger forces (N,3) for one body wrench (6,) and internal forces
+    # (npairs,) or a scalar. Only preallocated buffers are used, so the
+    # returned array is overwritten by the next call unless out is given.
+    # Also returns the index of the pattern used.
+    def solve(self, wrench, fint, out=None):
+        npairs = len(self.pairs)
+        self._rhs[:6] = wrench
+        self._rhs[6:] = fint
+        violation = self._violation
+        np.dot(self.checks, self._rhs, out=self._check)
+        np.max(self._check.reshape(-1, npairs), axis=1, out=violation)
+        np.subtract(violation, self.tol, out=violation)
+        np.maximum(violation, 0, out=violation)
+        pattern = int(np.argmin(violation))
+        out = self._forces if out is None else out.reshape(-1)
+        np.dot(self.inverses[pattern], self._rhs, out=out)
+        return out.reshape(-1, 3), pattern
+
+    # Batch version of solve(): wrenches (...,6) and internal forces
+    # (...,npairs) or (...). Returns finger forces (...,N,3) and the
+    # pattern index of each query (...). The first consistent pattern is
+    # used (ties as in Left-Right-GraspMatrix.py), or the least
+    # inconsistent one if there is none.
+    def solve_batch(self, wrenches, fints):
+        wrenches = np.asarray(wrenches, dtype=float)
+        shape = wrenches.shape[:-1]
+        npairs = len(self.pairs)
+        fints = np.broadcast_to(np.asarray(fints, dtype=float)[..., None]
+                                if np.ndim(fints) == len(shape)
+                                else fints, shape + (npairs,))
+        rhs = np.concatenate((wrenches, fints), axis=-1).reshape(-1, 6 + npairs)
+
+        checks = (rhs @ self.checks.T).reshape(len(rhs), -1, npairs)
+        violation = np.maximum(checks.max(axis=2) - self.tol, 0)
+        patterns = np.argmin(violation, axis=1)
+        forces = np.einsum('qij,qj->qi', self.inverses[patterns], rhs)
+        return (forces.reshape(shape + (len(self.positions), 3)),
+                patterns.reshape(shape))
@@ -11,8 +11,13 @@ As usual, it's best to select and run a few lines at a time, inspecting
 intermediate results to make sure they make sense to you.
 """
 import numpy as np
-import matplotlib.pyplot as plt
+from LeftRightGrasp import linear_sweep, nonlinear_sweep  # in local directory
+from InternalForces import InternalForceDistribution, point_grasp_matrix  # in local directory
 #from pprint import pprint
+from RunFlags import run_headless  # in local directory
+
+# Run with --headless (or set TMM_HEADLESS=1) to skip all plotting
+headless = run_headless()
 """
 Consider a planar block of width = 2 units, held on the left and
 right by two fingers with frictional point contacts. To keep things
@@ -59,32 +64,16 @@ Ginv = np.linalg.inv(Gtransp)
 # Consider a range of directions for the external force
 numsteps = 31415
 thetas = np.linspace(0, 2*np.pi, numsteps)
-plotpts = np.zeros((numsteps, 2))
-markers = ['.'] * numsteps
-
-for i in range(0, numsteps):
-    fbody[0] = fext*np.cos(thetas[i])
-    fbody[1] = fext*np.sin(thetas[i])
-    ffingers = np.dot(Ginv, fbody)
-    plotpts[i, 0] = ffingers[0]
-    plotpts[i, 1] = ffingers[1]
-# Highlight any cases where friction constraint is not satisfied
-    if (np.abs(ffingers[1])/ffingers[0] > 0.5):
-        markers[i] = 'x'
+plotpts, fails = linear_sweep(Ginv, thetas, fext, fint, mz=fbody[2])
+# fails highlights any cases where friction constraint is not satisfied
 
 # Plot the forces on the left finger as a function of theta
-plt.figure(1)
-fig1 = plt.gcf()
-
-plt.plot(thetas, plotpts[:, 0], color='b')
-plt.plot(thetas, plotpts[:, 1], color='g')
-for i in range(0, numsteps):
-    if (markers[i] == 'x'):
-        plt.scatter(thetas[i], plotpts[i, 1], color='k', marker=markers[i])
+if not headless:
+    import matplotlib.pyplot as plt
+    from GraspPlots import plot_finger_forces
 
-plt.xlabel('angle (0 to 2pi)')
-plt.legend(['fx1', 'fy1'])
-plt.title('left finger forces (linear mapping); x marks friction fails')
+    plot_finger_forces(thetas, plotpts, fails,
+                       'left finger forces (linear mapping); x marks friction fails', 1)
 
 
 """
@@ -105,35 +94,49 @@ Gright = np.array([[1, 0, 1, 0], [0, 1, 0, 1], [0, -1, 0, 1], [0, 0, -1, 0]])
 Grightinv = np.linalg.inv(Gright)
 # print("--- Grightinv ---")
 # pprint(Grightinv)
-# reset markers list
-markers = ['.'] * numsteps
-
-for i in range(0, numsteps):
-    fbody[0] = fext*np.cos(thetas[i])
-    fbody[1] = fext*np.sin(thetas[i])
-    if (fbody[0] > 0):
-        ffingers = np.dot(Grightinv, fbody)
-    else:
-        ffingers = np.dot(Gleftinv, fbody)
-
-    plotpts[i, 0] = ffingers[0]
-    plotpts[i, 1] = ffingers[1]
-# Highlight any cases where friction constraint is not satisfied
-    if (np.abs(ffingers[1])/ffingers[0] > 0.5):
-        markers[i] = 'x'
-
+plotpts, fails = nonlinear_sweep(Gleftinv, Grightinv, thetas, fext, fint,
+                                 mz=fbody[2])
+
+# The same min-based internal force for any number of fingers in 3D is in
+# InternalForces.py; with the fingers at (-1,0,0) and (1,0,0) it gives
+# back the finger forces above.
+yn = InternalForceDistribution([(-1, 0, 0), (1, 0, 0)])
+wrenches3D = np.zeros((numsteps, 6))
+wrenches3D[:, 0] = fext*np.cos(thetas)
+wrenches3D[:, 1] = fext*np.sin(thetas)
+wrenches3D[:, 5] = fbody[2]
+ffingers3D, _ = yn.solve_batch(wrenches3D, fint)
+print("N-finger distribution, max difference from Gleftinv/Grightinv: %.2e"
+      % np.abs(ffingers3D[:, 0, :2] - plotpts).max())
+
+# With more fingers the default pairs are the independent ones, e.g. the
+# sides of a regular polygon; the finger forces still balance the wrench
+for nfingers in (5, 6):
+    corners = 2*np.pi*np.arange(nfingers)/nfingers
+    polygon = np.column_stack((np.cos(corners), np.sin(corners), np.zeros(nfingers)))
+    yn_polygon = InternalForceDistribution(polygon)
+    ffingers, _ = yn_polygon.solve_batch(wrenches3D, fint)
+    print("%d fingers, pairs %s, max wrench error: %.2e"
+          % (nfingers, yn_polygon.pairs, np.abs(
+              np.einsum('ij,...j->...i', point_grasp_matrix(polygon),
+                        ffingers.reshape(numsteps, -1)) - wrenches3D).max()))
+
+# The sweeps broadcast thetas, fext and fint, so whole grids of external
+# and internal force magnitudes take one call: for each (fext, fint),
+# does friction fail for some direction of the external force?
+thetas_grid = np.linspace(0, 2*np.pi, 3142)[:, None, None]
+fexts = np.linspace(0.1, 2, 20)
+fints = np.linspace(0.1, 2, 20)
+_, lin_fails = linear_sweep(Ginv, thetas_grid, fexts[:, None], fints,
+                            mz=fbody[2])
+_, nonlin_fails = nonlinear_sweep(Gleftinv, Grightinv, thetas_grid,
+                                  fexts[:, None], fints, mz=fbody[2])
+print("(fext, fint) pairs holding in all directions: linear %d, nonlinear %d of %d"
+      % ((~lin_fails.any(axis=0)).sum(), (~nonlin_fails.any(axis=0)).sum(),
+         fexts.size*fints.size))
 
 # Plot the forces on the left finger as a function of theta
-plt.figure(2)
-fig2 = plt.gcf()
-plt.plot(thetas, plotpts[:, 0], color='b')
-plt.plot(thetas, plotpts[:, 1], color='g')
-for i in range(0, numsteps):
-    if (markers[i] == 'x'):
-        plt.scatter(thetas[i], plotpts[i, 1], color='k', marker=markers[i])
-
-plt.xlabel('angle (0 to 2pi)')
-plt.legend(['fx1', 'fy1'])
-plt.title('left finger forces (nonlinear mapping); x marks friction fails')
-
-plt.show()
+if not headless:
+    plot_finger_forces(thetas, plotpts, fails,
+                       'left finger forces (nonlinear mapping); x marks friction fails', 2)
+    plt.show()
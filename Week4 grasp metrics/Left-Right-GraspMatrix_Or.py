@@ -9,7 +9,11 @@ As usual, it's best to select and run a few lines at a time, inspecting
 intermediate results to make sure they make sense to you.
 """
 import numpy as np
-import matplotlib.pyplot as plt
+from LeftRightGrasp import linear_sweep, nonlinear_sweep  # in local directory
+from RunFlags import run_headless  # in local directory
+
+# Run with --headless (or set TMM_HEADLESS=1) to skip all plotting
+headless = run_headless()
 
 """
 Consider a planar block of width = 2 units, held on the left and
@@ -55,32 +59,16 @@ Ginv = np.linalg.inv(Gtransp)
 # Consider a range of directions for the external force
 numsteps = 314
 thetas = np.linspace(0, 2*np.pi, numsteps)
-plotpts = np.zeros((numsteps, 2))
-markers = ['.'] * numsteps
-
-for i in range(0, numsteps):
-    fbody[0] = fext*np.cos(thetas[i])
-    fbody[1] = fext*np.sin(thetas[i])
-    ffingers = np.dot(Ginv, fbody)
-    plotpts[i, 0] = ffingers[0]
-    plotpts[i, 1] = ffingers[1]
-# Highlight any cases where friction constraint is not satisfied
-    if (np.abs(ffingers[1])/ffingers[0] > 0.5):
-        markers[i] = 'x'
+plotpts, fails = linear_sweep(Ginv, thetas, fext, fint, mz=fbody[2])
+# fails highlights any cases where friction constraint is not satisfied
 
 # Plot the forces on the left finger as a function of theta
-plt.figure(1)
-fig1 = plt.gcf()
+if not headless:
+    import matplotlib.pyplot as plt
+    from GraspPlots import plot_finger_forces
 
-plt.plot(thetas, plotpts[:, 0], color='b')
-plt.plot(thetas, plotpts[:, 1], color='g')
-for i in range(0, numsteps):
-    if (markers[i] == 'x'):
-        plt.scatter(thetas[i], plotpts[i, 1], color='k', marker=markers[i])
-
-plt.xlabel('angle (0 to 2pi)')
-plt.legend(['fx1', 'fy1'])
-plt.title('left finger forces (linear mapping); x marks friction fails')
+    plot_finger_forces(thetas, plotpts, fails,
+                       'left finger forces (linear mapping); x marks friction fails', 1)
 
 
 """
@@ -98,35 +86,11 @@ Gleftinv = np.linalg.inv(Gleft)
 Gright = np.array([[1, 0, 1, 0], [0, 1, 0, 1], [0, -1, 0, 1], [0, 0, -1, 0]])
 Grightinv = np.linalg.inv(Gright)
 
-# reset markers list
-markers = ['.'] * numsteps
-
-for i in range(0, numsteps):
-    fbody[0] = fext*np.cos(thetas[i])
-    fbody[1] = fext*np.sin(thetas[i])
-    if (fbody[0] > 0):
-        ffingers = np.dot(Grightinv, fbody)
-    else:
-        ffingers = np.dot(Gleftinv, fbody)
-
-    plotpts[i, 0] = ffingers[0]
-    plotpts[i, 1] = ffingers[1]
-# Highlight any cases where friction constraint is not satisfied
-    if (np.abs(ffingers[1])/ffingers[0] > 0.5):
-        markers[i] = 'x'
-
+plotpts, fails = nonlinear_sweep(Gleftinv, Grightinv, thetas, fext, fint,
+                                 mz=fbody[2])
 
 # Plot the forces on the left finger as a function of theta
-plt.figure(2)
-fig2 = plt.gcf()
-plt.plot(thetas, plotpts[:, 0], color='b')
-plt.plot(thetas, plotpts[:, 1], color='g')
-for i in range(0, numsteps):
-    if (markers[i] == 'x'):
-        plt.scatter(thetas[i], plotpts[i, 1], color='k', marker=markers[i])
-
-plt.xlabel('angle (0 to 2pi)')
-plt.legend(['fx1', 'fy1'])
-plt.title('left finger forces (nonlinear mapping); x marks friction fails')
-
-plt.show()
+if not headless:
+    plot_finger_forces(thetas, plotpts, fails,
+                       'left finger forces (nonlinear mapping); x marks friction fails', 2)
+    plt.show()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Computational core of Left-Right-GraspMatrix.py: mapping body wrenches
+[fxb, fyb, mzb, fint] to the finger forces [fx1, fy1, fx2, fy2] of a
+planar block held on the left and right by two frictional point contacts,
+for external forces swept over all directions. No plotting here; see
+GraspPlots.py.
+"""
+import numpy as np
+
+
+# Friction fails on the left finger when |fy1|/fx1 > mu, for finger
+# forces (...,4) [fx1, fy1, fx2, fy2]
+def friction_fails(ffingers, mu=0.5):
+    ffingers = np.asarray(ffingers)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.abs(ffingers[..., 1])/ffingers[..., 0] > mu
+
+
+# Body wrenches (...,4) [fxb, fyb, mzb, fint] for an external force of
+# magnitude fext at angle theta. thetas, fext, fint and mz are broadcast
+# together, so e.g. thetas[:, None, None], fexts[:, None] and fints give
+# a full (numsteps, nfext, nfint, 4) grid.
+def body_wrenches(thetas, fext, fint, mz=0):
+    thetas, fext, fint, mz = np.broadcast_arrays(thetas, fext, fint, mz)
+    return np.stack((fext*np.cos(thetas), fext*np.sin(thetas), mz, fint),
+                    axis=-1).astype(float)
+
+
+# Linear mapping of body wrenches (...,4) to finger forces (...,4)
+def finger_forces(Ginv, fbody):
+    return fbody @ np.transpose(Ginv)
+
+
+# Nonlinear mapping (Yoshikawa & Nagai): the internal force is based on
+# min{fx1,-fx2}, so use Grightinv when fbody[0] > 0 and Gleftinv otherwise.
+def nonlinear_finger_forces(Gleftinv, Grightinv, fbody):
+    return np.where(fbody[..., :1] > 0,
+                    finger_forces(Grightinv, fbody),
+                    finger_forces(Gleftinv, fbody))
+
+
+# Linear mapping: finger forces = Ginv*fbody for an external force of
+# magnitude fext at each angle in thetas, with internal force fint and
+# external moment mz (all broadcast as in body_wrenches).
+# Returns left finger forces (...,2) and fail flags (...).
+def linear_sweep(Ginv, thetas, fext, fint, mz=0, mu=0.5):
+    ffingers = finger_forces(Ginv, body_wrenches(thetas, fext, fint, mz))
+    return ffingers[..., :2], friction_fails(ffingers, mu)
+
+
+# Same as linear_sweep() with the nonlinear (Yoshikawa & Nagai) mapping
+def nonlinear_sweep(Gleftinv, Grightinv, thetas, fext, fint, mz=0, mu=0.5):
+    ffingers = nonlinear_finger_forces(Gleftinv, Grightinv,
+                                       body_wrenches(thetas, fext, fint, mz))
+    return ffingers[..., :2], friction_fails(ffingers, mu)
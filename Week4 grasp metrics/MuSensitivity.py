@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Sensitivity of grasp quality to the friction coefficient. ConvexHullUnion.py
+and ConvexHullMinkowski.py build the cone edges fl, fr for a single mu;
+here the contact transforms PTrans(frame).T are computed once and only
+the cone edges are rebuilt, for a whole vector of mu values (shared by
+all contacts, or one per contact) at once.
+
+critical_mu() finds, for a batch of grasps, the smallest mu that gives
+force closure (below it closure is lost), by bisection on all grasps
+together. Force closure only gets easier as the cones widen, so the
+bisection is valid even though the least wrench itself need not be
+monotonic in mu.
+"""
+
+import numpy as np
+
+from GraspSynthesis import hull_points, hull_quality
+from Instrumentation import instrument
+
+
+# PTrans(frame).T (...,3,3) for contact frames (...,3) [x, y, theta]:
+# maps a local contact wrench to the global frame
+@instrument('transforms')
+def contact_transforms(frames):
+    frames = np.asarray(frames, dtype=float)
+    x, y, theta = frames[..., 0], frames[..., 1], frames[..., 2]
+    c, s = np.cos(theta), np.sin(theta)
+    zero, one = np.zeros_like(c), np.ones_like(c)
+    return np.stack((np.stack((c, -s, zero), axis=-1),
+                     np.stack((s, c, zero), axis=-1),
+                     np.stack((x*s - y*c, x*c + y*s, one), axis=-1)), axis=-2)
+
+
+# Local left and right cone edges (...,2,3) for friction coefficients
+# (...), as cone_edges() in GraspMetrics.py
+def cone_edges_mu(mu):
+    phi = np.arctan(np.asarray(mu, dtype=float))
+    c, s, zero = np.cos(phi), np.sin(phi), np.zeros_like(phi)
+    return np.stack((np.stack((-c, -s, zero), axis=-1),
+                     np.stack((-c, s, zero), axis=-1)), axis=-2)
+
+
+# Global cone edge wrenches (...,n,2,3) for transforms (...,n,3,3) and mu
+# broadcastable to (...,n)
+@instrument('transforms')
+def edge_wrenches_mu(transforms, mu):
+    mu = np.asarray(mu, dtype=float)
+    shape = np.broadcast_shapes(mu.shape, transforms.shape[:-2])
+    edges = cone_edges_mu(np.broadcast_to(mu, shape))
+    return np.einsum('...ij,...kj->...ki', transforms, edges)
+
+
+# Least wrench of one grasp (frames (n,3)) for each of the mus: (M,)
+# values shared by all contacts, or (M,n) with one mu per contact.
+# Returns (M,); negative (or -inf) where there is no force closure.
+@instrument('metric')
+def quality_vs_mu(frames, mus, metric='union'):
+    transforms = contact_transforms(frames)
+    mus = np.asarray(mus, dtype=float)
+    if mus.ndim == 1:
+        mus = mus[:, None]
+    return hull_quality(hull_points(edge_wrenches_mu(transforms, mus), metric))
+
+
+# Smallest mu with force closure for each grasp, frames (G,n,3) (or a
+# single grasp (n,3)). 0 if the grasp has force closure without
+# friction, inf if it does not even with mu_max. The Union hull is
+# enough here: it encloses the origin exactly when the Minkowski one does.
+@instrument('roots')
+def critical_mu(frames, mu_max=10.0, iters=40):
+    frames = np.asarray(frames, dtype=float)
+    single = frames.ndim == 2
+    transforms = contact_transforms(frames[None] if single else frames)
+
+    def closure(mu):
+        points = hull_points(edge_wrenches_mu(transforms, mu[:, None]))
+        return hull_quality(points) > 0
+
+    ngrasps = len(transforms)
+    lo = np.zeros(ngrasps)
+    hi = np.full(ngrasps, float(mu_max))
+    at_zero = closure(lo)
+    at_max = closure(hi)
+    for _ in range(iters):
+        mid = (lo + hi)/2
+        closed = closure(mid)
+        hi = np.where(closed, mid, hi)
+        lo = np.where(closed, lo, mid)
+    result = np.where(at_zero, 0.0, np.where(at_max, hi, np.inf))
+    return result[0] if single else result
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Analytic gradient of the Ferrari&Canny least wrench with respect to the
+contact frames [x, y, theta], so that grasps can be refined by gradient
+ascent instead of finite differences (each of which needs a new hull).
+
+The least wrench is the distance d from the origin to the plane of the
+closest hull facet. Moving one vertex p_k of that facet changes d by
+lambda_k n . dp_k, where n is the unit outward normal and lambda the
+barycentric coordinates of the foot of the perpendicular d n from the
+origin. The hull points are sums of cone edge wrenches PTrans(frame).T f
+(one per contact for the Union hull, up to n for the Minkowski hull), and
+the derivatives of PTrans(frame).T give dp_k/dframe in closed form.
+
+The metric is only piecewise smooth: where two facets tie for the
+minimum, the gradient of one of them is returned.
+"""
+
+from itertools import product
+
+import numpy as np
+from scipy.spatial import ConvexHull, QhullError
+
+from GraspMetrics import facet_distances
+from GraspSynthesis import polygon_edges, boundary_frames
+from MuSensitivity import contact_transforms, cone_edges_mu
+from Instrumentation import instrument, stage
+
+
+# Derivatives (...,3,3,3) of PTrans(frame).T with respect to x, y, theta
+# (first index) for contact frames (...,3)
+def contact_transform_derivatives(frames):
+    frames = np.asarray(frames, dtype=float)
+    x, y, theta = frames[..., 0], frames[..., 1], frames[..., 2]
+    c, s = np.cos(theta), np.sin(theta)
+    zero = np.zeros_like(c)
+    dx = np.stack((np.stack((zero, zero, zero), axis=-1),
+                   np.stack((zero, zero, zero), axis=-1),
+                   np.stack((s, c, zero), axis=-1)), axis=-2)
+    dy = np.stack((np.stack((zero, zero, zero), axis=-1),
+                   np.stack((zero, zero, zero), axis=-1),
+                   np.stack((-c, s, zero), axis=-1)), axis=-2)
+    dtheta = np.stack((np.stack((-s, -c, zero), axis=-1),
+                       np.stack((c, -s, zero), axis=-1),
+                       np.stack((x*c + y*s, -x*s + y*c, zero), axis=-1)),
+                      axis=-2)
+    return np.stack((dx, dy, dtheta), axis=-3)
+
+
+# Which cone edge of each contact makes up each hull point: (P,n) with
+# 0, 1 (left, right edge) or 2 (none), in the order of hull_points()
+def point_edges(n, metric='union'):
+    if metric == 'union':
+        edges = np.full((2*n, n), 2)
+        edges[np.arange(2*n), np.repeat(np.arange(n), 2)] = np.tile([0, 1], n)
+        return edges
+    if metric == 'minkowski':
+        return np.array(list(product(range(3), repeat=n)))
+    raise ValueError("metric should be 'union' or 'minkowski'")
+
+
+# Least wrench and its gradient with respect to the frames, for one grasp
+# (frames (n,3)) or a batch (...,n,3), and mu scalar or per contact.
+# Returns eps (...) and grad (...,n,3); -inf and zeros where there is no
+# 3D hull.
+@instrument('metric')
+def least_wrench_gradient(frames, mu, metric='union'):
+    frames = np.asarray(frames, dtype=float)
+    n = frames.shape[-2]
+    edges = point_edges(n, metric)
+    # local cone edges (...,n,2,3), global edge wrenches (...,n,3,3) and
+    # their derivatives (...,n,3,3,3), indexed [contact, left/right/zero
+    # edge, d/dframe, component]
+    local = cone_edges_mu(np.broadcast_to(np.asarray(mu, dtype=float),
+                                          frames.shape[:-1]))
+    local = np.concatenate((local, np.zeros_like(local[..., :1, :])), axis=-2)
+    wrenches = np.einsum('...ij,...kj->...ki', contact_transforms(frames), local)
+    dwrenches = np.einsum('...qij,...kj->...kqi',
+                          contact_transform_derivatives(frames), local)
+    points = wrenches[..., np.arange(n), edges, :].sum(axis=-2)  # (...,P,3)
+
+    batch = frames.shape[:-2]
+    eps = np.full(batch, -np.inf)
+    facets = np.zeros(batch + (3,), dtype=int)
+    normals = np.zeros(batch + (3,))
+    valid = np.zeros(batch, dtype=bool)
+    for b in np.ndindex(batch):
+        try:
+            with stage('hull', points[b]):
+                hull = ConvexHull(points[b])
+        except (QhullError, ValueError):
+            continue
+        distances = facet_distances(hull)
+        f = np.argmin(distances)
+        eps[b], facets[b] = distances[f], hull.simplices[f]
+        normals[b] = hull.equations[f, :3]
+        valid[b] = True
+
+    # barycentric coordinates of eps*normal in the facet triangles
+    vertices = np.take_along_axis(points, facets[..., None], axis=-2)
+    e = vertices[..., 1:, :] - vertices[..., :1, :]  # (...,2,3)
+    gram = e @ np.swapaxes(e, -1, -2)
+    gram[~valid] = np.eye(2)
+    rhs = np.einsum('...ki,...i->...k', e,
+                    np.where(valid, eps, 0)[..., None]*normals
+                    - vertices[..., 0, :])
+    ab = np.linalg.solve(gram, rhs[..., None])[..., 0]
+    lam = np.concatenate((1 - ab.sum(axis=-1, keepdims=True), ab), axis=-1)
+
+    # d eps/d frame_i = sum_k lam_k n . d p_k/d frame_i, with
+    # dpoints (...,n,3 vertices,3,3) the derivatives of the facet vertices
+    chosen = edges[facets]  # (...,3 vertices,n)
+    dpoints = np.take_along_axis(
+        dwrenches, np.swapaxes(chosen, -1, -2)[..., None, None], axis=-3)
+    grad = np.einsum('...k,...ikqj,...j->...iq', lam, dpoints, normals)
+    grad[~valid] = 0
+    return eps, grad
+
+
+# Least wrench (...) of contacts at arc lengths s (...,n) on a polygon
+# (see GraspSynthesis.py) and its derivative (...,n) with respect to s:
+# along an edge only x, y move, by the unit tangent of that edge.
+def arc_length_gradient(vertices, s, mu, metric='union'):
+    _, tangents, _, arc = polygon_edges(vertices)
+    s = np.mod(s, arc[-1])
+    edge = np.clip(np.searchsorted(arc, s, side='right') - 1, 0, len(tangents) - 1)
+    eps, grad = least_wrench_gradient(boundary_frames(vertices, s), mu, metric)
+    return eps, np.einsum('...i,...i->...', grad[..., :2], tangents[edge])
+
+
+# Gradient ascent of the least wrench over the arc lengths s (...,n) of
+# the contacts. Each grasp takes steps of length step (default 1/8 of the
+# shortest edge) along its normalized gradient; a step that does not
+# improve it is undone and step halved, until step < tol.
+# Returns s, the least wrench and the number of evaluations (each a hull
+# and its gradient) per grasp.
+def refine_grasp(vertices, s, mu, metric='union', step=None, tol=1e-6,
+                 maxiter=100):
+    arc = polygon_edges(vertices)[3]
+    s = np.mod(np.array(s, dtype=float), arc[-1])
+    steps = np.full(s.shape[:-1], np.min(np.diff(arc))/8 if step is None else step)
+    eps, grad = arc_length_gradient(vertices, s, mu, metric)
+    evaluations = np.ones(s.shape[:-1], dtype=int)
+    for _ in range(maxiter):
+        active = (steps >= tol) & np.isfinite(eps)
+        if not np.any(active):
+            break
+        norm = np.linalg.norm(grad, axis=-1, keepdims=True)
+        trial = s + np.where(norm > 0, steps[..., None]*grad/np.maximum(norm, 1e-300), 0)
+        trial_eps, trial_grad = arc_length_gradient(vertices, trial[active], mu, metric)
+        evaluations[active] += 1
+        better = np.zeros_like(active)
+        better[active] = trial_eps > eps[active]
+        s[better] = np.mod(trial[better], arc[-1])
+        update = better[active]
+        eps[better] = trial_eps[update]
+        grad[better] = trial_grad[update]
+        steps[active & ~better] /= 2
+    return s, eps, evaluations
+
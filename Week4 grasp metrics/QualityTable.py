@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Precomputed grasp quality over the contact parameter space of a polygon.
+
+For a fixed object, mu and number of contacts n (2 to 4), the least
+wrench of ConvexHullUnion.py only depends on the arc lengths of the
+contacts along the boundary (see GraspSynthesis.py). It is computed once
+on a periodic grid of m points per contact and queries are answered by
+multilinear interpolation, so no hull is computed online.
+
+The quality does not depend on the order of the contacts, so only
+sorted grid tuples i1 <= i2 <= ... <= in are stored: C(m+n-1, n) values
+instead of m^n (about n! times smaller). The position of a sorted tuple
+in the array is its rank in the combinatorial number system, which is
+the index of the table. Files are written as in WrenchSequences.py:
+basename_quality.npy (float32, read memory-mapped) and basename.json.
+"""
+
+import json
+from itertools import combinations_with_replacement
+
+import numpy as np
+
+from GraspSynthesis import polygon_edges, boundary_frames, grasp_quality
+from Instrumentation import instrument
+
+
+# Binomial coefficients C(x, k) for x < xmax, k <= kmax as an int64 table
+def _binomials(xmax, kmax):
+    table = np.zeros((xmax + 1, kmax + 1), dtype=np.int64)
+    table[:, 0] = 1
+    for x in range(1, xmax + 1):
+        table[x, 1:] = table[x - 1, 1:] + table[x - 1, :-1]
+    return table
+
+
+# Rank of grid tuples (...,n) among the sorted tuples of m values: sort,
+# make strictly increasing (b_i = i_i + i) and use the colex rank
+# sum C(b_i, i+1)
+def tuple_rank(index, m, binomials=None):
+    n = np.shape(index)[-1]
+    binomials = _binomials(m + n, n) if binomials is None else binomials
+    b = np.sort(index, axis=-1) + np.arange(n)
+    return binomials[b, np.arange(1, n + 1)].sum(axis=-1)
+
+
+# Compute the table for the polygon vertices (anticlockwise), mu, n
+# contacts and m grid points per contact, in chunks of candidate grasps
+# written straight to the memory-mapped file.
+@instrument('metric')
+def build_quality_table(basename, vertices, mu, n, m, metric='union',
+                        chunk=4096):
+    if not 2 <= n <= 4:
+        raise ValueError('tables are for 2 to 4 contacts')
+    perimeter = polygon_edges(vertices)[3][-1]
+    binomials = _binomials(m + n, n)
+    size = int(binomials[m + n - 1, n])
+    table = np.lib.format.open_memmap(basename + '_quality.npy', mode='w+',
+                                      dtype=np.float32, shape=(size,))
+
+    tuples = combinations_with_replacement(range(m), n)
+    while True:
+        index = np.array([t for _, t in zip(range(chunk), tuples)])
+        if len(index) == 0:
+            break
+        frames = boundary_frames(vertices, index*perimeter/m)
+        table[tuple_rank(index, m, binomials)] = grasp_quality(frames, mu, metric)
+    table.flush()
+
+    metadata = {'vertices': np.asarray(vertices, dtype=float).tolist(),
+                'mu': mu, 'n': n, 'm': m, 'metric': metric,
+                'perimeter': perimeter,
+                'arrays': {'quality': [size]}}
+    with open(basename + '.json', 'w') as fp:
+        json.dump(metadata, fp, indent=2)
+    return QualityTable(basename)
+
+
+class QualityTable:
+    # Open a table written by build_quality_table()
+    def __init__(self, basename, mmap=True):
+        with open(basename + '.json') as fp:
+            self.metadata = json.load(fp)
+        self.n = self.metadata['n']
+        self.m = self.metadata['m']
+        self.perimeter = self.metadata['perimeter']
+        self.values = np.load(basename + '_quality.npy',
+                              mmap_mode='r' if mmap else None)
+        self._binomials = _binomials(self.m + self.n, self.n)
+        # offsets of the 2^n corners of a grid cell
+        self._corners = (np.arange(2**self.n)[:, None] >> np.arange(self.n)) & 1
+
+    # Tabulated quality at grid tuples (...,n) of integers
+    def at(self, index):
+        index = np.mod(index, self.m)
+        return self.values[tuple_rank(index, self.m, self._binomials)]
+
+    # Interpolated quality for contacts at arc lengths s (...,n). Corners
+    # without a hull (-inf, e.g. all contacts on one edge) are left out
+    # and the weights of the others renormalized; -inf if there are none.
+    @instrument('metric')
+    def quality(self, s):
+        u = np.mod(np.asarray(s, dtype=float), self.perimeter)*self.m/self.perimeter
+        base = np.floor(u).astype(int)
+        frac = u - base
+        total = np.zeros(u.shape[:-1])
+        weights = np.zeros(u.shape[:-1])
+        for corner in self._corners:
+            weight = np.prod(np.where(corner == 1, frac, 1 - frac), axis=-1)
+            value = self.at(base + corner).astype(float)
+            valid = np.isfinite(value)
+            total += np.where(valid, weight*np.where(valid, value, 0), 0)
+            weights += np.where(valid, weight, 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(weights > 0, total/weights, -np.inf)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Task oriented grasp quality. The least wrench of ConvexHullUnion.py and
+ConvexHullMinkowski.py is the radius of the largest ball around the
+origin inside the grasp wrench hull, i.e. all disturbance directions
+count the same. Here the ball is replaced by a task wrench set T (points
+(J,3) whose convex hull is the set, e.g. the loads of a peg insertion)
+and the quality is the largest scale k such that k*T is inside the hull.
+
+For a hull with facets n.x + b <= 0 the task fits at scale k when
+k n.t <= -b for every facet and task point t, so k is found from one
+matrix product (a ray cast from the origin through every task point);
+task_scale_lp() solves the same problem as a single LP on the hull
+points without computing the hull.
+
+k does not change when the same linear map is applied to both sets, so
+weighting the wrench components only matters for the ball: as in
+Miller & Allen (GraspIt!), moments are divided by the largest distance r
+from the center to the object boundary, so that forces and moments are
+comparable. weighted_least_wrench() is the least wrench in those units;
+ball_task() is the same ball as a sampled task set.
+"""
+
+import numpy as np
+from scipy.optimize import linprog
+from scipy.sparse import coo_matrix, hstack, kron, eye
+from scipy.spatial import ConvexHull, QhullError
+
+from GraspMetrics import least_wrench
+from Instrumentation import instrument, stage
+
+
+# Miller&Allen moment scale 1/r, r the largest distance from center
+# (default: the mean of the vertices) to the polygon vertices (V,2)
+def torque_scale(vertices, center=None):
+    vertices = np.asarray(vertices, dtype=float)
+    center = vertices.mean(axis=0) if center is None else np.asarray(center)
+    return 1/np.max(np.linalg.norm(vertices - center, axis=1))
+
+
+# Least wrench of the hull points (P,3) after scaling the components by
+# weights (3,), e.g. [1, 1, torque_scale(vertices)]
+def weighted_least_wrench(points, weights):
+    return least_wrench(np.asarray(points)*weights)[0]
+
+
+# Task points (samples,3) on the ellipsoid with semi-axes axes (3,)
+# (along fx, fy, mz, then rotated by rotation (3,3) if given), from a
+# Fibonacci lattice on the unit sphere
+def ellipsoid_task(axes, samples=200, rotation=None):
+    i = np.arange(samples) + 0.5
+    z = 1 - 2*i/samples
+    phi = np.pi*(1 + 5**0.5)*i
+    r = np.sqrt(1 - z**2)
+    sphere = np.stack((r*np.cos(phi), r*np.sin(phi), z), axis=-1)
+    task = sphere*np.asarray(axes, dtype=float)
+    return task if rotation is None else task @ np.asarray(rotation).T
+
+
+# Unit ball of the weighted wrench space (|weights*w| <= 1) as task points
+def ball_task(weights, samples=200):
+    return ellipsoid_task(1/np.asarray(weights, dtype=float), samples)
+
+
+# Largest scale k with k*task inside the hull (facets n.x + b <= 0):
+# k <= -b/(n.t) where n.t > 0, k >= -b/(n.t) where n.t < 0 (only
+# binding if the origin is outside the hull). Returns k (inf if the task
+# points never leave the hull), or -inf if no k >= 0 fits.
+def task_scale(hull, task, tol=1e-12):
+    normals, offsets = hull.equations[:, :-1], hull.equations[:, -1]
+    a = np.asarray(task, dtype=float) @ normals.T  # (J,F)
+    c = np.broadcast_to(-offsets, a.shape)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        upper = np.min(np.where(a > tol, c/a, np.inf))
+        lower = np.max(np.where(a < -tol, c/a, 0), initial=0)
+    tangent_ok = np.all(c[np.abs(a) <= tol] >= -tol)
+    return upper if lower <= upper and tangent_ok else -np.inf
+
+
+# task_scale() for each set of hull points (...,P,3) and one task (J,3)
+# -> (...); -inf for degenerate sets without a 3D hull
+@instrument('metric')
+def task_quality(points, task):
+    points = np.asarray(points, dtype=float)
+    flat = points.reshape((-1,) + points.shape[-2:])
+    quality = np.full(len(flat), -np.inf)
+    for b, pts in enumerate(flat):
+        try:
+            with stage('hull', pts):
+                hull = ConvexHull(pts)
+            quality[b] = task_scale(hull, task)
+        except (QhullError, ValueError):
+            pass
+    return quality.reshape(points.shape[:-2])
+
+
+# The same k as task_scale(), from the hull points (P,d) directly:
+#   max k  s.t.  k t_j = sum_p lam_jp points_p, sum_p lam_jp = 1,
+#                lam >= 0  for every task point t_j
+# with J*P + 1 variables. Useful when the hull itself is expensive or
+# degenerate. Returns k (-inf if infeasible, inf if unbounded).
+@instrument('lp')
+def task_scale_lp(points, task):
+    points = np.asarray(points, dtype=float)
+    task = np.asarray(task, dtype=float)
+    (P, d), J = points.shape, len(task)
+    # rows per task point: [points.T; ones] lam_j - [t_j; 0] k = [0; 1]
+    block = np.vstack((points.T, np.ones((1, P))))
+    A_lam = kron(eye(J), coo_matrix(block))
+    A_k = coo_matrix(-np.hstack((task, np.zeros((J, 1)))).reshape(-1, 1))
+    A_eq = hstack((A_k, A_lam)).tocsr()
+    b_eq = np.tile(np.append(np.zeros(d), 1), J)
+    c = np.zeros(1 + J*P)
+    c[0] = -1
+    sol = linprog(c, A_eq=A_eq, b_eq=b_eq, bounds=(0, None), method='highs')
+    if sol.status == 2:
+        return -np.inf
+    if sol.status == 3:
+        return np.inf
+    return sol.x[0]
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Lightweight instrumentation of the library functions (transforms, SVDs,
+hulls, metrics, LP solves, root finding, integration, grasp synthesis),
+to see where the time of a run goes without wrapping scripts in
+cProfile. Like WrenchUtils.py, this file is copied into each week folder
+that uses it.
+
+Functions are tagged with the stage of the pipeline they belong to, one
+of STAGES:
+
+    @instrument('hull')
+    def least_wrench(points): ...
+
+and hull or LP calls inside functions of another stage with
+"with stage('lp', A):". Each call records its wall time and the shapes
+of its array arguments in an in-process registry; report() aggregates
+them per function or per stage.
+
+Recording is off unless the environment variable TMM_PROFILE is set (to
+anything but 0, false, no or off) when the modules are imported. When it
+is off, instrument() returns the function itself and stage() a shared
+no-op context, so there is no cost.
+With TMM_PROFILE_OUTPUT=path the registry is written at exit: as a Chrome
+trace (chrome://tracing or Perfetto) if the path ends with .trace.json,
+else as the JSON summary of report(). Calls made in worker processes are
+only recorded in those processes.
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from RunFlags import env_flag
+
+ENABLED = env_flag('TMM_PROFILE')
+STAGES = ('transforms', 'svd', 'hull', 'lp', 'metric', 'roots',
+          'integration', 'synthesis')
+MAX_EVENTS = 100000  # individual calls kept for the trace
+
+_lock = threading.Lock()
+_stats = {}   # name -> [stage, count, total, min, max, elements]
+_events = []  # (name, stage, start, duration, thread, shapes)
+_origin = time.perf_counter()
+
+
+# Shapes of the arrays among values
+def _shapes(values):
+    return [np.shape(v) for v in values if isinstance(v, np.ndarray)]
+
+
+def record(name, stage_name, start, duration, shapes=()):
+    elements = sum(int(np.prod(shape)) for shape in shapes)
+    with _lock:
+        stat = _stats.get(name)
+        if stat is None:
+            _stats[name] = [stage_name, 1, duration, duration, duration, elements]
+        else:
+            stat[1] += 1
+            stat[2] += duration
+            stat[3] = min(stat[3], duration)
+            stat[4] = max(stat[4], duration)
+            stat[5] += elements
+        if len(_events) < MAX_EVENTS:
+            _events.append((name, stage_name, start - _origin, duration,
+                            threading.get_ident(), shapes))
+
+
+class _Stage:
+    __slots__ = ('name', 'shapes', 'start')
+
+    def __init__(self, name, shapes):
+        self.name = name
+        self.shapes = shapes
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, self.name, self.start,
+               time.perf_counter() - self.start, self.shapes)
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+# Context manager timing a block as stage name, with the shapes of the
+# given arrays
+def stage(name, *arrays):
+    if name not in STAGES:
+        raise ValueError('stage should be one of ' + ', '.join(STAGES))
+    if not ENABLED:
+        return _NO_STAGE
+    return _Stage(name, _shapes(arrays))
+
+
+# Decorator recording every call of a function under its qualified name,
+# in the given stage
+def instrument(stage_name):
+    if stage_name not in STAGES:
+        raise ValueError('stage should be one of ' + ', '.join(STAGES))
+
+    def decorate(func):
+        if not ENABLED:
+            return func
+        name = func.__module__ + '.' + func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, stage_name, start, time.perf_counter() - start,
+                       _shapes(args) + _shapes(kwargs.values()))
+        return wrapper
+    return decorate
+
+
+def reset():
+    with _lock:
+        _stats.clear()
+        _events.clear()
+
+
+# Call count, wall times (s) and array elements per function, or summed
+# per stage with by='stage'. Nested calls are counted in both the inner
+# and the outer function.
+def report(by='function'):
+    if by not in ('function', 'stage'):
+        raise ValueError("by should be 'function' or 'stage'")
+    result = {}
+    with _lock:
+        for name, (stage_name, count, total, low, high, elements) in _stats.items():
+            key = name if by == 'function' else stage_name
+            entry = result.setdefault(key, {'count': 0, 'total': 0.0,
+                                            'min': np.inf, 'max': 0.0,
+                                            'elements': 0})
+            if by == 'function':
+                entry['stage'] = stage_name
+            entry['count'] += count
+            entry['total'] += total
+            entry['min'] = min(entry['min'], low)
+            entry['max'] = max(entry['max'], high)
+            entry['elements'] += elements
+    for entry in result.values():
+        entry['mean'] = entry['total']/entry['count']
+    return result
+
+
+# Table of report(by), largest total time first
+def summary(by='function'):
+    rows = sorted(report(by).items(), key=lambda item: -item[1]['total'])
+    lines = ['%-50s %8s %10s %10s %10s' % (by, 'calls', 'total ms',
+                                           'mean ms', 'max ms')]
+    for key, entry in rows:
+        lines.append('%-50s %8d %10.3f %10.3f %10.3f'
+                     % (key, entry['count'], 1e3*entry['total'],
+                        1e3*entry['mean'], 1e3*entry['max']))
+    return '\n'.join(lines)
+
+
+def export_json(path):
+    with open(path, 'w') as fp:
+        json.dump({'functions': report('function'), 'stages': report('stage')},
+                  fp, indent=2)
+
+
+# Complete ('X') events in microseconds, one per recorded call
+def export_chrome_trace(path):
+    pid = os.getpid()
+    with _lock:
+        events = [{'name': name, 'cat': stage_name, 'ph': 'X',
+                   'ts': 1e6*start, 'dur': 1e6*duration,
+                   'pid': pid, 'tid': thread,
+                   'args': {'shapes': [list(s) for s in shapes]}}
+                  for name, stage_name, start, duration, thread, shapes in _events]
+    with open(path, 'w') as fp:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, fp)
+
+
+def _export_at_exit():
+    path = os.environ.get('TMM_PROFILE_OUTPUT')
+    if path.endswith('.trace.json'):
+        export_chrome_trace(path)
+    else:
+        export_json(path)
+
+
+if ENABLED and os.environ.get('TMM_PROFILE_OUTPUT'):
+    atexit.register(_export_at_exit)
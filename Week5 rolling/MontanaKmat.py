@@ -8,7 +8,8 @@ Equations (6-15) to derive the [K] matrix for the case of a sphere.
 3Nov2021 minor edits
 """
 from sympy import sin, cos, diff, Symbol, Matrix, diag
-from sympy import simplify, refine, Q, pprint
+from sympy import refine, Q, pprint
+from SymbolicCache import cached_simplify  # in local directory; simplify() results kept on disk
 
 R = Symbol('R', positive=True, real=True)
 u = Symbol('u', real=True)
@@ -23,8 +24,8 @@ partialu = diff(fvec, u)
 partialv = diff(fvec, v)
 
 # Get norms ||f_u(u)|| etc.
-normpu = simplify(partialu.norm())
-normpv = simplify(partialv.norm())
+normpu = cached_simplify(partialu.norm())
+normpv = cached_simplify(partialv.norm())
 # Help sympy to recognize some algebraic simplifications
 # Get rid of abs(cos(u)) stuff knowing that u is from -pi/2 to pi/2
 normpvpos = refine(normpv, Q.positive(cos(u)))
@@ -32,7 +33,7 @@ normpvpos = refine(normpv, Q.positive(cos(u)))
 # xu, yu, zu should match equation 14
 xu = partialu/normpu
 yu = partialv/normpvpos
-zu = simplify(xu.cross(yu))
+zu = cached_simplify(xu.cross(yu))
 
 pprint(zu)
 
@@ -41,25 +42,25 @@ Ka0 = xu.transpose()
 Ka1 = yu.transpose()
 Ka = Ka0.col_join(Ka1)
 
-Kb0 = simplify(diff(zu, u))/normpu
+Kb0 = cached_simplify(diff(zu, u))/normpu
 Kb1 = diff(zu, v)/normpvpos
 Kb = Kb0.row_join(Kb1)
 
 # Kmat should match the [K] in equation 15
-Kmat = simplify(Ka*Kb)
+Kmat = cached_simplify(Ka*Kb)
 
 pprint(Kmat)
 
 # We leave the derivation of the [T] and [M] matrices as an exercise
 # for the reader :-) You will similarly use eq (8) and (9)
-xuu = simplify(diff(xu, u))
-xuv = simplify(diff(xu, v))
+xuu = cached_simplify(diff(xu, u))
+xuv = cached_simplify(diff(xu, v))
 
 Tb = Matrix([(xuu/normpu).transpose(),
             (xuv/normpvpos).transpose()]).transpose()
 
 T = yu.transpose() * Tb
-T = simplify(T)
+T = cached_simplify(T)
 print("\nT = ")
 pprint(T)
 
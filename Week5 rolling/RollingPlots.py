@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Optional plotting layer for the Week5 rolling scripts. Only imported when
+the scripts are not run with --headless.
+"""
+
+import matplotlib.pyplot as plt
+
+
+# Trajectory of the contact [u2, v2] on obj2, start 'o' and end 'X'
+def plot_trajectory(plotpts, fignum=1):
+    plt.figure(fignum)
+    fig = plt.gcf()
+    plt.gca().set_aspect('equal', 'datalim')  # square and limited by data
+    plt.title('trajectory u2, v2')
+    plt.plot(plotpts[:, 0], plotpts[:, 1], color='b')
+    plt.scatter(plotpts[0, 0], plotpts[0, 1], marker='o')
+    plt.scatter(plotpts[-1, 0], plotpts[-1, 1], marker='X')
+    return fig
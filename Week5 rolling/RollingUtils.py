@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Computational core of the SphereOnFlat rolling examples: Montana's
+equations (16-20) for obj1 rolling on obj2, and a simple Euler
+integration of the contact coordinates. No plotting here, so the
+functions can be used in batch jobs; see RollingPlots.py.
+
+Montana: 'We describe the motion of obj1 relative to obj2
+using local coordinate frames Cl1(t) and CL2(t).
+Let vx,vy,vz be the components of translational velocity
+of Cl1(t) relative to CL2(t) at time t...''
+"""
+
+from sympy import sin, cos, Symbol, Matrix
+import numpy as np
+
+from SymbolicCache import cached_simplify, cached_lambdify
+from Instrumentation import instrument
+
+# Contact coordinates on obj1 and obj2
+u1 = Symbol('u1', real=True)
+v1 = Symbol('v1', real=True)
+u2 = Symbol('u2', real=True)
+v2 = Symbol('v2', real=True)
+
+# Symbols associated with relative velocity of obj1 on obj2
+psi = Symbol('psi', real=True)  # alignment of frames on obj1 and obj2
+omegax = Symbol('omegax', real=True)
+omegay = Symbol('omegay', real=True)
+omegaz = Symbol('omegaz', real=True)  # could be 0 if 'soft finger'
+vx = Symbol('vx', real=True)  # 0 if no sliding
+vy = Symbol('vy', real=True)  # 0 if no sliding
+
+
+# Montana equations (16-19) given the curvature, torsion and metric
+# [K], [T], [M] of the two objects. Returns du1, du2 (2x1) and dpsi.
+# With rolling=True there is no relative sliding (vx = vy = 0, eq 42).
+def montana_rates(Kmat1, Tmat1, Mmat1, Kmat2, Tmat2, Mmat2, rolling=True):
+    # Eq 16
+    Rpsi = Matrix([[cos(psi), -sin(psi)], [-sin(psi), -cos(psi)]])
+    K2_tilde = Rpsi*Kmat2*Rpsi
+
+    # Eq 17
+    Krel = Kmat1 + K2_tilde
+    v1gen = Matrix([-omegay, omegax]) - K2_tilde * Matrix([vx, vy])
+    du1 = cached_simplify(Mmat1.inv() * Krel.inv() * v1gen)
+
+    # Eq 18
+    v2gen = Matrix([-omegay, omegax]) + Kmat1 * Matrix([vx, vy])
+    du2 = cached_simplify(Mmat2.inv() * Rpsi * Krel.inv() * v2gen)
+
+    # Eq 19
+    dpsi = omegaz + (Tmat1 * Mmat1 * du1 + Tmat2 * Mmat2 * du2)[0]
+
+    if rolling:
+        du1 = du1.subs([(vx, 0), (vy, 0)])
+        du2 = du2.subs([(vx, 0), (vy, 0)])
+        dpsi = dpsi.subs([(vx, 0), (vy, 0)])
+    return du1, du2, dpsi
+
+
+# Euler integration of the contact coordinates for constant rolling
+# velocities omegas = (omegax, omegay, omegaz), starting from
+# start = (u1, v1, u2, v2, psi). The rates are lambdified once instead
+# of substituted at every step (and the generated code is cached).
+# Returns plotpts (numsteps,3) with [u2, v2, psi] after each step and
+# the final state (u1, v1, u2, v2, psi).
+@instrument('integration')
+def roll(du1, du2, dpsi, omegas, numsteps, stepsize, start=(0, 0, 0, 0, 0)):
+    args = (u1, v1, u2, v2, psi, omegax, omegay, omegaz)
+    rates = cached_lambdify(args, [du1[0], du1[1], du2[0], du2[1], dpsi])
+
+    state = np.array(start, dtype=float)
+    plotpts = np.zeros((numsteps, 3))
+    for count in range(numsteps):
+        state = state + stepsize*np.array(rates(*state, *omegas), dtype=float)
+        plotpts[count] = state[[2, 3, 4]]
+    return plotpts, tuple(state)
@@ -0,0 +1,26 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Run options of the scripts and modules given by command line switches and
+environment variables, parsed in one place. Like WrenchUtils.py, this
+file is copied into each week folder that uses it.
+
+An environment variable is a flag that is on unless it is unset, empty,
+or one of 0, false, no, off (any case), so that TMM_HEADLESS=0 means
+what it says.
+"""
+
+import os
+import sys
+
+FALSE_VALUES = ('', '0', 'false', 'no', 'off')
+
+
+# Is the environment variable name set to a true value?
+def env_flag(name):
+    return os.environ.get(name, '').strip().lower() not in FALSE_VALUES
+
+
+# Should the script skip all plotting? (--headless or TMM_HEADLESS)
+def run_headless():
+    return '--headless' in sys.argv or env_flag('TMM_HEADLESS')
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+Optional plotting layer for LScalcs.py. Only imported when the script
+is not run with --headless.
+"""
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+
+# Wireframe of the limit surface ellipsoid in [fx, fy, mz] space
+# (upper half, positive moment). Returns the figure and its 3D axes.
+def plot_ellipsoid(a, b, c):
+    theta = np.linspace(0, np.pi, 20)
+    phi = np.linspace(0, 2*np.pi, 20)
+
+    x = a * np.outer(np.cos(phi), np.sin(theta))
+    y = b * np.outer(np.sin(phi), np.sin(theta))
+    z = c * np.outer(np.ones_like(phi), np.absolute(np.cos(theta)))
+
+    fig = plt.figure(figsize=plt.figaspect(1))  # Square figure
+    ax = fig.add_subplot(111, projection='3d')
+
+    # Plot:
+    ax.plot_wireframe(x, y, z, color='y')
+
+    # Make axis labels
+    for i in ["x", "y", "z"]:
+        getattr(ax, "set_{:s}label".format(i))(i)
+    return fig, ax
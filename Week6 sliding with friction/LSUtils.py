@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Computational core of LScalcs.py: limit surface of a planar sliding
+object with discrete frictional contacts (Howe & Cutkosky, IJRR 1996).
+No plotting here, so these can be used in batch jobs; see LSPlots.py.
+
+Each row of a contacts array is [x, y, mu*fn] for one sliding point.
+"""
+
+import numpy as np
+
+
+# Given an array of sliding points and a COR location (rcx,rcy),
+# compute total friction wrench w.r.t. origin, assuming
+# anticlockwise rotation. This gives one point on a LS.
+# Each row of contacts[,,] should have [x,y,mu*fn] for a contact point.
+# rotation < 0 means clockwise; else anticlockwise (default)
+
+
+def LSwrench(rcx, rcy, contacts, rotation):
+    npoints = np.shape(contacts)[0]
+    fwrench = np.zeros(3)
+    tiny = 1.0e-8  # in case COR is essentially at this point
+    if (rotation < 0):
+        rotation = -1  # default
+    else:
+        rotation = 1
+
+    for i in range(npoints):
+        mufn = contacts[i, 2]
+        rx = contacts[i, 0]-rcx
+        ry = contacts[i, 1]-rcy
+        rmag = np.sqrt(rx**2+ry**2)
+        if rmag > tiny:
+            fx = mufn*(ry/rmag)
+            fy = mufn*(-rx/rmag)
+        else:
+            fx, fy = 0, 0
+
+        mz = (-fx*contacts[i][1]+fy*contacts[i][0])
+        fwrench[0] += fx
+        fwrench[1] += fy
+        fwrench[2] += mz
+
+    return rotation * fwrench
+
+# friction-weighted center of pressure of a set of contacts
+
+
+def Centroid(contacts):
+    center = np.zeros(2)
+    npoints = np.shape(contacts)[0]
+    cx, cy, fmag = 0, 0, 0
+    for i in range(npoints):
+        fmag += contacts[i, 2]
+        cx += contacts[i, 0]*contacts[i, 2]
+        cy += contacts[i, 1]*contacts[i, 2]
+    center[0] = cx/fmag
+    center[1] = cy/fmag
+
+    return center
+
+
+"""
+PART ONE of LScalcs.py: rotation about one of the contacts (a facet on
+the limit surface). Equilibrium in the plane is
+[Qmat]*[fcx,fcy,rho]' + [frx,fry,frm]' = [0,0,0]'
+where [frx,fry,frm] is the net friction wrench from the sliding points,
+uwrench the unit external wrench, and (rcx, rcy) the assumed COR.
+Returns fcx, fcy (force at the COR) and rho (scale of uwrench).
+"""
+
+
+def FacetSolve(uwrench, rcx, rcy, scontacts, rotation=-1):
+    frwrench = LSwrench(rcx, rcy, scontacts, rotation)
+    Qmat = np.array(
+        [[1, 0, uwrench[0]], [0, 1, uwrench[1]], [-rcy, rcx, uwrench[2]]])
+    Qinv = np.linalg.inv(Qmat)  # could be singular if problem ill-posed
+    result = -Qinv.dot(frwrench)
+    return result[0], result[1], result[2]
+
+
+# Contacts moved so that the friction-weighted centroid is at the origin.
+# Returns the recentered contacts and the old centroid.
+def Recenter(contacts):
+    origin = Centroid(contacts)
+    symcontacts = np.array(contacts, dtype=float)
+    symcontacts[:, :2] -= origin
+    return symcontacts, origin
+
+
+# Semi-axes (a, b, c) of the Howe/Lee/Cutkosky ellipsoid
+# (x/a)^2 + (y/b)^2 + (z/c)^2 = 1 for (recentered) contacts:
+# c is the maximum moment, for a COR at the origin, and a = b is the
+# sum of the tangential forces (isotropic friction).
+def LSEllipsoid(symcontacts):
+    # Applied moment is opposite of sliding friction moment
+    maxmoment = -LSwrench(0, 0, symcontacts, 1)
+    c = maxmoment[2]
+    a = np.sum(symcontacts[:, 2])  # sum of the tangential forces
+    b = a  # assuming isotropic friction
+    return a, b, c
+
+
+# Scaled version of wrench [fx, fy, mz] that just barely intersects
+# the ellipsoidal shell (taking the moment to be positive)
+def EllipsoidIntersect(wrench, a, b, c):
+    phi = np.arctan2(wrench[1], wrench[0])
+    r = np.sqrt(wrench[0]**2+wrench[1]**2)
+    theta = np.arctan2(c*r, a*wrench[2])
+
+    # Using ellipsoid definition:
+    x = a*np.cos(phi)*np.sin(theta)
+    y = b*np.sin(phi)*np.sin(theta)
+    z = c*np.absolute(np.cos(theta))
+    return np.array([x, y, z])
+
+
+# Unit sliding twist [vx, vy, omega] at a point on the ellipsoid:
+# vx, vy are parallel to the friction force, and the rotation follows
+# Howe & Cutkosky Table 2 with Lam = c/a the ratio of ellipse axes.
+def SlidingTwist(slidewrench, a, c):
+    Lam = c/a
+    vx = slidewrench[0]
+    vy = slidewrench[1]
+    vtan = np.sqrt(vx**2+vy**2)
+    omegaz = slidewrench[2]/(Lam**2 * vtan)
+    slidetwist = np.array([vx, vy, omegaz])
+    return slidetwist/np.linalg.norm(slidetwist)
@@ -33,63 +33,15 @@ too high (unless mu*fn=1)
 to consider if rotation is clockwise.
 """
 
-import matplotlib.pyplot as plt
 import numpy as np
 from WrenchUtils import PTrans
+# LSwrench(), Centroid() and the ellipsoid calculations are in LSUtils.py
+from LSUtils import LSwrench, Centroid, FacetSolve, Recenter, LSEllipsoid
+from LSUtils import EllipsoidIntersect, SlidingTwist
+from RunFlags import run_headless  # in local directory
 
-'''
-Define a couple of useful utilities:
-'''
-# Given an array of sliding points and a COR location (rcx,rcy),
-# compute total friction wrench w.r.t. origin, assuming
-# anticlockwise rotation. This gives one point on a LS.
-# Each row of contacts[,,] should have [x,y,mu*fn] for a contact point.
-# rotation < 0 means clockwise; else anticlockwise (default)
-
-
-def LSwrench(rcx, rcy, contacts, rotation):
-    npoints = np.shape(contacts)[0]
-    fwrench = np.zeros(3)
-    tiny = 1.0e-8  # in case COR is essentially at this point
-    if (rotation < 0):
-        rotation = -1  # default
-    else:
-        rotation = 1
-
-    for i in range(npoints):
-        mufn = contacts[i, 2]
-        rx = contacts[i, 0]-rcx
-        ry = contacts[i, 1]-rcy
-        rmag = np.sqrt(rx**2+ry**2)
-        if rmag > tiny:
-            fx = mufn*(ry/rmag)
-            fy = mufn*(-rx/rmag)
-        else:
-            fx, fy = 0, 0
-
-        mz = (-fx*contacts[i][1]+fy*contacts[i][0])
-        fwrench[0] += fx
-        fwrench[1] += fy
-        fwrench[2] += mz
-
-    return rotation * fwrench
-
-# friction-weighted center of pressure of a set of contacts
-
-
-def Centroid(contacts):
-    center = np.zeros(2)
-    npoints = np.shape(contacts)[0]
-    cx, cy, fmag = 0, 0, 0
-    for i in range(npoints):
-        fmag += contacts[i, 2]
-        cx += contacts[i, 0]*contacts[i, 2]
-        cy += contacts[i, 1]*contacts[i, 2]
-    center[0] = cx/fmag
-    center[1] = cy/fmag
-
-    return center
-
+# Run with --headless (or set TMM_HEADLESS=1) to skip all plotting
+headless = run_headless()
 
 """
 PART ONE 
@@ -134,20 +86,13 @@ rcx, rcy, ftmax = p3x, p3y, ft3
 
 # [frx, fry, frm] are the net friction forces and moment for all sliding
 # contacts (i.e. other than the point about which we're rotating)
-frwrench = LSwrench(rcx, rcy, scontacts, -1)
-
-
 # Qmat * [fcx, fcy, rho] = -[frwrench] where fcx,fcy are the unknown
 # force components at the center of rotation (rcx, rcy), and rho is the
 # unknown scaling factor for uwrench. frwrench = [frx, fry, frm] is the
 # friction force and moment w.r.t. origin from the sliding contacts for
 # anticlockwise rotation about COR.
-# So Qmat^-1 * [frwrench] = -[fcx,fcy,rho]
-Qmat = np.array(
-    [[1, 0, uwrench[0]], [0, 1, uwrench[1]], [-rcy, rcx, uwrench[2]]])
-Qinv = np.linalg.inv(Qmat)  # could be singular if problem ill-posed
-result = -Qinv.dot(frwrench)
-fcx, fcy, rho = result[0], result[1], result[2]
+# So Qmat^-1 * [frwrench] = -[fcx,fcy,rho]  (see FacetSolve() in LSUtils.py)
+fcx, fcy, rho = FacetSolve(uwrench, rcx, rcy, scontacts, -1)
 
 # Finally compute what the pulling force would be
 if np.sqrt(fcx**2+fcy**2) < ftmax:
@@ -173,15 +118,9 @@ depending on your problem setup.)
 # Augment scontacts[] to now include previous CoR point and move origin
 extrapoint = np.array([rcx, rcy, ftmax])
 scontacts = np.vstack([extrapoint, scontacts])  # add in the 1st point
-npts = np.shape(scontacts)[0]
-origin = Centroid(scontacts)
 
 # If you want to recenter the points about new origin:
-symcontacts = np.zeros((npts, 3))
-for i in range(npts):
-    symcontacts[i, 0] = scontacts[i, 0] - origin[0]
-    symcontacts[i, 1] = scontacts[i, 1] - origin[1]
-    symcontacts[i, 2] = scontacts[i, 2]
+symcontacts, origin = Recenter(scontacts)
 # symcontacts = scontacts   #If don't want to recenter
 
 
@@ -202,36 +141,21 @@ If your problem has a negative moment and clockwise sliding
 you may want to flip sign on the moment and then remember 
 to flip back when computing the sliding twist at the end.
 """
-# Applied moment is opposite of sliding friction moment
-maxmoment = -LSwrench(0, 0, symcontacts, 1)
-
 # If the ellipsoid is not tilted much we have its axes:
 # (x/a)^2 + (y/b)^2 + (z/c)^2 = 1
-c = maxmoment[2]
-a = np.sum(symcontacts[:, 2])  # sum of the tangential forces
-b = a  # assuming isotropic friction
+# c is the maximum moment (applied moment is opposite of sliding friction
+# moment), a = b = sum of the tangential forces (isotropic friction)
+a, b, c = LSEllipsoid(symcontacts)
 
 """
 Let us plot the ellipsoid in [fx, fy, mz] space to see how it looks
+(see LSPlots.py)
 """
-#from mpl_toolkits.mplot3d import Axes3D
-
-theta = np.linspace(0, np.pi, 20)
-phi = np.linspace(0, 2*np.pi, 20)
+if not headless:
+    import matplotlib.pyplot as plt
+    from LSPlots import plot_ellipsoid
 
-x = a * np.outer(np.cos(phi), np.sin(theta))
-y = b * np.outer(np.sin(phi), np.sin(theta))
-z = c * np.outer(np.ones_like(phi), np.absolute(np.cos(theta)))
-
-fig = plt.figure(figsize=plt.figaspect(1))  # Square figure
-ax = fig.add_subplot(111, projection='3d')
-
-# Plot:
-ax.plot_wireframe(x, y, z, color='y')
-
-# Make axis labels
-for i in ["x", "y", "z"]:
-    eval("ax.set_{:s}label('{:s}')".format(i, i))
+    fig, ax = plot_ellipsoid(a, b, c)
 
 """
 Now we can test any applied wrench rho*[ufx,ufy, umz] to 
@@ -259,35 +183,23 @@ clockwise for our case
 
 # We can find where this wrench intersects
 # the ellipsoid
-phi = np.arctan2(newwrench[1], newwrench[0])
-r = np.sqrt(newwrench[0]**2+newwrench[1]**2)
-theta = np.arctan2(c*r, a*newwrench[2])
-
-# Using ellipsoid definition:
-x = a*np.cos(phi)*np.sin(theta)
-y = b*np.sin(phi)*np.sin(theta)
-z = c*np.absolute(np.cos(theta))
-slidewrench = np.array([x, y, z])
+slidewrench = EllipsoidIntersect(newwrench, a, b, c)
+x, y, z = slidewrench
 # slidewrench should be a scaled version of newwrench that just barely
 # intersects the ellipsoidal shell.
 
 # We can plot this point
-ax.scatter(x, y, z, marker='o')
+if not headless:
+    ax.scatter(x, y, z, marker='o')
 print('\nPart 2 New sliding wrench (see blue dot)', slidewrench)
 
 """
 Sliding velocity
 """
 # vx,vy components of the sliding twist will be parallel to fslipx, fslipy
-Lam = c/a  # ratio of ellipse axes
-vx = slidewrench[0]
-vy = slidewrench[1]
-vtan = np.sqrt(vx**2+vy**2)
-omegaz = slidewrench[2]/(Lam**2 * vtan)  # see Howe & Cutkosky Table 2.
-
-slidetwist = np.array([vx, vy, omegaz])
-mag = np.linalg.norm(slidetwist)
-print("unit sliding twist:", slidetwist/mag)
+# and omegaz follows Howe & Cutkosky Table 2 (see SlidingTwist()).
+print("unit sliding twist:", SlidingTwist(slidewrench, a, c))
 
 
-plt.show()
+if not headless:
+    plt.show()
@@ -10,10 +10,11 @@ friction. As in Peshkin, etc. he treats it as a Maximum Work or Power problem. (
 """
 from scipy.optimize import linprog
 from WrenchUtils import PTrans, Rcross
+from SymbolicCache import cached_lambdify  # in local directory
+from FrictionCones import friction_cone  # in local directory
 import numpy as np
 from sympy import symbols, Matrix, latex
 from pprint import pprint
-from math import pi, sin, cos
 
 fcx, fcy, mcz = symbols('fcx,fcy,mcz', real=True)
 
@@ -62,10 +63,10 @@ np.set_printoptions(precision=3, suppress=1)
 pprint(unitwrench)  # check that it looks OK
 
 # Enter the coordinates for the contact points p1, p2, p3
-W = Wrenchmat.subs({p1x: -2, p1y: -1, p2x: 2, p2y: -1, p3x: 0, p3y: 1})
-
-# Convert to np.array
-Wmat = np.array(W).astype(np.float64)
+# (Wrenchmat as a NumPy function of the contact coordinates, so other
+# clamp layouts need no further substitution)
+Wrenchfun = cached_lambdify((p1x, p1y, p2x, p2y, p3x, p3y), Wrenchmat)
+Wmat = np.array(Wrenchfun(-2, -1, 2, -1, 0, 1), dtype=np.float64)
 pprint(Wmat)
 
 # Per Sakurai eq (4.2.20), for equilibrium we require
@@ -87,21 +88,14 @@ mu = 1.0
 
 bounds = [[-mu*0.9, mu*0.9] for i in range(6)]
 
+# Each friction force is kept inside a 36-sided polygon circumscribing
+# the circle of radius mu (the normal force is 1): the faces of the
+# friction pyramid in FrictionCones.py, [cos(th), sin(th), -mu].[fx, fy, 1] <= 0
 sides = 36
-thetas = np.linspace(0, 2*pi, sides)
-
-
-def one_side(th):
-    return np.array((
-        (cos(th), sin(th), 0, 0, 0, 0),
-        (0, 0, cos(th), sin(th), 0, 0),
-        (0, 0, 0, 0, cos(th), sin(th)),
-    ))
-
-
-Aub = np.concatenate([one_side(th) for th in thetas], axis=0)
+faces = friction_cone('friction', mu, sides, inscribed=False).halfspaces
+Aub = np.kron(np.eye(3), faces[:, :2])
 # print(Aub)
-bub = mu*np.ones(Aub.shape[0])
+bub = np.tile(-faces[:, 2], 3)
 # print(bub.shape)
 
 sol = linprog(c=f, A_eq=Aeq, b_eq=beq, A_ub=Aub, b_ub=bub, method='simplex')
@@ -0,0 +1,40 @@
+'''
+Optional plotting layer for Vector-in-ConvexHull.py and Q2.py. Only
+imported when the scripts are not run with --headless.
+'''
+
+import os
+import mpl_toolkits.mplot3d as a3
+import matplotlib.pyplot as plt
+import numpy as np
+
+
+# Plot the faces of a convex hull and its vertices. Returns fig, ax.
+def plot_hull(points, hull):
+    fig = plt.figure()
+    ax = fig.add_subplot(111, projection='3d')
+    ax.set_xlabel('x')
+    ax.set_ylabel('y')
+    ax.set_zlabel('z')
+
+    for f in points[hull.simplices]:
+        face = a3.art3d.Poly3DCollection([f])
+        face.set_edgecolor('k')
+        face.set_alpha(0.3)
+        ax.add_collection3d(face)
+
+    # For those points in hull.simplices...
+    for s in hull.simplices:
+        s = np.append(s, s[0])  # Cycle back to 1st coordinate
+        ax.scatter(points[s, 0], points[s, 1], points[s, 2], marker='.', color='b')
+    return fig, ax
+
+
+# Save a figure as figs/<fig_name>.png next to the scripts
+def save_figure(fig, fig_name):
+    save_path = os.path.join(
+        os.path.dirname(os.path.realpath(__file__)),
+        'figs',
+        fig_name+'.png'
+    )
+    fig.savefig(save_path, dpi=600)
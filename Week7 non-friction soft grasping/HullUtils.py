@@ -0,0 +1,116 @@
+'''
+Computational core of Vector-in-ConvexHull.py and Q2.py: convex hull of
+a bunch of [x,y,z] points, whether a given point is inside the hull, and
+where the vector from the origin to that point leaves the hull.
+No plotting here, so these can be used in batch jobs; see HullPlots.py.
+'''
+
+import numpy as np
+from scipy.spatial import ConvexHull
+
+from Instrumentation import instrument
+
+
+# Convex hull of the points and its triangular faces (nfaces,3,3)
+def hull_faces(points):
+    hull = ConvexHull(points)
+    return hull, points[hull.simplices]
+
+
+# Membership tests against the facet half-spaces of a convex hull.
+# hull.equations holds n.x + b <= 0 for every facet (unit outward normals),
+# so a batch of queries is tested with one matrix product; there is no
+# need for a Delaunay tetrahedralization, which scales badly with dimension.
+# Build it once from points (or a ConvexHull) and reuse it for any number
+# of queries.
+class HullTest:
+    def __init__(self, points):
+        self.hull = points if isinstance(points, ConvexHull) else ConvexHull(points)
+        self.normals = self.hull.equations[:, :-1]
+        self.offsets = self.hull.equations[:, -1]
+
+    # Signed margin of each query (N,d) to the nearest facet plane:
+    # positive inside (the distance to the boundary), zero on it, and
+    # negative outside (minus the largest facet violation, which is a
+    # lower bound on the distance to the hull).
+    # Queries are processed in blocks of chunk rows to bound memory.
+    def margins(self, queries, chunk=8192):
+        queries = np.atleast_2d(queries)
+        out = np.empty(len(queries))
+        for start in range(0, len(queries), chunk):
+            block = queries[start:start + chunk]
+            out[start:start + chunk] = -np.max(
+                block @ self.normals.T + self.offsets, axis=1)
+        return out
+
+    # Boolean (N,) array: inside or within tol of the hull
+    def contains(self, queries, tol=1e-12):
+        return self.margins(queries) >= -tol
+
+
+# Recently used HullTest objects, keyed by the points they were built from
+_hull_cache = {}
+
+
+# HullTest for the points, reusing a cached one if the same points were
+# used before (keeps the cache_size most recent)
+@instrument('hull')
+def get_hull_test(points, cache_size=32):
+    points = np.ascontiguousarray(points, dtype=float)
+    key = (points.shape, points.tobytes())
+    test = _hull_cache.pop(key, None)
+    if test is None:
+        test = HullTest(points)
+    _hull_cache[key] = test  # move to the end (most recent)
+    while len(_hull_cache) > cache_size:
+        _hull_cache.pop(next(iter(_hull_cache)))
+    return test
+
+
+# Is extf inside the convex hull of the points? For a single query
+# returns a bool, for an (N,d) batch of queries a boolean array.
+def in_hull(points, extf, tol=1e-12):
+    inside = get_hull_test(points).contains(extf, tol)
+    return bool(inside[0]) if np.ndim(extf) == 1 else inside
+
+
+# Where rays from the origin along each row of directions (N,d) leave the
+# hull. hull.equations holds the facets as n.x + b = 0 with unit outward
+# normals n, so the ray s*dir crosses facet k at s = -b_k/(n_k.dir), and it
+# leaves through the nearest facet it points out of (n_k.dir > 0).
+# The origin must be inside the hull or on its boundary (b <= tol for
+# every facet; facets through the origin are treated as being at distance
+# tol, so rays pointing out of them get s ~ 0). If it is outside, the
+# scales are -inf and the facets -1, as in task_scale() of
+# TaskWrenchSpace.py. Minimizing s is the same as maximizing
+# (n_k.dir)/(-b_k), so all rays take a single matrix product.
+# Returns the exact scale factors s (N,), so that s*dir is on the hull
+# (inf if the ray never leaves), and the index of the facet hit (N,).
+# s >= 1 means dir itself is inside: s is the load capacity along dir.
+# Directions are processed in blocks of chunk rows to bound memory.
+@instrument('metric')
+def ray_cast(hull, directions, tol=1e-12, chunk=8192):
+    directions = np.atleast_2d(directions)
+    normals, offsets = hull.equations[:, :-1], hull.equations[:, -1]
+    if np.any(offsets > tol):
+        return np.full(len(directions), -np.inf), np.full(len(directions), -1)
+    scaled = (normals/np.maximum(-offsets, tol)[:, None]).T
+    facet = np.empty(len(directions), dtype=int)
+    best = np.empty(len(directions))
+    for start in range(0, len(directions), chunk):
+        ratios = directions[start:start + chunk] @ scaled
+        facet[start:start + chunk] = np.argmax(ratios, axis=1)
+        best[start:start + chunk] = ratios[np.arange(len(ratios)),
+                                           facet[start:start + chunk]]
+    with np.errstate(divide='ignore'):
+        scale = np.where(best > 0, 1/best, np.inf)
+    return scale, facet
+
+
+# Intersection of the vector from [0,0,0] to extf with the hull
+# (None if the vector never leaves the hull or the origin is outside it)
+def hull_intersection(hull, extf):
+    scale, _ = ray_cast(hull, extf)
+    if np.isinf(scale[0]):
+        return None
+    return scale[0]*np.asarray(extf, dtype=float)
@@ -2,10 +2,12 @@
 # -*- coding: utf-8 -*-
 from sympy import sin, cos, pi, Matrix, Symbol, symbols, simplify, pprint, lambdify, latex
 import numpy as np
-import scipy.spatial as sp_spatial
-import matplotlib.pyplot as plt
-import mpl_toolkits.mplot3d as a3
-import os
+from HullUtils import hull_faces, ray_cast  # in local directory
+from SpineLimitSurface import TWO_TILE_UNIT, place_units, grasp_capacity
+from RunFlags import run_headless  # in local directory
+
+# Run with --headless (or set TMM_HEADLESS=1) to skip all plotting
+headless = run_headless()
 
 save = True
 fig_name = 'Q23_intersection'
@@ -81,71 +83,39 @@ pprint(w4)
 
 
 # Q2.2
-# vertices of the limit surface of a single two-tile unit
-p_surface = np.array([
-    [40, 0, 0],
-    [0, 20, 0],
-    [-40, 0, 0],
-    [0, -20, 0],
-    [0, 0, -20]
-])
-
-# given that the load is equally distributed on each unit, the limit surface is
-# a scaled version of the one for a single unit
-# (also because they are all oriented in the same way)
-n_units = 4
-points = p_surface * n_units
+# vertices of the limit surface of a single two-tile unit (TWO_TILE_UNIT)
+p_surface = TWO_TILE_UNIT
+
+# the limit surface of the gripper is the Minkowski sum of the ones of the
+# units; as they are all oriented in the same way, this is a scaled version
+# of the one for a single unit (p_surface * n_units)
+poses = [(0.1, 0.2, 0, 0, 0, 0), (0.1, -0.2, 0, 0, 0, 0),
+         (-0.1, -0.2, 0, 0, 0, 0), (-0.1, 0.2, 0, 0, 0, 0)]
+units = place_units(p_surface, poses)
+points, _ = grasp_capacity(units, space='force')
 # here we can follow the same approach as in Vector-in-ConvexHull.py
-hull = sp_spatial.ConvexHull(points)
-indices = hull.simplices
-faces = points[indices]
-
-fig = plt.figure()
-ax = fig.add_subplot(111, projection='3d')
-ax.set_xlabel('x')
-ax.set_ylabel('y')
-ax.set_zlabel('z')
-
-
-for f in faces:
-    face = a3.art3d.Poly3DCollection([f])
-    face.set_edgecolor('k')
-    face.set_alpha(0.3)
-    ax.add_collection3d(face)
-
-# For those points in hull.simplices...
-for s in hull.simplices:
-    s = np.append(s, s[0])  # Cycle back to 1st coordinate
-    ax.scatter(points[s, 0], points[s, 1],
-               points[s, 2], marker='.', color='b')
+hull, faces = hull_faces(points)
 
 # Q2.3
 extf = np.array((7, 7, -5))
-dhull = sp_spatial.Delaunay(points)
-growvector = np.zeros(3)
-steps = 100
-i = 0
-while (dhull.find_simplex(growvector) >= 0):
-    print(i)
-    growvector = (i/steps)*extf
-    i += 1
-# print('vector hull intersection:', growvector)
+# exact scale factor at which the ray along extf leaves the hull
+scale, facet = ray_cast(hull, extf)
+growvector = scale[0]*extf
 
 print("\n----- Q2.3")
-print("limit for the external force")
+print("limit for the external force (%.4f times extf, facet %d)" % (scale[0], facet[0]))
 pprint(growvector)
 
-ax.scatter(growvector[0], growvector[1], growvector[2],
-           marker='o', color='r', s=25)
+if not headless:
+    import matplotlib.pyplot as plt
+    from HullPlots import plot_hull, save_figure
 
-# set the view and save
-ax.view_init(elev=5, azim=5)
-plt.show()
+    fig, ax = plot_hull(points, hull)
+    ax.scatter(growvector[0], growvector[1], growvector[2],
+               marker='o', color='r', s=25)
 
-if save:
-    save_path = os.path.join(
-        os.path.dirname(os.path.realpath(__file__)),
-        'figs',
-        fig_name+'.png'
-    )
-    fig.savefig(save_path, dpi=600)
+    # set the view and save
+    ax.view_init(elev=5, azim=5)
+    if save:
+        save_figure(fig, fig_name)
+    plt.show()
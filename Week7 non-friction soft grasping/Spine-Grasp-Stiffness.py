@@ -6,8 +6,13 @@ with spines grasping a block from above and from the right.
 22Nov2021 -Cutkosky
 """
 
+import numpy as np
 from sympy import sin, cos, pi, Matrix, Symbol, symbols, simplify, pprint, lambdify
 from sys import exit
+import os
+from SymbolicCache import cached_lambdify  # in local directory
+from SymbolicCodegen import write_numpy_module  # in local directory
+from SpineStiffness import SpineGrasp, displacement_grid, optimal_bias  # in local directory
 
 # poor man's debugging
 
@@ -93,6 +98,17 @@ pprint(df1)
 print('\ndf2:')
 pprint(df2)
 
+# df1, df2 as plain NumPy code (SpineDf1Kernel.py, SpineDf2Kernel.py),
+# to evaluate them for arrays of displacements without sympy
+for name, df in (('df1', df1), ('df2', df2)):
+    write_numpy_module(
+        os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                     'Spine%sKernel.py' % name.capitalize()),
+        name, df, (dbx, dbz, ksl, ksn), origin='Spine-Grasp-Stiffness.py',
+        doc='Change in force %s (3x1, local contact frame) of spine %s in\n'
+            'Spine-Grasp-Stiffness.py for a body displacement (dbx, dbz) and\n'
+            'spine stiffness ksl (tangential), ksn (normal).' % (name, name[-1]))
+
 
 """ 
 These force vectors now can be added to a bias force, if any, 
@@ -119,12 +135,47 @@ ksl_v, ksn_v = 500, 100
 dbx_v, dbz_v = -2e-3, -2e-3
 fbias_v = 1.1
 
+# f1, f2 as a NumPy function of the parameters (generated code cached
+# on disk, see SymbolicCache.py)
+spine_forces = cached_lambdify((ksl, ksn, dbx, dbz, fbias), [f1, f2])
+f1_v, f2_v = spine_forces(ksl_v, ksn_v, dbx_v, dbz_v, fbias_v)
+
 print("\n----- Q1.1 -----")
 print("\n--- f1: ")
-pprint(f1.subs([[ksn, ksn_v], [ksl, ksl_v], [
-       dbx, dbx_v], [dbz, dbz_v], [fbias, fbias_v]]))
-pprint(f1.subs([[ksn, ksn_v], [ksl, ksl_v], [
-       dbx, dbx_v], [dbz, dbz_v], [fbias, fbias_v]]))
+pprint(f1_v)
 print("\n--- f2: ")
-pprint(f2.subs([[ksn, ksn_v], [ksl, ksl_v], [
-       dbx, dbx_v], [dbz, dbz_v], [fbias, fbias_v]]))
+pprint(f2_v)
+
+"""
+The same forces evaluated numerically (see SpineStiffness.py), for
+whole grids of body displacements at once, and their margins against
+the limit surface of a spine (positive inside, negative if it fails).
+The block width only matters for rotational displacements.
+"""
+
+w_v = 0.1
+poses = [(0, 0, w_v/2, np.pi, 0, 0), (w_v/2, 0, 0, 0, -np.pi/2, 0)]
+grasp = SpineGrasp(poses, (ksl_v, ksl_v, ksn_v),
+                   fbias=(fbias_v, 0, fbias_v))
+
+dbody_v = np.array([dbx_v, 0, dbz_v, 0, 0, 0])
+print("\n--- numeric f1, f2: ")
+print(grasp.forces(dbody_v))
+print("margins:", grasp.margins(dbody_v))
+
+# displacement-tolerance map over dbx, dbz
+dbxs = np.linspace(-5e-3, 5e-3, 201)
+dbzs = np.linspace(-5e-3, 5e-3, 201)
+holds = ~grasp.fails(displacement_grid(dbx=dbxs, dbz=dbzs))[:, 0, :, 0, 0, 0]
+print("\nfraction of the (dbx, dbz) grid where the grasp holds: %.3f"
+      % holds.mean())
+
+# instead of picking fbias by hand, choose the internal force that
+# maximizes the worst margin for displacements up to 2mm in x and z
+ds = np.linspace(-2e-3, 2e-3, 21)
+disturbances = displacement_grid(dbx=ds, dbz=ds)
+fbias_opt, margin_opt = optimal_bias(grasp, disturbances)
+print("\nworst margin with fbias = %.2f: %.4f"
+      % (fbias_v, grasp.min_margin(disturbances).min()))
+print("optimal bias forces (worst margin %.4f):" % margin_opt)
+print(fbias_opt)
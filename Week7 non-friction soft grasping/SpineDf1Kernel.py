@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Generated by SymbolicCodegen.py from Spine-Grasp-Stiffness.py, do not edit.
+# Source hash: 581e588cee804fc904450c0976f308ba9238ab1483f1983a8eee926bf8e68fb5
+"""
+Change in force df1 (3x1, local contact frame) of spine 1 in
+Spine-Grasp-Stiffness.py for a body displacement (dbx, dbz) and
+spine stiffness ksl (tangential), ksn (normal).
+"""
+
+import numpy
+
+
+def df1(dbx, dbz, ksl, ksn):
+    shape = numpy.broadcast_shapes(numpy.shape(dbx), numpy.shape(dbz), numpy.shape(ksl), numpy.shape(ksn))
+    out = numpy.zeros(shape + (3, 1))
+    out[..., 0, 0] = dbx*ksl
+    out[..., 2, 0] = -dbz*ksn
+    return out
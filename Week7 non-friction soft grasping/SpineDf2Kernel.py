@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Generated by SymbolicCodegen.py from Spine-Grasp-Stiffness.py, do not edit.
+# Source hash: 66e0281dd66ac82fa8bf548ea0e08be4619d5bea7a9040a8235c66a850b6cdd5
+"""
+Change in force df2 (3x1, local contact frame) of spine 2 in
+Spine-Grasp-Stiffness.py for a body displacement (dbx, dbz) and
+spine stiffness ksl (tangential), ksn (normal).
+"""
+
+import numpy
+
+
+def df2(dbx, dbz, ksl, ksn):
+    shape = numpy.broadcast_shapes(numpy.shape(dbx), numpy.shape(dbz), numpy.shape(ksl), numpy.shape(ksn))
+    out = numpy.zeros(shape + (3, 1))
+    out[..., 0, 0] = dbz*ksl
+    out[..., 2, 0] = -dbx*ksn
+    return out
@@ -0,0 +1,103 @@
+'''
+Limit surfaces of grippers built from many spine (or dry-adhesive) units.
+
+Each unit has a limit-surface polytope, given by its vertices in the unit's
+local frame as forces [fx, fy, fz] (e.g. TWO_TILE_UNIT below, used in Q2.py).
+Units are placed on the gripper with the same [rx, ry, rz, thetax, thetay,
+thetaz] convention as Cartesmap() in WrenchUtils.py, so the transpose of
+Cartesmap maps unit forces to gripper wrenches.
+
+The capacity of the whole gripper is the Minkowski sum of the unit
+polytopes, either as forces (3D, summing forces only, as in Q2.py) or as
+full wrenches (6D, including the moments of the unit forces about the
+gripper origin). Sums are formed pairwise with broadcasting, and after
+every step only the vertices of the convex hull are kept, so the number of
+points stays small. Identical polytopes are summed by scaling: the
+Minkowski sum of n copies of a convex set P is n*P. In 6D the number of
+hull vertices grows quickly with the number of differently placed units,
+so the wrench space is meant for a handful of units (or groups of units).
+'''
+
+import numpy as np
+from scipy.spatial import ConvexHull, QhullError
+
+from WrenchUtils import Cartesmap
+from Instrumentation import instrument
+
+# Vertices of the limit surface of a single two-tile unit (Q2.py)
+TWO_TILE_UNIT = np.array([
+    [40, 0, 0],
+    [0, 20, 0],
+    [-40, 0, 0],
+    [0, -20, 0],
+    [0, 0, -20]
+])
+
+
+# One gripper unit: limit-surface vertices (V,3) in its local frame and
+# its pose [rx, ry, rz, thetax, thetay, thetaz] on the gripper
+class SpineUnit:
+    def __init__(self, vertices, pose=(0, 0, 0, 0, 0, 0)):
+        self.vertices = np.asarray(vertices, dtype=float)
+        self.pose = np.asarray(pose, dtype=float)
+
+    # Unit forces as gripper wrenches (V,6): rows of Cartesmap(pose).T [f; 0]
+    def wrench_vertices(self):
+        Jbtran = Cartesmap(*self.pose).T
+        return self.vertices @ Jbtran[:, :3].T
+
+    # Unit forces in gripper axes (V,3), without their moments
+    def force_vertices(self):
+        return self.wrench_vertices()[:, :3]
+
+
+# All pairwise sums of the rows of A (n1,d) and B (n2,d): row i*n2+j is
+# A[i] + B[j], as ConvexSum() in Week4 for column vectors
+def minkowski_sum(A, B):
+    return (A[:, None, :] + B[None, :, :]).reshape(-1, A.shape[1])
+
+
+# Keep only the vertices of the convex hull of the points. If the points
+# do not span the space (e.g. the first few units in 6D), only duplicate
+# rows are dropped.
+def prune(points, decimals=12):
+    try:
+        return points[ConvexHull(points).vertices]
+    except (QhullError, ValueError):
+        return np.unique(np.round(points, decimals), axis=0)
+
+
+# Vertices of the combined capacity of a list of SpineUnits.
+#   space: 'force' (3D, forces summed in gripper axes) or 'wrench' (6D)
+# Returns the vertices (V,d) and their ConvexHull (None if degenerate).
+@instrument('hull')
+def grasp_capacity(units, space='force'):
+    if space == 'force':
+        sets = [unit.force_vertices() for unit in units]
+    elif space == 'wrench':
+        sets = [unit.wrench_vertices() for unit in units]
+    else:
+        raise ValueError("space should be 'force' or 'wrench'")
+
+    # group identical polytopes and scale them instead of summing
+    groups = {}
+    for vertices in sets:
+        key = np.round(vertices, 9).tobytes()
+        count, _ = groups.get(key, (0, vertices))
+        groups[key] = (count + 1, vertices)
+
+    total = None
+    for count, vertices in groups.values():
+        scaled = prune(count*vertices)
+        total = scaled if total is None else prune(minkowski_sum(total, scaled))
+
+    try:
+        hull = ConvexHull(total)
+    except (QhullError, ValueError):
+        hull = None
+    return total, hull
+
+
+# Units at a list of poses, all with the same local limit surface
+def place_units(vertices, poses):
+    return [SpineUnit(vertices, pose) for pose in poses]
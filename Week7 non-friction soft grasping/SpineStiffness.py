@@ -0,0 +1,161 @@
+'''
+Numeric version of Spine-Grasp-Stiffness.py: contact forces of a spine
+grasp for whole batches or grids of 6-DOF body displacements, and their
+margins against the limit surfaces of the spines.
+
+For each contact, posed with Cartesmap() from WrenchUtils.py, the body
+twist maps to the fingertip motion H*Jb*dbody (H keeps the translations),
+and the force in local contact coordinates is
+    f = Kfp*H*Jb*dbody + fbias
+The matrices Kfp*H*Jb (3x6) are built once, so a batch of displacements
+takes a single einsum. Margins come from HullTest in HullUtils.py:
+positive inside the limit surface, negative when the spine fails.
+
+optimal_bias() picks the internal (bias) forces, in the null space of the
+grasp map, that maximize the worst margin over a set of disturbances.
+'''
+
+import numpy as np
+from scipy.linalg import null_space
+from scipy.optimize import linprog
+from scipy.sparse import block_diag, csr_matrix, hstack
+
+from WrenchUtils import Cartesmap
+from HullUtils import get_hull_test
+from Instrumentation import instrument
+
+# Vertices of the limit surface of a single spine in local contact
+# coordinates (the polyhedron of Q1 and Vector-in-ConvexHull.py)
+SPINE_LIMIT = np.array([[0, 0, 0], [0, -1, 0], [0, 1, 0], [-1, 1, 2],
+                        [-1, -1, 2], [-1, 0, 2], [3, -1, 2], [3, 1, 2],
+                        [3, -1, -0.75], [3, 1, -0.75], [3, 0, -0.25],
+                        [3, 0, 2]])
+
+
+# Grid of body displacements [dbx, dby, dbz, qbx, qby, qbz], one array
+# (or scalar) of values per component; returns shape (n1,...,n6,6) with
+# the grid axes in the same order. Components left out are zero.
+def displacement_grid(dbx=0, dby=0, dbz=0, qbx=0, qby=0, qbz=0):
+    axes = [np.atleast_1d(np.asarray(v, dtype=float))
+            for v in (dbx, dby, dbz, qbx, qby, qbz)]
+    return np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1)
+
+
+# Spine grasp with C contacts:
+#   poses: (C,6) rows [rx, ry, rz, thetax, thetay, thetaz] for Cartesmap
+#   stiffness: (C,3) diagonal [ksl, ksl, ksn] or full (C,3,3) Kfp
+#   limits: vertices (V,3) of the limit surface shared by all spines, or
+#           a list of C such arrays, in local contact coordinates
+#   fbias: (C,3) bias forces in local contact coordinates (default zero)
+class SpineGrasp:
+    def __init__(self, poses, stiffness, limits=SPINE_LIMIT, fbias=None):
+        poses = np.atleast_2d(np.asarray(poses, dtype=float))
+        ncontacts = len(poses)
+
+        stiffness = np.asarray(stiffness, dtype=float)
+        if stiffness.ndim == 1:
+            stiffness = np.tile(stiffness, (ncontacts, 1))
+        if stiffness.ndim == 2:
+            stiffness = stiffness[:, :, None]*np.eye(3)
+        if stiffness.shape != (ncontacts, 3, 3):
+            raise ValueError('stiffness should be (C,3) or (C,3,3)')
+
+        # H*Jb for every contact (C,3,6), then Kfp*H*Jb
+        self.HJb = np.array([Cartesmap(*pose)[:3] for pose in poses])
+        self.KHJb = stiffness @ self.HJb
+
+        if isinstance(limits, np.ndarray) and limits.ndim == 2:
+            limits = [limits]*ncontacts
+        if len(limits) != ncontacts:
+            raise ValueError('need one limit surface per contact')
+        self.tests = [get_hull_test(vertices) for vertices in limits]
+
+        self.fbias = np.zeros((ncontacts, 3)) if fbias is None \
+            else np.broadcast_to(np.asarray(fbias, dtype=float), (ncontacts, 3))
+
+    # Grasp map G (6,3C): body wrench of the local contact forces, with the
+    # columns of contact c given by the first 3 columns of Cartesmap().T
+    def grasp_map(self):
+        return np.hstack([HJb.T for HJb in self.HJb])
+
+    # Orthonormal basis (3C,k) of the internal forces, G*f = 0. Columns
+    # are stacked local contact forces [f1; f2; ...].
+    def internal_forces(self):
+        return null_space(self.grasp_map())
+
+    # Body displacements (...,6) under external wrenches (...,6), from the
+    # body stiffness Kb = sum(Jb.T*H.T*Kfp*H*Jb) (least squares if some
+    # directions are not restrained by the spines)
+    def displacements(self, wrenches):
+        Kb = np.einsum('cji,cjk->ik', self.HJb, self.KHJb)
+        wrenches = np.asarray(wrenches, dtype=float)
+        flat = wrenches.reshape(-1, 6)
+        return (flat @ np.linalg.pinv(Kb).T).reshape(wrenches.shape)
+
+    # Contact forces (...,C,3) in local coordinates for displacements (...,6)
+    def forces(self, dbody, fbias=None):
+        fbias = self.fbias if fbias is None else fbias
+        return np.einsum('cij,...j->...ci', self.KHJb, dbody) + fbias
+
+    # Margin of every contact force to its limit surface (...,C)
+    # Displacements are processed in blocks of chunk rows to bound memory.
+    @instrument('metric')
+    def margins(self, dbody, fbias=None, chunk=65536):
+        dbody = np.asarray(dbody, dtype=float)
+        shape = dbody.shape[:-1]
+        flat = dbody.reshape(-1, 6)
+        out = np.empty((len(flat), len(self.tests)))
+        for start in range(0, len(flat), chunk):
+            forces = self.forces(flat[start:start + chunk], fbias)
+            for c, test in enumerate(self.tests):
+                out[start:start + chunk, c] = test.margins(forces[:, c])
+        return out.reshape(shape + (len(self.tests),))
+
+    # Worst margin over the contacts (...,): the grasp holds where >= 0
+    def min_margin(self, dbody, fbias=None, chunk=65536):
+        return self.margins(dbody, fbias, chunk).min(axis=-1)
+
+    # Boolean (...,) map of displacements where some spine fails
+    def fails(self, dbody, fbias=None, tol=1e-12):
+        return self.min_margin(dbody, fbias) < -tol
+
+
+# Bias forces (C,3) in the null space of the grasp that maximize the worst
+# margin to the limit surfaces over the disturbances dbody (...,6), given
+# as body displacements (use SpineGrasp.displacements() for wrenches).
+# Each facet n.f + b <= 0 of each limit surface gives one constraint
+#     n.(df + fbias) + b <= -t
+# and only the worst disturbance matters for it, so the LP has one row
+# per facet whatever the number of disturbances:
+#     max t  s.t.  n.fbias + t <= -b - max_k n.df_k,   G*fbias = 0
+# with sparse (block diagonal) facet rows. fmax optionally bounds the
+# components of the bias forces.
+# Returns fbias (C,3) and the worst margin t (negative if the grasp fails
+# for some disturbance whatever the bias).
+@instrument('lp')
+def optimal_bias(grasp, dbody, fmax=None):
+    ncontacts = len(grasp.tests)
+    if grasp.internal_forces().shape[1] == 0:
+        raise ValueError('the grasp has no internal forces')
+
+    dforces = grasp.forces(np.asarray(dbody, dtype=float).reshape(-1, 6),
+                           fbias=0)
+    rows, rhs = [], []
+    for c, test in enumerate(grasp.tests):
+        worst = np.max(dforces[:, c] @ test.normals.T, axis=0)
+        rows.append(test.normals)
+        rhs.append(-test.offsets - worst)
+    facets = block_diag(rows, format='csr')
+    A_ub = hstack([facets, csr_matrix(np.ones((facets.shape[0], 1)))])
+    A_eq = hstack([csr_matrix(grasp.grasp_map()), csr_matrix((6, 1))])
+
+    bound = (None, None) if fmax is None else (-fmax, fmax)
+    cost = np.zeros(3*ncontacts + 1)
+    cost[-1] = -1  # maximize t
+    res = linprog(cost, A_ub=A_ub, b_ub=np.concatenate(rhs), A_eq=A_eq,
+                  b_eq=np.zeros(6),
+                  bounds=[bound]*(3*ncontacts) + [(None, None)],
+                  method='highs')
+    if res.status != 0:
+        raise Exception('bias LP failed: ' + res.message)
+    return res.x[:-1].reshape(ncontacts, 3), res.x[-1]
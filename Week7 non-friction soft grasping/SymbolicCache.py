@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+On-disk cache of sympy results, shared by the scripts of all weeks (this
+file is copied into each week folder, as WrenchUtils.py is, and all the
+copies use the same cache directory).
+
+Entries are content addressed: the key is a hash of what produced them
+(srepr() of the input expression, or the source of a derivation function
+and its arguments) and of the sympy version, so changing a derivation or
+upgrading sympy simply misses the cache. Results are pickled; lambdified
+functions are stored as their generated source and rebuilt with exec().
+
+Several processes can use the cache at once: files are written to a
+temporary name and renamed into place, and the least recently used
+entries are evicted (under a lock file) when the total size exceeds
+max_bytes.
+
+Environment variables:
+    TMM_SYMBOLIC_CACHE: cache directory (default ~/.cache/tmm_course/sympy)
+    TMM_NO_SYMBOLIC_CACHE: set to 1 to always recompute
+"""
+
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+
+import sympy
+from sympy import lambdify, simplify, srepr
+
+from RunFlags import env_flag
+
+try:
+    import fcntl
+except ImportError:  # Windows: eviction runs without the lock
+    fcntl = None
+
+DEFAULT_DIRECTORY = os.path.join('~', '.cache', 'tmm_course', 'sympy')
+
+
+class SymbolicCache:
+    def __init__(self, directory=None, max_bytes=256*2**20, enabled=True):
+        directory = directory or os.environ.get('TMM_SYMBOLIC_CACHE') \
+            or DEFAULT_DIRECTORY
+        self.directory = os.path.expanduser(directory)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        if enabled:
+            os.makedirs(self.directory, exist_ok=True)
+
+    # Hash of the parts (strings) that produced an entry
+    def key(self, *parts):
+        digest = hashlib.sha256(('sympy ' + sympy.__version__).encode())
+        for part in parts:
+            digest.update(b'\0' + part.encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pkl')
+
+    # Cached value for key, or compute() stored under key
+    def get(self, key, compute):
+        if not self.enabled:
+            return compute()
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as fp:
+                value = pickle.load(fp)
+            os.utime(path)  # mark as recently used
+            return value
+        except (OSError, EOFError, pickle.UnpicklingError):
+            pass
+        value = compute()
+        self._store(path, value)
+        return value
+
+    def _store(self, path, value):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                pickle.dump(value, fp, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)  # atomic: readers never see partial files
+        except BaseException:
+            os.remove(tmp)
+            raise
+        self.evict()
+
+    # Remove the least recently used entries until the total size is
+    # below max_bytes
+    def evict(self):
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.pkl'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:  # evicted by another process
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pkl'):
+                os.remove(entry.path)
+
+    # simplify(expr), keyed by the expression itself
+    def simplify(self, expr, **kwargs):
+        key = self.key('simplify', srepr(expr), repr(sorted(kwargs.items())))
+        return self.get(key, lambda: simplify(expr, **kwargs))
+
+    # derive(*args) for a derivation function returning sympy objects,
+    # keyed by its source code and arguments
+    def derive(self, derive, *args):
+        key = self.key('derive', inspect.getsource(derive),
+                       *(srepr(arg) for arg in args))
+        return self.get(key, lambda: derive(*args))
+
+    # lambdify(args, expr, modules) as a NumPy function; the generated
+    # source is cached, so expr is neither simplified nor printed again
+    def lambdify(self, args, expr, modules='numpy'):
+        key = self.key('lambdify', srepr(args), srepr(expr), repr(modules))
+        source = self.get(key, lambda: inspect.getsource(
+            lambdify(args, expr, modules)))
+        namespace = dict(lambdify((), 0, modules).__globals__)
+        exec(source, namespace)
+        return namespace['_lambdifygenerated']
+
+
+# Cache used by the module functions below
+_default = None
+
+
+def default_cache():
+    global _default
+    if _default is None:
+        _default = SymbolicCache(
+            enabled=not env_flag('TMM_NO_SYMBOLIC_CACHE'))
+    return _default
+
+
+def cached_simplify(expr, **kwargs):
+    return default_cache().simplify(expr, **kwargs)
+
+
+def cached_derivation(derive, *args):
+    return default_cache().derive(derive, *args)
+
+
+def cached_lambdify(args, expr, modules='numpy'):
+    return default_cache().lambdify(args, expr, modules)
@@ -1,8 +1,8 @@
 # -*- coding: utf-8 -*-
 import numpy as np
-from numpy.linalg.linalg import _solve_dispatcher
-from scipy.optimize import root_scalar, newton
 from pprint import pprint
+from ICSUtils import Sphere, Ellipsoid, Capsule, Superquadric, contact_points
+from ICSFilter import track_contact
 
 np.set_printoptions(precision=3)
 
@@ -12,49 +12,33 @@ filename = "Week8 manipulation with sensing/wrench-sequence.txt"
 wrenches = np.loadtxt(filename, delimiter="\t", encoding='bytes')
 
 # Following the formulation illustrated in the class, we can compute the position of the contact (given the sensed wrench)
-# Normalized forces
-f_v = wrenches[:, :3]/np.linalg.norm((wrenches[:, :3]), axis=1)[:, None]
-# Normalized torques
-tau_v = wrenches[:, 3:]/np.linalg.norm((wrenches[:, 3:]), axis=1)[:, None]
-# Normalized lever arm
-h_v = np.cross(f_v, tau_v, axis=1)
-# Norm of lever arm, h_norm = f_norm/tau_norm
-h_norm = np.linalg.norm((wrenches[:, 3:]), axis=1)[
-    :, None] / np.linalg.norm((wrenches[:, :3]), axis=1)[:, None]
-
-# sanity check, they should have all norm = ~1.0
-# pprint(np.linalg.norm(h_v, axis=1))
-
-# solve the equation r = h - alpha*f_v s.t. ||r||=R
+# The contact lies on the wrench axis r = h + t*f_v, where h = (f x tau)/||f||^2 is the lever arm
+# and f_v the normalized force, and it is the point where this line enters the fingertip
+# (the force must push into the surface, r.dot(f_v) <= 0).
+# See ICSUtils.py for the line-surface intersection with other fingertip shapes
+# (Ellipsoid, Capsule, Superquadric, GridSDF); all of them solve every sample at once.
 R = 1.0
+fingertip = Sphere(R)
+# fingertip = Ellipsoid((1.0, 1.0, 1.2))
+# fingertip = Capsule(radius=R, half_length=0.5)
+# fingertip = Superquadric((1.0, 1.0, 1.0), e1=0.5, e2=1.0)
 
+r_sol, alpha_sol = contact_points(wrenches, fingertip)
 
-# cast the problem as finding the roots of f(alpha) = r(alpha)**2 - R**2
-def r_alpha(alpha, i):
-    return h_v[i] * h_norm[i] - alpha * f_v[i]
-
-
-def f_root(alpha, i):
-    return r_alpha(alpha, i).dot(r_alpha(alpha, i)) - R**2
-
-
-# solve root-finding problem for each point
-alpha_sol = []
-r_sol = []
-for i in range(wrenches.shape[0]):
-    # start from both side (alpha less or greater than zero)
-    sol1 = newton(f_root, args=(i,), x0=-1)
-    sol2 = newton(f_root, args=(i,), x0=1)
-    # select the right solution using the value of the scalar product
-    r1 = r_alpha(sol1, i)
-    if r1.dot(f_v[i]) <= 0:
-        alpha_sol.append(sol1)
-        r_sol.append(r1)
-    else:
-        r2 = r_alpha(sol2, i)
-        alpha_sol.append(sol2)
-        r_sol.append(r2)
-
-r_sol = np.round(np.array(r_sol), decimals=4)
+r_sol = np.round(r_sol, decimals=4)
 # same result as from the generator, in the noiseless case
 pprint(r_sol)
+
+# With the noisy readings the independent solutions scatter around the true
+# trajectory. Track the contact over the whole sequence instead (ICSFilter.py):
+# a Kalman filter + smoother on the fingertip surface, rejecting low-force samples.
+noisyfile = "Week8 manipulation with sensing/noisywrench-sequence.txt"
+noisywrenches = np.loadtxt(noisyfile, delimiter="\t", encoding='bytes')
+r_raw, _ = contact_points(noisywrenches, fingertip)
+r_filt, r_cov, used = track_contact(noisywrenches, fingertip, sigma_w=0.06,
+                                    accel=0.01, fmin=0.1)
+print("\nnoisy, independent solutions:")
+pprint(np.round(r_raw, decimals=4))
+print("\nnoisy, smoothed (std. dev. from covariance in last column):")
+pprint(np.round(np.column_stack(
+    (r_filt, np.sqrt(np.trace(r_cov, axis1=1, axis2=2)))), decimals=4))
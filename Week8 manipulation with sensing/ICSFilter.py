@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Noise-robust Intrinsic Contact Sensing over wrench sequences.
+
+Solving each sample independently (ICS.py) passes all the sensor noise on
+to the contact location, and the error grows as 1/|f| for light contacts.
+Here the contact point is tracked with a constant-velocity Kalman filter
+followed by a Rauch-Tung-Striebel smoother:
+* measurements are the per-sample ICS solutions from ICSUtils.py, with a
+  covariance propagated from the wrench noise (larger for small forces);
+* samples with |f| below fmin, with no intersection, or failing a
+  Mahalanobis gate are rejected (prediction only);
+* after every update the position is projected back onto the fingertip
+  surface and the velocity onto its tangent plane, so the estimate stays
+  on the surface manifold.
+
+Inputs can be a single (T,6) sequence or a batch (B,T,6) of sequences;
+the B sequences are filtered together, one vectorized step per sample.
+"""
+
+import numpy as np
+from ICSUtils import contact_points
+from Instrumentation import instrument
+
+# chi-square 99.9% threshold for 3 degrees of freedom
+GATE_3DOF = 16.27
+
+
+# Per-sample contact points (...,3) and isotropic standard deviations (...)
+# of their position, for wrench noise sigma_w on each wrench component.
+# From r = (f x m)/|f|^2, a perturbation of the wrench moves the wrench
+# axis by about sigma_w*sqrt(1 + |r|^2)/|f|.
+def measure_contacts(wrenches, fingertip, sigma_w):
+    wrenches = np.asarray(wrenches, dtype=float)
+    flat = wrenches.reshape(-1, 6)
+    points, _ = contact_points(flat, fingertip)
+    fmag = np.linalg.norm(flat[:, :3], axis=1)
+    rmag = np.linalg.norm(points - fingertip.center, axis=1)
+    sigma_r = sigma_w*np.sqrt(1 + rmag**2)/fmag
+    return (points.reshape(wrenches.shape[:-1] + (3,)),
+            sigma_r.reshape(wrenches.shape[:-1]), fmag.reshape(wrenches.shape[:-1]))
+
+
+# Keep position on the surface and velocity in its tangent plane
+def _onto_surface(x, fingertip):
+    p = fingertip.project(x[:, :3])
+    n = fingertip.normals(p)
+    v = x[:, 3:] - np.einsum('ij,ij->i', x[:, 3:], n)[:, None]*n
+    return np.hstack((p, v))
+
+
+# Kalman filter + RTS smoother for the contact location.
+#   wrenches: (T,6) or (B,T,6) sensed wrenches
+#   fingertip: any fingertip from ICSUtils.py
+#   sigma_w: wrench noise standard deviation (same units as the wrench)
+#   accel: white-noise acceleration density of the contact motion
+#   dt: sample period
+#   fmin: samples with smaller force magnitude are treated as outliers
+#   gate: Mahalanobis threshold for the innovation (None to disable)
+#   smooth: run the backward RTS pass (False gives the causal filter)
+# Returns positions (...,T,3), position covariances (...,T,3,3) and a
+# boolean mask (...,T) of the samples that were used.
+@instrument('integration')
+def track_contact(wrenches, fingertip, sigma_w=0.05, accel=1.0, dt=1.0,
+                  fmin=0.1, gate=GATE_3DOF, smooth=True):
+    wrenches = np.asarray(wrenches, dtype=float)
+    single = wrenches.ndim == 2
+    if single:
+        wrenches = wrenches[None]
+    B, T, _ = wrenches.shape
+
+    z, sigma_r, fmag = measure_contacts(wrenches, fingertip, sigma_w)
+    usable = (fmag >= fmin) & np.all(np.isfinite(z), axis=-1)
+
+    I3, Z3 = np.eye(3), np.zeros((3, 3))
+    F = np.block([[I3, dt*I3], [Z3, I3]])
+    Q = accel*np.block([[dt**3/3*I3, dt**2/2*I3], [dt**2/2*I3, dt*I3]])
+    H = np.hstack((I3, Z3))
+
+    # Start from the first usable measurement of each sequence, or from
+    # the top of the fingertip if there is none
+    first = np.argmax(usable, axis=1)
+    x = np.zeros((B, 6))
+    x[:, :3] = z[np.arange(B), first]
+    x[~usable.any(axis=1), :3] = fingertip.center + [0, 0, fingertip.bound_radius]
+    x = _onto_surface(x, fingertip)
+    P = np.broadcast_to(np.diag([1.0]*3 + [10.0]*3), (B, 6, 6)).copy()
+
+    xp_all = np.zeros((B, T, 6))
+    Pp_all = np.zeros((B, T, 6, 6))
+    xf_all = np.zeros((B, T, 6))
+    Pf_all = np.zeros((B, T, 6, 6))
+    used = np.zeros((B, T), dtype=bool)
+
+    for k in range(T):
+        if k > 0:
+            x = x @ F.T
+            P = F @ P @ F.T + Q
+        xp_all[:, k], Pp_all[:, k] = x, P
+
+        nu = np.where(usable[:, k, None], z[:, k] - x[:, :3], 0)
+        S = P[:, :3, :3] + sigma_r[:, k, None, None]**2*I3
+        S[~usable[:, k]] = I3
+        Sinv = np.linalg.inv(S)
+        ok = usable[:, k].copy()
+        if gate is not None:
+            d2 = np.einsum('bi,bij,bj->b', nu, Sinv, nu)
+            ok &= d2 <= gate
+        Kg = P @ H.T @ Sinv
+        Kg[~ok] = 0
+        x = x + np.einsum('bij,bj->bi', Kg, nu)
+        P = P - Kg @ H @ P
+        x = _onto_surface(x, fingertip)
+        xf_all[:, k], Pf_all[:, k] = x, P
+        used[:, k] = ok
+
+    xs, Ps = xf_all.copy(), Pf_all.copy()
+    if smooth:
+        for k in range(T - 2, -1, -1):
+            C = Pf_all[:, k] @ F.T @ np.linalg.inv(Pp_all[:, k + 1])
+            xs[:, k] = xf_all[:, k] + np.einsum(
+                'bij,bj->bi', C, xs[:, k + 1] - xp_all[:, k + 1])
+            Ps[:, k] = Pf_all[:, k] + C @ (Ps[:, k + 1] - Pp_all[:, k + 1]) @ \
+                np.transpose(C, (0, 2, 1))
+            xs[:, k] = _onto_surface(xs[:, k], fingertip)
+
+    points, cov = xs[..., :3], Ps[..., :3, :3]
+    if single:
+        return points[0], cov[0], used[0]
+    return points, cov, used
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+"""
+Intrinsic Contact Sensing (ICS) for convex fingertips of general shape.
+
+A point contact transmits no moment, so a wrench [f, m] measured at the
+sensor origin constrains the contact to the wrench axis
+    r(t) = (f x m)/|f|^2 + t*f/|f|
+The contact is the point where this line enters the fingertip surface, i.e.
+the intersection where the force points into the finger (smallest t).
+With a sphere this reduces to the ||r||^2 = R^2 equation used in ICS.py.
+
+Every fingertip below works on batches: points and directions are (N,3)
+arrays and the results are (N,) or (N,3) arrays, with NaN where the wrench
+axis misses the surface. Shapes with a closed form (sphere, ellipsoid,
+capsule) solve the line-surface intersection directly; the others
+(superquadric, sampled signed distance) use vectorized bracketed search.
+"""
+
+import numpy as np
+from scipy.interpolate import RegularGridInterpolator
+
+from Instrumentation import instrument
+
+
+# Base class for convex fingertips that contain their own center.
+# Subclasses provide level(points) (< 0 inside, 0 on the surface, > 0
+# outside, increasing outward) and bound_radius, the radius of a sphere
+# about the center that encloses the whole fingertip. line_roots() is a
+# generic bracketed solver that subclasses with a closed form override.
+class ConvexFingertip:
+    def __init__(self, center=(0, 0, 0), iters=60):
+        self.center = np.asarray(center, dtype=float)
+        self.iters = iters  # bisection/golden steps for the generic solver
+
+    def level(self, points):
+        raise NotImplementedError
+
+    # Entry and exit parameters t_in <= t_out of the lines p0 + t*d,
+    # with d of unit length. Rows that miss the fingertip get NaN.
+    # Along a line the level function of a convex shape is unimodal, so we
+    # golden-section search for its minimum inside the bounding sphere: if
+    # that is negative the line crosses the surface, and the two crossings
+    # are bracketed on either side of the minimum and found by bisection.
+    def line_roots(self, p0, d):
+        p0, d = np.atleast_2d(p0), np.atleast_2d(d)
+        tc = -np.einsum('ij,ij->i', p0 - self.center, d)
+        lo = tc - self.bound_radius
+        hi = tc + self.bound_radius
+
+        def g(t):
+            return self.level(p0 + t[:, None]*d)
+
+        invphi = (np.sqrt(5) - 1)/2
+        a, b = lo.copy(), hi.copy()
+        c, e = b - invphi*(b - a), a + invphi*(b - a)
+        gc, ge = g(c), g(e)
+        for _ in range(self.iters):
+            left = gc < ge
+            b = np.where(left, e, b)
+            a = np.where(left, a, c)
+            c_new = np.where(left, b - invphi*(b - a), e)
+            e_new = np.where(left, c, a + invphi*(b - a))
+            # only one new level evaluation is needed per step
+            t_new = np.where(left, c_new, e_new)
+            g_new = g(t_new)
+            gc, ge = np.where(left, g_new, ge), np.where(left, gc, g_new)
+            c, e = c_new, e_new
+        tmin = (a + b)/2
+        hit = g(tmin) < 0
+
+        t_in = self._bisect(g, lo, tmin)
+        t_out = self._bisect(g, hi, tmin)
+        t_in[~hit], t_out[~hit] = np.nan, np.nan
+        return t_in, t_out
+
+    # Vectorized bisection between t_outside (level > 0) and t_inside
+    def _bisect(self, g, t_outside, t_inside):
+        a, b = t_outside.copy(), t_inside.copy()
+        for _ in range(self.iters):
+            mid = (a + b)/2
+            inside = g(mid) < 0
+            b = np.where(inside, mid, b)
+            a = np.where(inside, a, mid)
+        return (a + b)/2
+
+    # Points where the lines p0 + t*d enter the fingertip
+    def intersect(self, p0, d):
+        t_in, _ = self.line_roots(p0, d)
+        return np.atleast_2d(p0) + t_in[:, None]*np.atleast_2d(d), t_in
+
+    # Radial projection of points onto the surface, along rays from center
+    def project(self, points):
+        points = np.atleast_2d(points)
+        rel = points - self.center
+        d = rel/np.linalg.norm(rel, axis=1)[:, None]
+        centers = np.broadcast_to(self.center, points.shape)
+        _, t_out = self.line_roots(centers, d)
+        return centers + t_out[:, None]*d
+
+    # Outward unit normals, by central differences of the level function
+    def normals(self, points, h=1e-6):
+        points = np.atleast_2d(points)
+        grad = np.zeros_like(points, dtype=float)
+        for k in range(3):
+            dp = np.zeros(3)
+            dp[k] = h
+            grad[:, k] = self.level(points + dp) - self.level(points - dp)
+        return grad/np.linalg.norm(grad, axis=1)[:, None]
+
+
+# Roots of a*t^2 + b*t + c = 0 for arrays of coefficients, NaN if none
+def _quadratic_roots(a, b, c):
+    disc = b**2 - 4*a*c
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sq = np.sqrt(disc)
+        t1 = (-b - sq)/(2*a)
+        t2 = (-b + sq)/(2*a)
+    miss = ~(disc >= 0)
+    t1[miss], t2[miss] = np.nan, np.nan
+    return np.minimum(t1, t2), np.maximum(t1, t2)
+
+
+class Sphere(ConvexFingertip):
+    def __init__(self, R=1.0, center=(0, 0, 0)):
+        super().__init__(center)
+        self.R = R
+        self.bound_radius = R
+
+    def level(self, points):
+        return np.linalg.norm(points - self.center, axis=-1) - self.R
+
+    # ||q + t*d||^2 = R^2 with |d| = 1
+    def line_roots(self, p0, d):
+        q = np.atleast_2d(p0) - self.center
+        d = np.atleast_2d(d)
+        b = 2*np.einsum('ij,ij->i', q, d)
+        c = np.einsum('ij,ij->i', q, q) - self.R**2
+        return _quadratic_roots(np.ones_like(b), b, c)
+
+    def normals(self, points):
+        rel = np.atleast_2d(points) - self.center
+        return rel/np.linalg.norm(rel, axis=1)[:, None]
+
+
+# Axis-aligned ellipsoid (x/a)^2 + (y/b)^2 + (z/c)^2 = 1 about center
+class Ellipsoid(ConvexFingertip):
+    def __init__(self, axes=(1.0, 1.0, 1.0), center=(0, 0, 0)):
+        super().__init__(center)
+        self.axes = np.asarray(axes, dtype=float)
+        self.bound_radius = np.max(self.axes)
+
+    def level(self, points):
+        return np.linalg.norm((points - self.center)/self.axes, axis=-1) - 1
+
+    # Scaling by the axes turns the ellipsoid into a unit sphere
+    def line_roots(self, p0, d):
+        q = (np.atleast_2d(p0) - self.center)/self.axes
+        ds = np.atleast_2d(d)/self.axes
+        a = np.einsum('ij,ij->i', ds, ds)
+        b = 2*np.einsum('ij,ij->i', q, ds)
+        c = np.einsum('ij,ij->i', q, q) - 1
+        return _quadratic_roots(a, b, c)
+
+    def normals(self, points):
+        grad = (np.atleast_2d(points) - self.center)/self.axes**2
+        return grad/np.linalg.norm(grad, axis=1)[:, None]
+
+
+# Capsule: cylinder of given radius along local Z for |z| <= half_length,
+# capped by hemispheres at z = +-half_length
+class Capsule(ConvexFingertip):
+    def __init__(self, radius=1.0, half_length=1.0, center=(0, 0, 0)):
+        super().__init__(center)
+        self.radius = radius
+        self.half_length = half_length
+        self.bound_radius = radius + half_length
+
+    def level(self, points):
+        rel = points - self.center
+        zc = np.clip(rel[..., 2], -self.half_length, self.half_length)
+        axial = np.stack((rel[..., 0], rel[..., 1], rel[..., 2] - zc), axis=-1)
+        return np.linalg.norm(axial, axis=-1) - self.radius
+
+    # The surface is made of three pieces; each line crosses the convex
+    # capsule at most twice, so entry/exit are the extreme valid roots.
+    def line_roots(self, p0, d):
+        q = np.atleast_2d(p0) - self.center
+        d = np.atleast_2d(d)
+        L = self.half_length
+        candidates = []
+
+        # cylinder x^2 + y^2 = R^2, valid where |z| <= L
+        a = d[:, 0]**2 + d[:, 1]**2
+        b = 2*(q[:, 0]*d[:, 0] + q[:, 1]*d[:, 1])
+        c = q[:, 0]**2 + q[:, 1]**2 - self.radius**2
+        for t in _quadratic_roots(a, b, c):
+            z = q[:, 2] + t*d[:, 2]
+            candidates.append(np.where(np.abs(z) <= L, t, np.nan))
+
+        # end caps, valid beyond the ends of the cylinder
+        for side in (1, -1):
+            qc = q - np.array([0, 0, side*L])
+            b = 2*np.einsum('ij,ij->i', qc, d)
+            c = np.einsum('ij,ij->i', qc, qc) - self.radius**2
+            for t in _quadratic_roots(np.ones_like(b), b, c):
+                z = q[:, 2] + t*d[:, 2]
+                candidates.append(np.where(side*z >= L, t, np.nan))
+
+        candidates = np.array(candidates)
+        miss = np.all(np.isnan(candidates), axis=0)
+        candidates[:, miss] = 0  # avoid all-NaN warnings, reset below
+        t_in = np.nanmin(candidates, axis=0)
+        t_out = np.nanmax(candidates, axis=0)
+        t_in[miss], t_out[miss] = np.nan, np.nan
+        return t_in, t_out
+
+
+# Superquadric with semi-axes (a,b,c) and shape exponents e1 (north-south)
+# and e2 (east-west); convex for 0 < e1, e2 <= 2. The usual inside-outside
+# function F is raised to e1/2 so the level behaves like a norm.
+class Superquadric(ConvexFingertip):
+    def __init__(self, axes=(1.0, 1.0, 1.0), e1=1.0, e2=1.0,
+                 center=(0, 0, 0), iters=60):
+        super().__init__(center, iters)
+        self.axes = np.asarray(axes, dtype=float)
+        self.e1, self.e2 = e1, e2
+        self.bound_radius = np.linalg.norm(self.axes)
+
+    def level(self, points):
+        x, y, z = np.moveaxis(np.abs(points - self.center)/self.axes, -1, 0)
+        e1, e2 = self.e1, self.e2
+        F = (x**(2/e2) + y**(2/e2))**(e2/e1) + z**(2/e1)
+        return F**(e1/2) - 1
+
+
+# Signed distance function sampled on a regular grid (values[i,j,k] at
+# origin + spacing*[i,j,k]), trilinearly interpolated. Outside the grid
+# the distance to the grid box is added, so the level keeps growing.
+class GridSDF(ConvexFingertip):
+    def __init__(self, values, origin=(0, 0, 0), spacing=1.0, center=None,
+                 iters=60):
+        values = np.asarray(values, dtype=float)
+        origin = np.asarray(origin, dtype=float)
+        spacing = np.broadcast_to(np.asarray(spacing, dtype=float), (3,))
+        axes = [origin[k] + spacing[k]*np.arange(values.shape[k])
+                for k in range(3)]
+        self.lower = np.array([ax[0] for ax in axes])
+        self.upper = np.array([ax[-1] for ax in axes])
+        if center is None:
+            center = (self.lower + self.upper)/2
+        super().__init__(center, iters)
+        self.interp = RegularGridInterpolator(axes, values)
+        self.bound_radius = np.max(np.linalg.norm(
+            np.stack((self.lower, self.upper)) - self.center, axis=1))
+
+    def level(self, points):
+        points = np.asarray(points, dtype=float)
+        clamped = np.clip(points, self.lower, self.upper)
+        outside = np.linalg.norm(points - clamped, axis=-1)
+        return self.interp(clamped) + outside
+
+
+# Wrench axis for an (N,6) array of wrenches [fx,fy,fz,mx,my,mz]:
+# returns the point closest to the sensor origin, the unit force
+# direction and the force magnitude.
+def wrench_axis(wrenches):
+    wrenches = np.atleast_2d(wrenches)
+    f, m = wrenches[:, :3], wrenches[:, 3:]
+    fmag = np.linalg.norm(f, axis=1)
+    p0 = np.cross(f, m)/(fmag**2)[:, None]
+    return p0, f/fmag[:, None], fmag
+
+
+# Contact locations (N,3) for a batch of wrenches on the given fingertip.
+# Also returns the parameter t along the wrench axis (NaN if no contact).
+@instrument('roots')
+def contact_points(wrenches, fingertip):
+    p0, d, _ = wrench_axis(wrenches)
+    return fingertip.intersect(p0, d)
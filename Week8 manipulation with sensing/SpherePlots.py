@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+"""
+Optional plotting layer for the Week8 generator. Only imported when the
+script is not run with --headless.
+"""
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+
+# Unit radius hemisphere. Returns the figure and its 3D axes.
+def plot_hemisphere():
+    # Setup figure
+    fig = plt.figure(figsize=plt.figaspect(.75))  # Square figure
+    ax = fig.add_subplot(111, projection='3d')
+
+    # Draw a unit sphere using numpy.mgrid() and surface plot
+    u, v = np.mgrid[0:2*np.pi:20j, 0:np.pi/2:10j]
+    x = np.cos(u)*np.sin(v)
+    y = np.sin(u)*np.sin(v)
+    z = np.cos(v)
+    ax.plot_surface(x, y, z, color="r", alpha=.5)
+
+    # Make axis labels
+    for i in ["x", "y", "z"]:
+        getattr(ax, "set_{:s}label".format(i))(i)
+    ax.set_ylim(1, -1)
+    return fig, ax
+
+
+# Contact forces on the sphere as arrows; each row of plotvec has the
+# point on the sphere [X,Y,Z] and the force components [U,V,W]
+def plot_contact_forces(ax, plotvec):
+    X, Y, Z, U, V, W = zip(*plotvec)
+    ax.quiver(X, Y, Z, U, V, W, pivot='tip', length=.2, color='y')
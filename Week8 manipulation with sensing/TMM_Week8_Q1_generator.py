@@ -15,7 +15,12 @@ Started 29Feb 2020 - Cutkosky
 from pprint import pprint
 import numpy as np
 from WrenchUtils import Rotx, Roty, Rotz, Rcross  # from week2
-import matplotlib.pyplot as plt
+from WrenchSequences import contact_wrenches, save_sequence
+from WrenchSequences import rphitheta2xyz as rphitheta2xyz_batch
+from RunFlags import run_headless  # in local directory
+
+# Run with --headless (or set TMM_HEADLESS=1) to skip all plotting
+headless = run_headless()
 
 np.set_printoptions(precision=3)
 
@@ -73,25 +78,6 @@ def CartesmapZYX(rx, ry, rz, thetaz, thetay, thetax):
     return Jb
 
 
-"""
-Define and plot the unit radius sphere
-"""
-# Setup figure
-fig = plt.figure(figsize=plt.figaspect(.75))  # Square figure
-ax = fig.add_subplot(111, projection='3d')
-
-# Draw a unit sphere using numpy.mgrid() and surface plot
-u, v = np.mgrid[0:2*np.pi:20j, 0:np.pi/2:10j]
-x = np.cos(u)*np.sin(v)
-y = np.sin(u)*np.sin(v)
-z = np.cos(v)
-ax.plot_surface(x, y, z, color="r", alpha=.5)
-
-# Make axis labels
-for i in ["x", "y", "z"]:
-    eval("ax.set_{:s}label('{:s}')".format(i, i))
-ax.set_ylim(1, -1)
-
 """
 Some tests to make sure utilities are working corectly
 """
@@ -122,31 +108,25 @@ Write the results to two text files.
 """
 thetas = np.arange(0, (np.pi/2), np.pi/20)
 phis = np.arange(0, ((np.pi/2)+np.pi/20), np.pi/20)
-wrenches = np.zeros((thetas.size, 6))
 r = 1.0
-scoords = np.zeros(3)
-xyz = np.zeros(3)
-plotvec = np.zeros((thetas.size, 6))
 
 """
 For a force trajectory we take a contact force (assumed constant
 in local [x,y,z] coordinates in this example) and map it to
 the corresponding series of wrenches at the center of the sphere
 while traversing a sequence of angles (phi,theta).
+This is Jbtotal.T @ fcontact with Jbtotal = Jb2 @ Jb1,
+Jb1 = CartesmapZYX(0, 0, 0, phis[i], thetas[i], 0) and
+Jb2 = CartesmapZYX(0, 0, r, 0, 0, 0), done for all samples at once
+(see WrenchSequences.py, which also makes longer sliding, rolling
+and random-walk sequences).
 plotvec puts each angled fcontact in world coordinates for potting
 """
 fcontact = np.array([-0.5, 0.5, -1, 0, 0, 0])
-for i in range(thetas.size):  # need phis[] to have same size as thetas[]
-    scoords[0], scoords[1], scoords[2] = r, thetas[i], phis[i]
-    xyz = rphitheta2xyz(scoords)
-    Jb1 = CartesmapZYX(0, 0, 0, phis[i], thetas[i], 0)
-    Jb2 = CartesmapZYX(0, 0, r, 0, 0, 0)
-    # ideally i'd rewrite CartesmapZYX to do rotation, then translation -mrc
-    Jbtotal = Jb2 @ Jb1
-    Jbtran = Jbtotal.transpose()
-    wrenches[i] = Jbtran @ fcontact
-    plotvec[i] = np.array(
-        [xyz[0], xyz[1], xyz[2], wrenches[i, 0], wrenches[i, 1], wrenches[i, 2]])
+phis = phis[:thetas.size]  # need phis[] to have same size as thetas[]
+wrenches, fworld = contact_wrenches(phis, thetas, fcontact, r)
+xyz = rphitheta2xyz_batch(np.column_stack((np.full(thetas.size, r), phis, thetas)))
+plotvec = np.hstack((xyz, wrenches[:, :3]))
 
 pprint(plotvec[:, :3])
 # Make a new version with 5% normally distributed noise
@@ -156,13 +136,18 @@ noise = np.random.normal(0, noiselevel, wrenches.shape)
 noisywrenches = wrenches + noise
 
 
-# Plot the sequence of contact forces on the sphere as arrows
-# unzip: [X,Y,Z] has point on sphere; [U,V,W] has force components
-X, Y, Z, U, V, W = zip(*plotvec)
-ax.quiver(X, Y, Z, U, V, W, pivot='tip', length=.2, color='y')
+"""
+Plot the unit radius sphere and the sequence of contact forces on it
+as arrows (see SpherePlots.py). Save the figure before showing it.
+"""
+if not headless:
+    import matplotlib.pyplot as plt
+    from SpherePlots import plot_hemisphere, plot_contact_forces
 
-plt.show()
-plt.savefig("Week8 manipulation with sensing/intrinsic-input.png", dpi=600)
+    fig, ax = plot_hemisphere()
+    plot_contact_forces(ax, plotvec)
+    fig.savefig("Week8 manipulation with sensing/intrinsic-input.png", dpi=600)
+    plt.show()
 
 
 """
@@ -176,6 +161,16 @@ headerstring = "Wrenches [fy,fz,mx,my,mz] + noise for trajectory of contact forc
 np.savetxt('Week8 manipulation with sensing/noisywrench-sequence.txt', noisywrenches,
            header=headerstring, delimiter='\t', newline='\n', fmt='%5.3f')
 
+"""
+The text files above are rounded to 3 decimals. Save the same data at full
+precision as .npy arrays (which can be memory-mapped) plus a .json of metadata.
+"""
+save_sequence('Week8 manipulation with sensing/wrench-sequence',
+              {'wrenches': wrenches, 'noisy': noisywrenches, 'contacts': xyz,
+               'forces': fworld, 'angles': np.column_stack((phis, thetas))},
+              {'path': 'sliding', 'radius': r, 'fcontact': fcontact.tolist(),
+               'noise': 'gaussian', 'noise_level': noiselevel, 'seed': 123})
+
 """
 The saved files are the result of running the 'forward' calculation. But we need to solve the
 inverse problem: given a series of wrenches (e.g. as in the files above) deduce what
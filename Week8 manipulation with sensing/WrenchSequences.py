@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Vectorized generation of synthetic wrench sequences for a contact moving
+on a hemispherical fingertip, following TMM_Week8_Q1_generator.py but
+without per-sample loops, so that millions of labeled samples can be made
+for testing contact estimators (ICSUtils.py, ICSFilter.py).
+
+Spherical coordinates follow the ISO convention used in the generator:
+theta = polar angle (down from Z), phi = azimuth (anticlockwise from X).
+A contact at (phi, theta) has its local frame rotated by Rz(phi)*Ry(theta)
+so that local Z is the outward normal, as in CartesmapZYX().
+
+Results are written at full precision to .npy files (one per array, so
+they can be memory-mapped) with a .json file of metadata alongside.
+"""
+
+import json
+import numpy as np
+
+
+# Convert from Cartesian to spherical coordinates, (...,3) arrays
+# [x,y,z] to [r,phi,theta] where phi=azimuth measured from X,
+# theta=inclination measured down from Z (radians)
+def xyz2rphitheta(points):
+    points = np.asarray(points, dtype=float)
+    x, y, z = points[..., 0], points[..., 1], points[..., 2]
+    r = np.sqrt(x**2 + y**2 + z**2)
+    theta = np.arctan2(np.sqrt(x**2 + y**2), z)
+    phi = np.arctan2(y, x)
+    return np.stack((r, phi, theta), axis=-1)
+
+
+# Convert from spherical to Cartesian coordinates, (...,3) arrays
+# [r,phi,theta] to [x,y,z]
+def rphitheta2xyz(spherecoords):
+    spherecoords = np.asarray(spherecoords, dtype=float)
+    r, phi, theta = spherecoords[..., 0], spherecoords[..., 1], spherecoords[..., 2]
+    return np.stack((r*np.sin(theta)*np.cos(phi),
+                     r*np.sin(theta)*np.sin(phi),
+                     r*np.cos(theta)), axis=-1)
+
+
+# (N,3,3) rotations Amat = Rz(thetaz)*Ry(thetay)*Rx(thetax), the batched
+# counterpart of the rotation block in CartesmapZYX()
+def RotZYX(thetaz, thetay, thetax=0.0):
+    thetaz, thetay, thetax = np.broadcast_arrays(
+        np.asarray(thetaz, dtype=float), np.asarray(thetay, dtype=float),
+        np.asarray(thetax, dtype=float))
+    cz, sz = np.cos(thetaz), np.sin(thetaz)
+    cy, sy = np.cos(thetay), np.sin(thetay)
+    cx, sx = np.cos(thetax), np.sin(thetax)
+    return np.stack((
+        np.stack((cz*cy, cz*sy*sx - sz*cx, cz*sy*cx + sz*sx), axis=-1),
+        np.stack((sz*cy, sz*sy*sx + cz*cx, sz*sy*cx - cz*sx), axis=-1),
+        np.stack((-sy, cy*sx, cy*cx), axis=-1)), axis=-2)
+
+
+# Wrenches at the center of the sphere for contacts at (phis, thetas) on
+# radius r, with fcontact given in the local contact frame, either one
+# (6,) wrench for all samples or an (N,6) array.
+# Same as (Jb2 @ Jb1).T @ fcontact in the generator with
+# Jb1 = CartesmapZYX(0,0,0,phi,theta,0), Jb2 = CartesmapZYX(0,0,r,0,0,0),
+# i.e. [A f; A (r*z x f + m)].
+# Also returns the world contact forces A f as labels.
+def contact_wrenches(phis, thetas, fcontact, r=1.0):
+    A = RotZYX(phis, thetas)
+    fcontact = np.broadcast_to(np.asarray(fcontact, dtype=float),
+                               A.shape[:-2] + (6,))
+    f, m = fcontact[..., :3], fcontact[..., 3:]
+    lever = np.cross(np.array([0, 0, r]), f) + m
+    fworld = np.einsum('nij,nj->ni', A, f)
+    wrenches = np.concatenate((fworld, np.einsum('nij,nj->ni', A, lever)), axis=-1)
+    return wrenches, fworld
+
+
+"""
+Contact trajectories over the hemisphere. Each returns arrays
+(phis, thetas) of length n.
+"""
+
+
+# Straight path in (phi, theta), as in the generator: sliding with friction
+def sliding_path(n, phi_range=(0, np.pi/2), theta_range=(0, np.pi/2)):
+    return np.linspace(*phi_range, n), np.linspace(*theta_range, n)
+
+
+# Rolling over a great circle through the pole, in the vertical plane at
+# azimuth phi0: theta goes from -arc to arc (negative theta is the far side)
+def rolling_path(n, phi0=0.0, arc=np.pi/3):
+    s = np.linspace(-arc, arc, n)
+    return np.where(s < 0, phi0 + np.pi, phi0), np.abs(s)
+
+
+# Random walk on the hemisphere with Gaussian steps of size step (radians),
+# taken in the azimuthal-equidistant chart about the pole so that it is a
+# single cumulative sum: the distance from the pole is theta and the polar
+# angle is phi (steps along a parallel are stretched by theta/sin(theta),
+# at most pi/2 at the equator). Walks crossing the equator are reflected.
+# The first sample is start, followed by n-1 steps.
+def random_walk_path(n, step=0.02, start=(0.0, 0.0), rng=None):
+    rng = np.random.default_rng() if rng is None else rng
+    phi0, theta0 = start
+    steps = rng.normal(0, step, (n, 2))
+    steps[0] = 0
+    uv = np.array([theta0*np.cos(phi0), theta0*np.sin(phi0)]) + \
+        np.cumsum(steps, axis=0)
+    rho = np.hypot(uv[:, 0], uv[:, 1])
+    thetas = np.pi/2 - np.abs(np.pi/2 - np.mod(rho, np.pi))
+    return np.arctan2(uv[:, 1], uv[:, 0]), thetas
+
+
+# Add sensor noise to an (N,6) array of wrenches. level is the standard
+# deviation (or half-width for 'uniform') in wrench units.
+#   'gaussian': independent normal noise, as in the generator
+#   'uniform': independent uniform noise in [-level, level]
+#   'student': heavy-tailed Student-t noise with dof degrees of freedom
+#   'drift': gaussian noise plus a slowly wandering sensor offset
+#            (a random walk along axis 0, restarted on every call)
+# rng may be a np.random.Generator or a legacy RandomState.
+def add_noise(wrenches, model='gaussian', level=0.05, rng=None, dof=3,
+              drift=0.001):
+    rng = np.random.default_rng() if rng is None else rng
+    shape = np.shape(wrenches)
+    if model == 'gaussian':
+        noise = rng.normal(0, level, shape)
+    elif model == 'uniform':
+        noise = rng.uniform(-level, level, shape)
+    elif model == 'student':
+        noise = level*rng.standard_t(dof, shape)
+    elif model == 'drift':
+        noise = rng.normal(0, level, shape) + \
+            np.cumsum(rng.normal(0, drift, shape), axis=0)
+    else:
+        raise ValueError('unknown noise model: ' + str(model))
+    return wrenches + noise
+
+
+PATHS = {'sliding': sliding_path, 'rolling': rolling_path,
+         'random_walk': random_walk_path}
+
+
+# Generate a labeled sequence of n samples and write it to
+# basename_<array>.npy + basename.json. The arrays are:
+#   wrenches (n,6), noisy (n,6), contacts (n,3) world contact points,
+#   forces (n,3) world contact forces, angles (n,2) [phi, theta]
+# The default noise level is 5% of the contact force norm, per sample if
+# fcontact is (n,6).
+# Arrays are filled chunk by chunk into memory-mapped files so that
+# very long sequences never need to fit in memory at once.
+def generate_sequence(basename, n, path='sliding', fcontact=(-0.5, 0.5, -1, 0, 0, 0),
+                      r=1.0, noise='gaussian', level=None, seed=None,
+                      chunk=1000000, path_args=None, noise_args=None):
+    rng = np.random.default_rng(seed)
+    path_args = {} if path_args is None else dict(path_args)
+    noise_args = {} if noise_args is None else dict(noise_args)
+    fcontact = np.asarray(fcontact, dtype=float)
+    if level is None:  # 5% of the contact force, as in the generator
+        level = 0.05*np.linalg.norm(fcontact, axis=-1)
+    if path == 'random_walk':
+        phis, thetas = random_walk_path(n, rng=rng, **path_args)
+    else:
+        phis, thetas = PATHS[path](n, **path_args)
+
+    shapes = {'wrenches': 6, 'noisy': 6, 'contacts': 3, 'forces': 3, 'angles': 2}
+    out = {name: np.lib.format.open_memmap(
+        '%s_%s.npy' % (basename, name), mode='w+', dtype=np.float64,
+        shape=(n, cols)) for name, cols in shapes.items()}
+
+    for start in range(0, n, chunk):
+        sl = slice(start, min(start + chunk, n))
+        fc = fcontact if fcontact.ndim == 1 else fcontact[sl]
+        lv = level if np.ndim(level) == 0 else np.asarray(level)[sl, None]
+        wrenches, forces = contact_wrenches(phis[sl], thetas[sl], fc, r)
+        out['wrenches'][sl] = wrenches
+        out['noisy'][sl] = add_noise(wrenches, noise, lv, rng, **noise_args)
+        out['forces'][sl] = forces
+        out['contacts'][sl] = rphitheta2xyz(
+            np.stack((np.full(sl.stop - sl.start, r), phis[sl], thetas[sl]), axis=-1))
+        out['angles'][sl] = np.stack((phis[sl], thetas[sl]), axis=-1)
+    for arr in out.values():
+        arr.flush()
+
+    metadata = {
+        'n': n, 'path': path, 'path_args': path_args, 'radius': r,
+        'fcontact': fcontact.tolist() if fcontact.ndim == 1 else 'per-sample',
+        'noise': noise, 'noise_args': noise_args,
+        'noise_level': float(level) if np.ndim(level) == 0 else 'per-sample',
+        'seed': seed, 'arrays': {name: [n, cols] for name, cols in shapes.items()},
+        'columns': {'wrenches': ['fx', 'fy', 'fz', 'mx', 'my', 'mz'],
+                    'contacts': ['x', 'y', 'z'], 'forces': ['fx', 'fy', 'fz'],
+                    'angles': ['phi', 'theta']},
+    }
+    with open(basename + '.json', 'w') as fp:
+        json.dump(metadata, fp, indent=2)
+    return out, metadata
+
+
+# Save arrays already in memory (dict name -> array) in the same layout
+def save_sequence(basename, arrays, metadata=None):
+    metadata = {} if metadata is None else dict(metadata)
+    metadata['arrays'] = {name: list(np.shape(a)) for name, a in arrays.items()}
+    for name, a in arrays.items():
+        np.save('%s_%s.npy' % (basename, name), np.asarray(a))
+    with open(basename + '.json', 'w') as fp:
+        json.dump(metadata, fp, indent=2)
+
+
+# Load a saved sequence; with mmap=True the arrays are memory-mapped
+def load_sequence(basename, mmap=True):
+    with open(basename + '.json') as fp:
+        metadata = json.load(fp)
+    mode = 'r' if mmap else None
+    arrays = {name: np.load('%s_%s.npy' % (basename, name), mmap_mode=mode)
+              for name in metadata['arrays']}
+    return arrays, metadata